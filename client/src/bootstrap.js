@@ -0,0 +1,48 @@
+// One request for everything a screen needs on first load: the user, their
+// decks and inventory, and the card catalog. The catalog is cached in
+// localStorage by version, so the server only sends it again when it changed.
+
+const CATALOG_KEY = 'catalog';
+
+// Screens mounting together share one request
+const inFlight = {};
+
+function cachedCatalog() {
+    try {
+        return JSON.parse(localStorage.getItem(CATALOG_KEY)) || null;
+    } catch (error) {
+        return null;
+    }
+}
+
+export function loadBootstrap(userId) {
+    if (inFlight[userId]) {
+        return inFlight[userId];
+    }
+
+    const catalog = cachedCatalog();
+    const query = catalog ? `?catalog_version=${encodeURIComponent(catalog.version)}` : '';
+    const request = fetch(`/users/${userId}/bootstrap${query}`)
+        .then(res => {
+            if (!res.ok) {
+                throw new Error(`HTTP error ${res.status}`);
+            }
+            return res.json();
+        })
+        .then(data => {
+            let cards = data.cards;
+            if (cards) {
+                localStorage.setItem(CATALOG_KEY, JSON.stringify({ version: data.catalog_version, cards }));
+            } else {
+                cards = catalog.cards;
+            }
+            localStorage.setItem('user', JSON.stringify(data.user));
+            return { user: data.user, decks: data.decks, inventory: data.inventory, cards };
+        })
+        .finally(() => {
+            delete inFlight[userId];
+        });
+
+    inFlight[userId] = request;
+    return request;
+}
@@ -7,7 +7,6 @@ function DeckModal({ onClose, userId, decks, setDecks, inventory }) {
     const [selectedDeckCards, setSelectedDeckCards] = useState([]);
     const [tempDeckName, setTempDeckName] = useState('');
     const [savingDeck, setSavingDeck] = useState(false);
-    const [isAddingCard, setIsAddingCard] = useState(false);
     
     // Debug state changes
     useEffect(() => {
@@ -29,26 +28,25 @@ function DeckModal({ onClose, userId, decks, setDecks, inventory }) {
                 .then(data => {
                     if (data) {
                         console.log("Fetched deck cards:", data);
-                        // If more than 20 cards are returned, trim the list
-                        if (data.length > 20) {
-                            console.warn(`Deck has ${data.length} cards, limiting to 20`);
-                            data = data.slice(0, 20);
-                        }
-                        
-                        // Map the data to ensure it has the expected structure for the UI
-                        const processedCards = data.map(cardData => {
+                        // One UI entry per copy, with the structure the UI expects
+                        const processedCards = data.flatMap(cardData => {
                             // Check if the card data is nested under a 'card' property or directly
                             const cardInfo = cardData.card || cardData;
-                            return {
+                            const card = {
                                 id: cardInfo.id,
                                 name: cardInfo.name || 'Unknown Card',
                                 image: cardInfo.image || '/assets/images/card_backs/CARDBACK.png',
                                 power: cardInfo.power || 0,
                                 cost: cardInfo.cost || 0
                             };
+                            return Array.from({ length: cardData.quantity || 1 }, () => card);
                         });
                         
-                        setSelectedDeckCards(processedCards);
+                        // If more than 20 cards are returned, trim the list
+                        if (processedCards.length > 20) {
+                            console.warn(`Deck has ${processedCards.length} cards, limiting to 20`);
+                        }
+                        setSelectedDeckCards(processedCards.slice(0, 20));
                     }
                     setTempDeckName(selectedDeck.name);
                 })
@@ -89,35 +87,9 @@ function DeckModal({ onClose, userId, decks, setDecks, inventory }) {
     };
 
     // Handle removing a card from deck
+    // Deck edits stay local until the deck is saved
     const handleRemoveCard = (cardId) => {
-        // Update UI immediately for better user experience
         setSelectedDeckCards(prevCards => prevCards.filter(card => card.id !== cardId));
-        
-        console.log(`Attempting to remove card ${cardId} from deck ${selectedDeck.id}`);
-        
-        // Since DELETE method returns 405, try POST with a removal action
-        fetch(`/users/${userId}/decks/${selectedDeck.id}/cards`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({ 
-                card_id: cardId,
-                action: 'remove'
-            })
-        })
-            .then(res => {
-                if (!res.ok) {
-                    console.warn(`Card removal API call failed with status ${res.status}, but UI was updated`);
-                    return null;
-                }
-                console.log("Successfully removed card from deck via API");
-                return res.json();
-            })
-            .catch(err => {
-                console.error('Error removing card:', err);
-                // UI is already updated, so user experience is not affected
-            });
     };
 
     // Handle adding a card to deck
@@ -136,8 +108,6 @@ function DeckModal({ onClose, userId, decks, setDecks, inventory }) {
             alert(`You only own ${inventoryItem.quantity} copies of this card.`);
             return;
         }
-
-        setIsAddingCard(true);
         
         // Create a proper card object that matches the structure expected in the UI
         const cardToAdd = {
@@ -147,47 +117,7 @@ function DeckModal({ onClose, userId, decks, setDecks, inventory }) {
             power: inventoryItem.card.power,
             cost: inventoryItem.card.cost
         };
-        
-        // Try the API call, but update UI regardless of API success
-        fetch(`/users/${userId}/decks/${selectedDeck.id}/cards`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({ card_id: inventoryItem.card.id })
-        })
-            .then(res => {
-                if (!res.ok) {
-                    console.warn("API call failed, updating UI locally only");
-                    // Continue with UI update even if API fails
-                    return null;
-                }
-                return res.json();
-            })
-            .then(data => {
-                console.log("API response for adding card:", data);
-                
-                // Enforce the 20 card limit
-                if (selectedDeckCards.length < 20) {
-                    // Update the UI with our locally created card object
-                    console.log("Adding card to deck:", cardToAdd);
-                    setSelectedDeckCards(prevCards => [...prevCards, cardToAdd]);
-                } else {
-                    console.warn("Prevented adding card because deck is at capacity");
-                    alert("Deck is full: maximum 20 cards");
-                }
-            })
-            .catch(err => {
-                console.error('Error adding card:', err);
-                // Even on error, still update the UI (but enforce limit)
-                if (selectedDeckCards.length < 20) {
-                    console.log("Adding card to deck (after error):", cardToAdd);
-                    setSelectedDeckCards(prevCards => [...prevCards, cardToAdd]);
-                }
-            })
-            .finally(() => {
-                setIsAddingCard(false);
-            });
+        setSelectedDeckCards(prevCards => [...prevCards, cardToAdd]);
     };
 
     // Handle saving the deck name
@@ -207,22 +137,40 @@ function DeckModal({ onClose, userId, decks, setDecks, inventory }) {
 
         setSavingDeck(true);
         
+        // The whole composition as {card_id: copies}, replaced in one request
+        const composition = selectedDeckCards.reduce((counts, card) => {
+            counts[card.id] = (counts[card.id] || 0) + 1;
+            return counts;
+        }, {});
+        
         // Based on the errors, simplify the payload and ensure we're using the correct format
         const payload = JSON.stringify({ 
             name: finalDeckName
         });
         
         console.log(`Saving deck ${selectedDeck.id} with name "${finalDeckName}" for user ${userId}`);
-        console.log("Request payload:", payload);
         
-        // Use the correct API path pattern for consistency
-        fetch(`/users/${userId}/decks/${selectedDeck.id}`, {
-            method: 'PATCH',
+        fetch(`/users/${userId}/decks/${selectedDeck.id}/cards`, {
+            method: 'PUT',
             headers: {
                 'Content-Type': 'application/json'
             },
-            body: payload
+            body: JSON.stringify({ cards: composition })
         })
+            .then(async res => {
+                if (!res.ok) {
+                    const data = await res.json().catch(() => ({}));
+                    throw new Error(data.error || `HTTP error ${res.status}`);
+                }
+                // Use the correct API path pattern for consistency
+                return fetch(`/users/${userId}/decks/${selectedDeck.id}`, {
+                    method: 'PATCH',
+                    headers: {
+                        'Content-Type': 'application/json'
+                    },
+                    body: payload
+                });
+            })
             .then(res => {
                 console.log("PATCH response status:", res.status);
                 if (!res.ok) {
@@ -246,18 +194,9 @@ function DeckModal({ onClose, userId, decks, setDecks, inventory }) {
                 setView('decks');
             })
             .catch(err => {
+                // The deck's cards were not saved, so stay in the editor
                 console.error('Error updating deck:', err);
-                // Still update the UI and navigate back to decks view
-                const updatedDeck = {
-                    ...selectedDeck,
-                    name: finalDeckName
-                };
-                
-                setDecks(prevDecks => 
-                    prevDecks.map(deck => deck.id === selectedDeck.id ? updatedDeck : deck)
-                );
-                setSelectedDeck(updatedDeck);
-                setView('decks');
+                alert(`Could not save deck: ${err.message}`);
             })
             .finally(() => {
                 setSavingDeck(false);
@@ -539,15 +478,13 @@ function DeckModal({ onClose, userId, decks, setDecks, inventory }) {
                                             <button 
                                                 className="add-card-btn"
                                                 onClick={() => handleAddCard(item)}
-                                                disabled={isAddingCard || !canAddMore}
+                                                disabled={!canAddMore}
                                             >
                                                 {isDeckFull 
                                                     ? 'Deck Full' 
                                                     : !canAddMore 
                                                         ? 'Max Added' 
-                                                        : isAddingCard 
-                                                            ? 'Adding...' 
-                                                            : 'Add Copy'}
+                                                        : 'Add Copy'}
                                             </button>
                                         </div>
                                     );
@@ -561,7 +498,6 @@ function DeckModal({ onClose, userId, decks, setDecks, inventory }) {
                                 <button 
                                     className="done-adding-btn"
                                     onClick={() => setView('viewDeck')}
-                                    disabled={isAddingCard}
                                 >
                                     Done
                                 </button>
@@ -601,7 +537,6 @@ function DeckModal({ onClose, userId, decks, setDecks, inventory }) {
                                                 <button 
                                                     className="sidebar-remove-btn"
                                                     onClick={() => handleRemoveCard(card.id)}
-                                                    disabled={isAddingCard}
                                                     title="Remove one copy"
                                                 >
                                                     -
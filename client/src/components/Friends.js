@@ -12,6 +12,7 @@ const Friends = () => {
     const [error, setError] = useState('');
     const [success, setSuccess] = useState('');
     const [wins, setWins] = useState(0);
+    const [eventStreamKey, setEventStreamKey] = useState(0);
 
     // Medal thresholds
     const MEDAL_THRESHOLDS = [1, 5, 10, 20, 50];
@@ -59,14 +60,63 @@ const Friends = () => {
         loadUserData();
     }, [location.state?.user?.id, navigate]);
 
+    // Friend requests and answers are pushed over Server-Sent Events
+    useEffect(() => {
+        if (!userData.id) return;
+        const source = new EventSource(`http://localhost:5555/users/${userData.id}/events`);
+        let reconnecting = false;
+        let retryTimer = null;
+
+        source.onopen = () => {
+            // Catch up on anything sent while the stream was down
+            if (reconnecting) fetchFriendData(userData.id);
+            reconnecting = true;
+        };
+        source.onerror = () => {
+            // EventSource retries by itself unless the server refused the
+            // stream (e.g. 503 when busy); then refetch and reopen later
+            if (source.readyState === EventSource.CLOSED && !retryTimer) {
+                retryTimer = setTimeout(() => {
+                    fetchFriendData(userData.id);
+                    setEventStreamKey(key => key + 1);
+                }, 30000);
+            }
+        };
+        source.addEventListener('friend_request', (event) => {
+            const request = JSON.parse(event.data);
+            setFriendRequests(prev => prev.some(r => r.id === request.id) ? prev : [...prev, request]);
+        });
+        source.addEventListener('friend_request_answered', (event) => {
+            const request = JSON.parse(event.data);
+            if (request.status === 'accepted') {
+                fetchFriendData(userData.id);
+            }
+        });
+
+        return () => {
+            source.close();
+            clearTimeout(retryTimer);
+        };
+    }, [userData.id, eventStreamKey]);
+
     const fetchFriendData = async (userId) => {
         if (!userId) return;
         try {
-            const response = await fetch(`http://localhost:5555/users/${userId}/friends`);
-            if (!response.ok) throw new Error('Failed to fetch friend data');
-            const data = await response.json();
-            setFriendRequests(data.received_requests);
-            setFriends(data.friends);
+            // Friends come a page at a time; follow X-Next-Cursor to the end
+            let allFriends = [];
+            let receivedRequests = [];
+            let after = null;
+            do {
+                const query = after === null ? '' : `?after=${after}`;
+                const response = await fetch(`http://localhost:5555/users/${userId}/friends${query}`);
+                if (!response.ok) throw new Error('Failed to fetch friend data');
+                const data = await response.json();
+                receivedRequests = data.received_requests;
+                allFriends = allFriends.concat(data.friends);
+                after = response.headers.get('X-Next-Cursor');
+            } while (after !== null);
+            setFriendRequests(receivedRequests);
+            setFriends(allFriends);
         } catch (err) {
             console.error('Error fetching friend data:', err);
             setError('Failed to load friend data');
@@ -1,5 +1,6 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
+import { loadBootstrap } from '../../bootstrap';
 
 export function useGameLogic(userId, userData) {
     const navigate = useNavigate();
@@ -94,14 +95,8 @@ export function useGameLogic(userId, userData) {
 
     // Fetch user decks on component mount
     useEffect(() => {
-        fetch(`/users/${userId}/decks`)
-        .then(res => {
-            if (!res.ok) {
-                throw new Error(`HTTP error ${res.status}`);
-            }
-            return res.json();
-        })
-        .then(data => {
+        loadBootstrap(userId)
+        .then(({ decks: data }) => {
             setUserDecks(data);
             if (data.length > 0 && !selectedDeck) {
                 setSelectedDeck(data[0].id);
@@ -250,6 +245,58 @@ export function useGameLogic(userId, userData) {
         setShowIntroModal(true);
     };
 
+    // The server issues one id per game when it starts; only results under
+    // an id it issued are recorded, and a retried result is paid once
+    const matchIdRef = useRef(null);
+    const startMatch = async () => {
+        matchIdRef.current = null;
+        try {
+            const res = await fetch(`/users/${userId}/arena-matches`, { method: 'POST' });
+            if (!res.ok) {
+                throw new Error(`HTTP error ${res.status}`);
+            }
+            matchIdRef.current = (await res.json()).match_id;
+        } catch (error) {
+            console.error("Error starting match:", error);
+        }
+    };
+
+    // The server credits gems and wins; the client only reports the result
+    const recordMatch = async (outcome, attempt = 0, matchId = matchIdRef.current) => {
+        if (!matchId) {
+            console.error("Match was not started on the server; result not recorded");
+            return;
+        }
+        try {
+            const res = await fetch(`/users/${userId}/matches`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({
+                    match_id: matchId,
+                    outcome,
+                    rounds: roundCount,
+                    thiefDamage: gameStats.thiefDamage || 0,
+                    guardBlocks: gameStats.guardBlocks || 0,
+                    curseDamage: gameStats.curseDamage || 0
+                }),
+            });
+            if (!res.ok) {
+                throw new Error(`HTTP error ${res.status}`);
+            }
+            const data = await res.json();
+            const updatedUser = {...userData, wallet: data.wallet, wins: data.wins};
+            localStorage.setItem('user', JSON.stringify(updatedUser));
+        } catch (error) {
+            if (attempt < 2) {
+                setTimeout(() => recordMatch(outcome, attempt + 1, matchId), 1000 * (attempt + 1));
+            } else {
+                console.error("Error recording match:", error);
+            }
+        }
+    };
+
     // Handle victory and defeat
     const handleVictory = () => {
         setGameOver(true);
@@ -272,31 +319,7 @@ export function useGameLogic(userId, userData) {
         });
         setShowGameOverModal(true);
         
-        const newWallet = userData.wallet + 30;
-        fetch(`/users/${userId}`, {
-            method: 'PATCH',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({
-                wallet: newWallet
-            }),
-        })
-        .then(res => {
-            if (!res.ok) {
-                throw new Error(`HTTP error ${res.status}`);
-            }
-            return res.json();
-        })
-        .then(data => {
-            if (data.wallet !== undefined) {
-                const updatedUser = {...userData, wallet: data.wallet};
-                localStorage.setItem('user', JSON.stringify(updatedUser));
-            }
-        })
-        .catch(error => {
-            console.error("Error updating wallet:", error);
-        });
+        recordMatch('victory');
     };
 
     const handleDefeat = () => {
@@ -319,10 +342,12 @@ export function useGameLogic(userId, userData) {
             }
         });
         setShowGameOverModal(true);
+        recordMatch('defeat');
     };
 
     const handlePlayAgain = () => {
         // Reset game state
+        matchIdRef.current = null;
         setGameOver(false);
         setShowGameOverModal(false);
         setShowDeckSelectionModal(true);
@@ -364,6 +389,7 @@ export function useGameLogic(userId, userData) {
         try {
             setSelectedDeck(deckId);
             setShowDeckSelectionModal(false);
+            startMatch();
             
             // Fetch the selected deck's cards
             const response = await fetch(`/users/${userId}/decks/${deckId}/cards`);
@@ -547,82 +573,17 @@ export function useGameLogic(userId, userData) {
     // Generate opponent's deck
     const generateOpponentDeck = async () => {
         try {
-            const response = await fetch('/cards');
+            // The server builds a balanced deck (8 low, 7 medium, 5 high cost)
+            const response = await fetch('/arena/opponent-deck');
             if (!response.ok) {
                 throw new Error(`HTTP error ${response.status}`);
             }
-            const allCards = await response.json();
-            console.log("All cards:", allCards);
+            const deck = await response.json();
             
-            if (!allCards || allCards.length === 0) {
+            if (!deck || deck.length === 0) {
                 throw new Error('No cards available');
             }
             
-            // Create a balanced deck with 20 cards
-            const deck = [];
-            const cardTypes = {
-                low: [], // 1-2 mana
-                medium: [], // 3-4 mana
-                high: [] // 5+ mana
-            };
-            
-            // Sort cards by mana cost
-            allCards.forEach(card => {
-                // Each card already has cost, power, image, etc.
-                if (card.cost <= 2) cardTypes.low.push(card);
-                else if (card.cost <= 4) cardTypes.medium.push(card);
-                else cardTypes.high.push(card);
-            });
-            
-            console.log("Card types:", cardTypes);
-            
-            // Add cards to deck with balanced distribution
-            // 8 low cost cards
-            for (let i = 0; i < 8; i++) {
-                if (cardTypes.low.length === 0) break;
-                const randomIndex = Math.floor(Math.random() * cardTypes.low.length);
-                const baseCard = cardTypes.low[randomIndex];
-                deck.push({
-                    ...baseCard,
-                    id: `opponent-low-${i}`,
-                    // Keep the original image path
-                    image: baseCard.image
-                });
-            }
-            
-            // 7 medium cost cards
-            for (let i = 0; i < 7; i++) {
-                if (cardTypes.medium.length === 0) break;
-                const randomIndex = Math.floor(Math.random() * cardTypes.medium.length);
-                const baseCard = cardTypes.medium[randomIndex];
-                deck.push({
-                    ...baseCard,
-                    id: `opponent-medium-${i}`,
-                    // Keep the original image path
-                    image: baseCard.image
-                });
-            }
-            
-            // 5 high cost cards
-            for (let i = 0; i < 5; i++) {
-                if (cardTypes.high.length === 0) break;
-                const randomIndex = Math.floor(Math.random() * cardTypes.high.length);
-                const baseCard = cardTypes.high[randomIndex];
-                deck.push({
-                    ...baseCard,
-                    id: `opponent-high-${i}`,
-                    // Keep the original image path
-                    image: baseCard.image
-                });
-            }
-            
-            // Shuffle the deck
-            for (let i = deck.length - 1; i > 0; i--) {
-                const j = Math.floor(Math.random() * (i + 1));
-                [deck[i], deck[j]] = [deck[j], deck[i]];
-            }
-            
-            console.log("Generated opponent deck:", deck);
             return deck;
             
         } catch (error) {
@@ -653,8 +614,56 @@ export function useGameLogic(userId, userData) {
         }, 1500);
     };
 
+    // Ask the server's Monte Carlo AI for the opponent's move
+    const requestOpponentMove = async () => {
+        const laneCardIds = lanes => lanes.map(card => card ? card.card_id ?? parseInt(card.id, 10) : null);
+        try {
+            const response = await fetch('/arena/opponent-move', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({
+                    opponent_hand: opponentHand.map(card => card.card_id),
+                    player_lanes: laneCardIds(playerLaneCards),
+                    opponent_lanes: laneCardIds(enemyLaneCards),
+                    player_hand_size: playerHand.length,
+                    deck_sizes: { player: remainingDeck.length, opponent: opponentDeck.length },
+                    life: { player: playerLife, opponent: opponentLife },
+                    mana: { player: playerMana, opponent: opponentMana },
+                    round: roundCount,
+                    player_turns_left: Math.max(0, 3 - playerTurnCount),
+                    opponent_turns_left: Math.max(0, 3 - opponentTurnCount),
+                    budget_ms: 50
+                }),
+            });
+            if (!response.ok) {
+                throw new Error(`HTTP error ${response.status}`);
+            }
+            return await response.json();
+        } catch (error) {
+            console.error('Error requesting opponent move:', error);
+            return null;
+        }
+    };
+
+    // A random affordable card in a random empty lane, or null if none fits
+    const randomOpponentMove = () => {
+        const availableLanes = enemyLaneCards
+            .map((card, index) => card === null ? index : null)
+            .filter(lane => lane !== null);
+        const affordableCards = opponentHand.filter(card => card.cost <= opponentMana);
+        if (availableLanes.length === 0 || affordableCards.length === 0) {
+            return null;
+        }
+        return {
+            card: affordableCards[Math.floor(Math.random() * affordableCards.length)],
+            lane: availableLanes[Math.floor(Math.random() * availableLanes.length)]
+        };
+    };
+
     // Handle opponent's card placement
-    const handleOpponentPlacement = () => {
+    const handleOpponentPlacement = async () => {
         if (battleInitiated || gamePhase === 'battle') {
             return;
         }
@@ -667,34 +676,39 @@ export function useGameLogic(userId, userData) {
         }
         
         if (opponentHand.length > 0 && opponentMana > 0) {
-            const availableLanes = enemyLaneCards.map((card, index) => 
-                card === null ? index : null).filter(lane => lane !== null);
+            const move = await requestOpponentMove();
+            
+            let placement = null;
+            if (move === null) {
+                // The server could not choose; play a random legal move
+                // rather than passing the turn
+                placement = randomOpponentMove();
+            } else if (!move.pass) {
+                const cardToPlace = opponentHand[move.hand_index];
+                if (cardToPlace && enemyLaneCards[move.lane] === null && cardToPlace.cost <= opponentMana) {
+                    placement = { card: cardToPlace, lane: move.lane };
+                } else {
+                    placement = randomOpponentMove();
+                }
+            }
             
-            if (availableLanes.length > 0) {
-                const laneIndex = availableLanes[Math.floor(Math.random() * availableLanes.length)];
+            if (placement) {
+                const { card: cardToPlace, lane: laneIndex } = placement;
+                const faceDownCard = {
+                    ...cardToPlace,
+                    originalImage: cardToPlace.image,
+                    image: "/assets/images/card_backs/CARDBACK.png",
+                    revealed: false
+                };
                 
-                const affordableCards = opponentHand.filter(card => card.cost <= opponentMana);
+                const newLaneCards = [...enemyLaneCards];
+                newLaneCards[laneIndex] = faceDownCard;
+                setEnemyLaneCards(newLaneCards);
                 
-                if (affordableCards.length > 0) {
-                    const cardIndex = Math.floor(Math.random() * affordableCards.length);
-                    const cardToPlace = affordableCards[cardIndex];
-                    
-                    const faceDownCard = {
-                        ...cardToPlace,
-                        originalImage: cardToPlace.image,
-                        image: "/assets/images/card_backs/CARDBACK.png",
-                        revealed: false
-                    };
-                    
-                    const newLaneCards = [...enemyLaneCards];
-                    newLaneCards[laneIndex] = faceDownCard;
-                    setEnemyLaneCards(newLaneCards);
-                    
-                    const newHand = opponentHand.filter(card => card.id !== cardToPlace.id);
-                    setOpponentHand(newHand);
-                    
-                    setOpponentMana(prevMana => prevMana - cardToPlace.cost);
-                }
+                const newHand = opponentHand.filter(card => card.id !== cardToPlace.id);
+                setOpponentHand(newHand);
+                
+                setOpponentMana(prevMana => prevMana - cardToPlace.cost);
             }
         }
 
@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { Link, useLocation, useParams, useNavigate } from 'react-router-dom';
 import WelcomeGiftModal from './WelcomeGiftModal';
 import PaymentModal from './PaymentModal';
+import { loadBootstrap } from '../bootstrap';
 import '../styles/dashboard.css';
 
 function Dashboard(){
@@ -11,6 +12,7 @@ function Dashboard(){
     const [userData, setUserData] = useState(location.state?.user || {});
     const [showWelcomeGift, setShowWelcomeGift] = useState(false);
     const [showPaymentModal, setShowPaymentModal] = useState(false);
+    const [paymentNotice, setPaymentNotice] = useState(null);
     
     useEffect(() => {
         // First try to get data from localStorage
@@ -25,11 +27,10 @@ function Dashboard(){
         } 
         // If no data in localStorage and no userData but we have userId, fetch it
         else if (!userData.id && userId) {
-            fetch(`/users/${userId}`)
-                .then(res => res.json())
-                .then(data => {
+            // Also caches the catalog for the marketplace and arena
+            loadBootstrap(userId)
+                .then(({ user: data }) => {
                     setUserData(data);
-                    localStorage.setItem('user', JSON.stringify(data));
                     
                     // Only show welcome gift for new users (wallet = 100)
                     if (data.wallet === 100) {
@@ -52,42 +53,8 @@ function Dashboard(){
         setShowPaymentModal(false);
         
         if (amount > 0) {
-            // Calculate gems based on amount
-            let gems = 0;
-            switch(amount) {
-                case 10:
-                    gems = 100;
-                    break;
-                case 25:
-                    gems = 300;
-                    break;
-                case 50:
-                    gems = 700;
-                    break;
-                case 100:
-                    gems = 1500;
-                    break;
-                default:
-                    return;
-            }
-            
-            // Update user's wallet
-            const newWallet = userData.wallet + gems;
-            fetch(`/users/${userId}`, {
-                method: 'PATCH',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
-                body: JSON.stringify({
-                    wallet: newWallet
-                })
-            })
-            .then(res => res.json())
-            .then(data => {
-                setUserData(data);
-                localStorage.setItem('user', JSON.stringify(data));
-            })
-            .catch(err => console.error("Error updating wallet:", err));
+            // Gems are only credited once a payment provider confirms the charge
+            setPaymentNotice("Gem purchases are not available yet. You have not been charged.");
         }
     };
 
@@ -122,6 +89,7 @@ function Dashboard(){
                 <div className='user-header'>
                     <h2>Welcome {userData.username || 'User'}!</h2>
                     <p>Wallet: {userData.wallet} gems</p>
+                    {paymentNotice && <p className="payment-notice">{paymentNotice}</p>}
                 </div>
                 
                 <div className="content-wrapper">
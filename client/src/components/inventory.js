@@ -4,6 +4,7 @@ import { Link } from "react-router-dom";
 import '../styles/inventory.css';
 import DeckModal from './DeckModal';
 import CardModal from './CardModal';
+import { loadBootstrap } from '../bootstrap';
 
 function Inventory(){
     const { userId } = useParams();
@@ -18,35 +19,15 @@ function Inventory(){
     const [loading, setLoading] = useState(true);
     
     useEffect(() => {
-        // Fetch inventory
-        fetch(`/users/${userId}/inventory`)
-            .then(res => {
-                if (!res.ok) {
-                    throw new Error('Failed to fetch inventory');
-                }
-                return res.json();
-            })
-            .then(data => {
-                setInventory(data);
-            })
-            .catch(err => {
-                console.error('Error fetching inventory:', err);
-            });
-            
-        // Fetch user decks
-        fetch(`/users/${userId}/decks`)
-            .then(res => {
-                if (!res.ok) {
-                    throw new Error('Failed to fetch decks');
-                }
-                return res.json();
-            })
+        // Inventory and decks in one request
+        loadBootstrap(userId)
             .then(data => {
-                setDecks(data);
+                setInventory(data.inventory);
+                setDecks(data.decks);
                 setLoading(false);
             })
             .catch(err => {
-                console.error('Error fetching decks:', err);
+                console.error('Error fetching inventory and decks:', err);
                 setLoading(false);
             });
     }, [userId]);
@@ -2,6 +2,7 @@ import React, {useState, useEffect} from "react";
 import { useLocation, useParams, Link, useNavigate } from 'react-router-dom';
 import PurchaseModal from './PurchaseModal';
 import CardModal from './CardModal';
+import { loadBootstrap } from '../bootstrap';
 import '../styles/marketplace.css'; // We'll create this CSS file next
 
 function Marketplace(){
@@ -21,7 +22,6 @@ function Marketplace(){
     const [wallet, setWallet] = useState(initialUserData.wallet);
     const [error, setError] = useState("");
     const [user, setUser] = useState(initialUserData);
-    const [cardPrices, setCardPrices] = useState({});
     
     // Add modal state
     const [modal, setModal] = useState({
@@ -87,28 +87,21 @@ function Marketplace(){
     }, [userId, user.id]);
 
     useEffect(() => {
-        fetch('/cards')
-        .then(res => res.json())
-        .then(data => {
+        // The catalog comes from localStorage unless it changed on the server
+        loadBootstrap(userId)
+        .then(({ cards: data }) => {
             // Create a deep copy of the data array
             const dataCopy = JSON.parse(JSON.stringify(data));
             // Shuffle the cards
             const shuffledCards = shuffleArray(dataCopy);
             
-            // Generate and store random prices for each card
-            const prices = {};
-            shuffledCards.forEach(card => {
-                prices[card.id] = Math.floor(Math.random() * 20) + 5;
-            });
-            
-            setCardPrices(prices);
             setCards(shuffledCards);
             if (data.length > 0) {
                 guardBundle(data);
             }
         })
         .catch(error => console.error('Error fetching cards:', error));
-    }, []);
+    }, [userId]);
 
     // Fisher-Yates shuffle algorithm
     function shuffleArray(array) {
@@ -146,61 +139,41 @@ function Marketplace(){
         }
     }
     
-    function mysteryCardBuy(){
-        if (wallet < 10) {
-            setError("Not enough gems to buy this card");
-            return;
-        }
-        
-        const randomIndex = Math.floor(Math.random() * cards.length);
-        const selectedCard = cards[randomIndex];
-        
-        // Show the card immediately
-        setMysteryCardImage(selectedCard);
-        setMysteryCard(true);
-        
-        // Add card to inventory
-        fetch(`/users/${userId}/inventory`, {
+    // Debit the wallet and add the cards to inventory in one request. The
+    // server prices the order (and draws pack cards); `cost` is the price shown,
+    // so a stale price is refused rather than charged.
+    function purchaseCards(order) {
+        return fetch(`/users/${userId}/purchases`, {
             method: 'POST',
-            headers:{
+            headers: {
                 'Content-Type': 'application/json'
             },
-            body: JSON.stringify({
-                card_id: selectedCard.id,
-                quantity: 1
-            })
-        })
-        .then(res => {
-            if (!res.ok) throw new Error("Failed to add card to inventory");
-            return res.json();
+            body: JSON.stringify(order)
         })
+        .then(res => res.json().then(data => {
+            if (!res.ok) throw new Error(data.error || "Purchase failed");
+            return data;
+        }))
         .then(data => {
-            // Show purchase modal
-            openPurchaseModal(selectedCard.name, selectedCard.image);
-            
-            // Update wallet
-            const newWallet = wallet - 10;
-            console.log(`Updating wallet from ${wallet} to ${newWallet}`);
-            return fetch(`/users/${userId}`, {
-                method: 'PATCH',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
-                body: JSON.stringify({
-                    wallet: newWallet
-                })
-            });
-        })
-        .then(res => {
-            if (!res.ok) throw new Error("Failed to update wallet");
-            return res.json();
-        })
-        .then(data => {
-            // Update wallet from server response
-            console.log(`Server returned wallet value: ${data.wallet}`);
             setWallet(data.wallet);
             setUser({...user, wallet: data.wallet});
             localStorage.setItem('user', JSON.stringify({...user, wallet: data.wallet}));
+            return data;
+        });
+    }
+    
+    function mysteryCardBuy(){
+        if (wallet < 10) {
+            setError("Not enough gems to buy this card");
+            return;
+        }
+        
+        purchaseCards({ pack: 'mystery', cost: 10 })
+        .then(data => {
+            const selectedCard = cards.find(card => card.id === data.cards[0]);
+            setMysteryCardImage(selectedCard);
+            setMysteryCard(true);
+            openPurchaseModal(selectedCard.name, selectedCard.image);
             
             // Reset mystery card after 3 seconds
             setTimeout(() => {
@@ -209,6 +182,7 @@ function Marketplace(){
         })
         .catch(err => {
             console.error("Error in mystery card purchase:", err);
+            setError(err.message);
             setTimeout(() => {
                 setMysteryCard(false);
             }, 3000);
@@ -222,59 +196,15 @@ function Marketplace(){
             return;
         }   
         
-        const randomIndex = Math.floor(Math.random() * (cards.length - 5));
-        const selectedCards = cards.slice(randomIndex, randomIndex + 5);
-        setBoosterPack(selectedCards);
-        setShowBoosterPack(false);
+        purchaseCards({ pack: 'booster', cost: 25 })
+            .then(data => {
+                const selectedCards = cards.filter(card => data.cards.includes(card.id));
+                setBoosterPack(selectedCards);
+                setShowBoosterPack(false);
 
-        // Show modal with all 5 cards from the booster pack
-        openPurchaseModal("Booster Pack", null, selectedCards);
+                // Show modal with all 5 cards from the booster pack
+                openPurchaseModal("Booster Pack", null, selectedCards);
 
-        // Create promises for each card to add to inventory
-        const addCardPromises = selectedCards.map(card => 
-            fetch(`/users/${userId}/inventory`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
-                body: JSON.stringify({
-                    card_id: card.id,
-                    quantity: 1
-                })
-            })
-            .then(res => {
-                if (!res.ok) throw new Error(`Failed to add card ${card.name} to inventory`);
-                return res.json();
-            })
-        );
-        
-        // Execute all promises
-        Promise.all(addCardPromises)
-            .then(() => {
-                console.log("All booster pack cards added to inventory");
-                
-                // Update wallet on server
-                const newWallet = wallet - 25;
-                console.log(`Updating wallet from ${wallet} to ${newWallet}`);
-                return fetch(`/users/${userId}`, {
-                    method: 'PATCH',
-                    headers: {
-                        'Content-Type': 'application/json'
-                    },
-                    body: JSON.stringify({wallet: newWallet})
-                });
-            })
-            .then(res => {
-                if (!res.ok) throw new Error("Failed to update wallet");
-                return res.json();
-            })
-            .then(data => {
-                // Update wallet from server response
-                console.log(`Server returned wallet value: ${data.wallet}`);
-                setWallet(data.wallet);
-                setUser({...user, wallet: data.wallet});
-                localStorage.setItem('user', JSON.stringify({...user, wallet: data.wallet}));
-                
                 // Reset booster pack after 3 seconds
                 setTimeout(() => {
                     setShowBoosterPack(true);
@@ -299,51 +229,11 @@ function Marketplace(){
         // Show modal with all guard cards
         openPurchaseModal("Guard Bundle", null, guardCards);
         
-        // Create promises for each card to add to inventory
-        const addCardPromises = guardCards.map(card => 
-            fetch(`/users/${userId}/inventory`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
-                body: JSON.stringify({
-                    card_id: card.id,
-                    quantity: 1
-                })
-            })
-            .then(res => {
-                if (!res.ok) throw new Error(`Failed to add card ${card.name} to inventory`);
-                return res.json();
-            })
-        );
-        
-        // Execute all promises
-        Promise.all(addCardPromises)
-            .then(() => {
-                console.log("All guard cards added to inventory");
-                
-                // Update wallet on server
-                const newWallet = wallet - 20;
-                console.log(`Updating wallet from ${wallet} to ${newWallet}`);
-                return fetch(`/users/${userId}`, {
-                    method: 'PATCH',
-                    headers: {
-                        'Content-Type': 'application/json'
-                    },
-                    body: JSON.stringify({wallet: newWallet})
-                });
-            })
-            .then(res => {
-                if (!res.ok) throw new Error("Failed to update wallet");
-                return res.json();
-            })
-            .then(data => {
-                // Update wallet from server response
-                console.log(`Server returned wallet value: ${data.wallet}`);
-                setWallet(data.wallet);
-                setUser({...user, wallet: data.wallet});
-                localStorage.setItem('user', JSON.stringify({...user, wallet: data.wallet}));
-            })
+        purchaseCards({
+            pack: 'guard',
+            items: guardCards.map(card => ({ card_id: card.id, quantity: 1 })),
+            cost: 20
+        })
             .catch(err => {
                 console.error("Error during guard bundle purchase:", err);
                 setError(err.message);
@@ -351,7 +241,7 @@ function Marketplace(){
     }
 
     function cardBuy(card) {
-        const price = cardPrices[card.id];
+        const price = card.price;
         console.log(`Attempting to buy ${card.name} for ${price} gems`);
         
         if (wallet < price) {
@@ -359,51 +249,10 @@ function Marketplace(){
             return;
         }
         
-        // Add card to inventory
-        fetch(`/users/${userId}/inventory`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({
-                card_id: card.id,
-                quantity: 1
-            })
-        })
-        .then(res => {
-            if (!res.ok) throw new Error("Failed to add card to inventory");
-            return res.json();
-        })
-        .then(data => {
-            console.log(`Added ${card.name} to inventory`);
-            
-            // Show the purchase modal
+        purchaseCards({ items: [{ card_id: card.id, quantity: 1 }], cost: price })
+        .then(() => {
             openPurchaseModal(card.name, card.image);
             
-            // Update wallet
-            const newWallet = wallet - price;
-            console.log(`Updating wallet from ${wallet} to ${newWallet}`);
-            return fetch(`/users/${userId}`, {
-                method: 'PATCH',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
-                body: JSON.stringify({
-                    wallet: newWallet
-                })
-            });
-        })
-        .then(res => {
-            if (!res.ok) throw new Error("Failed to update wallet");
-            return res.json();
-        })
-        .then(data => {
-            // Update wallet from server response
-            console.log(`Server returned wallet value: ${data.wallet}`);
-            setWallet(data.wallet);
-            setUser({...user, wallet: data.wallet});
-            localStorage.setItem('user', JSON.stringify({...user, wallet: data.wallet}));
-            
             setError(`Successfully purchased ${card.name}!`);
             setTimeout(() => setError(""), 3000);
         })
@@ -501,7 +350,7 @@ function Marketplace(){
                             <img src={card.image} alt={card.name} />
                             <div className="card-details">
                                 <div className="card-name">{card.name}</div>
-                                <div className="price">Price: {cardPrices[card.id] || 10} GEMS</div>
+                                <div className="price">Price: {card.price} GEMS</div>
                             </div>
                             <button 
                                 className="buy-button"
@@ -0,0 +1,80 @@
+"""add lookup indexes and unique keys
+
+Revision ID: 3f9a1c2d7b10
+Revises: 
+Create Date: 2026-10-18 19:05:00.000000
+
+The schema predates migrations and is created with db.create_all(), so this is
+the first revision. Stamp a freshly created database with `flask db stamp head`;
+existing databases run `flask db upgrade`. Databases stamped by an older,
+discarded migration history need `flask db stamp --purge base` first.
+
+Duplicate (user_id, card_id) inventory rows and (deck_id, card_id) deck rows
+are merged into the oldest row, summing quantities, before the unique keys are
+added.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c2d7b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def merge_duplicates(table, owner_column):
+    op.execute(f"""
+        UPDATE {table} SET quantity = (
+            SELECT SUM(dup.quantity) FROM {table} dup
+            WHERE dup.{owner_column} = {table}.{owner_column}
+              AND dup.card_id = {table}.card_id
+        )
+        WHERE id IN (
+            SELECT MIN(id) FROM {table}
+            GROUP BY {owner_column}, card_id
+            HAVING COUNT(*) > 1
+        )
+    """)
+    op.execute(f"""
+        DELETE FROM {table}
+        WHERE id NOT IN (
+            SELECT MIN(id) FROM {table}
+            GROUP BY {owner_column}, card_id
+        )
+    """)
+
+
+def upgrade():
+    merge_duplicates('inventories', 'user_id')
+    merge_duplicates('cards_in_deck', 'deck_id')
+
+    with op.batch_alter_table('inventories', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_inventories_user_id_card_id', ['user_id', 'card_id'])
+
+    with op.batch_alter_table('cards_in_deck', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_cards_in_deck_deck_id_card_id', ['deck_id', 'card_id'])
+
+    with op.batch_alter_table('decks', schema=None) as batch_op:
+        batch_op.create_index('ix_decks_user_id', ['user_id'], unique=False)
+
+    with op.batch_alter_table('friend_requests', schema=None) as batch_op:
+        batch_op.create_index('ix_friend_requests_receiver_id_status', ['receiver_id', 'status'], unique=False)
+        batch_op.create_index('ix_friend_requests_sender_id_receiver_id', ['sender_id', 'receiver_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('friend_requests', schema=None) as batch_op:
+        batch_op.drop_index('ix_friend_requests_sender_id_receiver_id')
+        batch_op.drop_index('ix_friend_requests_receiver_id_status')
+
+    with op.batch_alter_table('decks', schema=None) as batch_op:
+        batch_op.drop_index('ix_decks_user_id')
+
+    with op.batch_alter_table('cards_in_deck', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_cards_in_deck_deck_id_card_id', type_='unique')
+
+    with op.batch_alter_table('inventories', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_inventories_user_id_card_id', type_='unique')
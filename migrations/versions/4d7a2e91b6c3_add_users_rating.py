@@ -0,0 +1,26 @@
+"""add users rating
+
+Revision ID: 4d7a2e91b6c3
+Revises: c5d17e3b4a82
+Create Date: 2026-10-18 21:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d7a2e91b6c3'
+down_revision = 'c5d17e3b4a82'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rating', sa.Integer(), server_default='1200', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('rating')
@@ -0,0 +1,29 @@
+"""add users updated_at index
+
+Revision ID: 8b2e4f6a9c31
+Revises: 3f9a1c2d7b10
+Create Date: 2026-10-18 20:10:00.000000
+
+The leaderboard in each worker syncs wins changed by other workers by reading
+users whose updated_at moved since its last sync.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4f6a9c31'
+down_revision = '3f9a1c2d7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('ix_users_updated_at', ['updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_updated_at')
@@ -0,0 +1,43 @@
+"""add matches
+
+Revision ID: c5d17e3b4a82
+Revises: 8b2e4f6a9c31
+Create Date: 2026-10-18 20:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d17e3b4a82'
+down_revision = '8b2e4f6a9c31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('matches',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('match_id', sa.String(length=64), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('outcome', sa.String(length=20), nullable=False),
+        sa.Column('rounds', sa.Integer(), nullable=True),
+        sa.Column('thief_damage', sa.Integer(), nullable=True),
+        sa.Column('guard_blocks', sa.Integer(), nullable=True),
+        sa.Column('curse_damage', sa.Integer(), nullable=True),
+        sa.Column('gems_earned', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], name=op.f('fk_matches_user_id_users')),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_matches')),
+        sa.UniqueConstraint('match_id', name=op.f('uq_matches_match_id'))
+    )
+    with op.batch_alter_table('matches', schema=None) as batch_op:
+        batch_op.create_index('ix_matches_user_id', ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('matches', schema=None) as batch_op:
+        batch_op.drop_index('ix_matches_user_id')
+
+    op.drop_table('matches')
@@ -1,19 +1,37 @@
 #!/usr/bin/env python3
 
-from flask import Flask, request, make_response, jsonify, session
+from flask import Flask, Response, request, make_response, jsonify, session
 from flask_restful import Api, Resource
 from flask_migrate import Migrate
 from flask_cors import CORS
 from werkzeug.exceptions import NotFound, Unauthorized
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 import os
 import sys
+import uuid
+from bisect import bisect_right
+from collections import defaultdict
 
 # Add the parent directory to sys.path to enable absolute imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Use absolute imports
-from server.models import db, User, Card, Inventory, Deck, CardInDeck, FriendRequest
+from server.models import db, apply_sqlite_pragmas, User, Card, Inventory, Deck, CardInDeck, FriendRequest, Match
+from server.models import MATCH_OUTCOMES, MATCH_PENDING
 from server.config import Config
+from server.catalog import card_catalog, card_price, CARD_FIELDS, PACKS
+from server.serializers import inventory_serializer, deck_serializer, card_in_deck_serializer, serializer_for
+from server.pagination import page_args, paginate, split_page, page_headers, check_fields, project
+from server.leaderboard import leaderboard
+from server.friend_graph import friend_graph
+from server.passwords import hasher, PasswordHasherBusy
+from server.events import event_hub, EventHubFull
+from server.matchmaking import matchmaker, elo_delta
+from server.representations import json_representation
+from server.request_log import init_request_logging
+from server.metrics import init_metrics
+from server.engine import ai
 
 app = Flask(__name__)
 app.config.from_object(Config)
@@ -22,28 +40,123 @@ app.config['SESSION_COOKIE_SECURE'] = False
 
 # Initialize extensions
 db.init_app(app)
+with app.app_context():
+    apply_sqlite_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
 migrate = Migrate(app, db)
+init_request_logging(app)
+init_metrics(app, (User, Card, Inventory, Deck, CardInDeck, FriendRequest, Match))
+card_catalog.check_interval = app.config['CARD_CATALOG_CHECK_INTERVAL']
+leaderboard.sync_interval = app.config['LEADERBOARD_SYNC_INTERVAL']
+leaderboard.rebuild_interval = app.config['LEADERBOARD_REBUILD_INTERVAL']
+friend_graph.ttl = app.config['FRIEND_GRAPH_TTL']
+friend_graph.max_users = app.config['FRIEND_GRAPH_MAX_USERS']
+hasher.configure(
+    method=app.config['PASSWORD_HASH_METHOD'],
+    workers=app.config['PASSWORD_HASH_WORKERS'],
+    max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+)
+matchmaker.base_gap = app.config['MATCHMAKING_BASE_GAP']
+matchmaker.gap_per_second = app.config['MATCHMAKING_GAP_PER_SECOND']
+matchmaker.max_gap = app.config['MATCHMAKING_MAX_GAP']
+matchmaker.sweep_interval = app.config['MATCHMAKING_SWEEP_INTERVAL']
+matchmaker.pairing_ttl = app.config['MATCHMAKING_PAIRING_TTL']
+matchmaker.notify = event_hub.publish
+event_hub.configure(
+    redis_url=app.config['EVENTS_REDIS_URL'],
+    queue_size=app.config['EVENTS_QUEUE_SIZE'],
+    max_blocking=app.config['EVENTS_MAX_BLOCKING_STREAMS'],
+)
+if app.config['AI_WORKERS']:
+    ai.planner.workers = app.config['AI_WORKERS']
+if app.config['AI_WARM_UP']:
+    with app.app_context():
+        try:
+            startup_catalog = card_catalog.snapshot()
+        except SQLAlchemyError:
+            # No cards table yet (init_db.py, a first migration): the first
+            # move starts the pool instead
+            startup_catalog = None
+    if startup_catalog is not None and startup_catalog.cards:
+        ai.planner.warm_up(
+            startup_catalog.version,
+            ai.planner.table_for(startup_catalog.version, startup_catalog.cards),
+        )
 
 # Configure CORS
+CORS_EXPOSE_HEADERS = ["Content-Type", "Authorization", "ETag", "X-Next-Cursor"]
 CORS(app, 
      resources={r"/*": {
          "origins": app.config['CORS_ORIGINS'],
          "supports_credentials": True,
          "allow_headers": ["Content-Type", "Authorization"],
          "methods": ["GET", "PUT", "POST", "DELETE", "OPTIONS"],
-         "expose_headers": ["Content-Type", "Authorization"]
+         "expose_headers": CORS_EXPOSE_HEADERS
      }})
 
 api = Api(app)
+json_representation.min_size = app.config['COMPRESS_MIN_SIZE']
+json_representation.gzip_level = app.config['COMPRESS_GZIP_LEVEL']
+json_representation.brotli_quality = app.config['COMPRESS_BROTLI_QUALITY']
+api.representation('application/json')(json_representation)
+
+
+
+def hasher_busy():
+    return {'error': 'Too many sign-ins in progress, try again shortly'}, 429, {'Retry-After': '1'}
+
+def user_exists(user_id):
+    return db.session.execute(
+        select(User.id).where(User.id == user_id)
+    ).first() is not None
+
+# Columns exposed by User.to_dict(), selectable with ?fields=
+USER_FIELDS = {
+    'id': User.id,
+    'username': User.username,
+    'email': User.email,
+    'wallet': User.wallet,
+    'wins': User.wins,
+    'rating': User.rating,
+    'created_at': User.created_at,
+    'updated_at': User.updated_at,
+}
+
+# What a user may change on their own profile with PATCH /users/<id>. Gems,
+# wins and rating only move through purchases and matches.
+PROFILE_FIELDS = ('username', 'email', 'password')
 
+# Match stats as the arena client names them
+MATCH_STATS = (
+    ('rounds', 'rounds'),
+    ('thief_damage', 'thiefDamage'),
+    ('guard_blocks', 'guardBlocks'),
+    ('curse_damage', 'curseDamage'),
+)
 
+# Deck card listing: the card_in_deck fields the endpoint has always returned
+DECK_CARD_FIELDS = ('id', 'deck_id', 'card', 'quantity')
 
 # Define API Resources
 class Users(Resource):
     def get(self):
-        users = User.query.all()
-        print("All users in database:", [(user.id, user.username, user.email) for user in users])
-        return [user.to_dict() for user in users], 200
+        try:
+            after, limit, fields = page_args(default_limit=app.config['USERS_PAGE_SIZE'])
+            fields = fields or tuple(USER_FIELDS)
+            check_fields(fields, USER_FIELDS)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
+        # The id is selected last for the cursor whether or not it was requested
+        columns = [USER_FIELDS[field] for field in fields] + [User.id]
+        rows = db.session.execute(paginate(select(*columns), User.id, after, limit)).all()
+        rows, next_cursor = split_page(rows, limit, len(fields))
+        
+        users = [
+            {field: value.isoformat() if hasattr(value, 'isoformat') else value
+             for field, value in zip(fields, row)}
+            for row in rows
+        ]
+        return users, 200, page_headers(next_cursor)
     
     def post(self):
         data = request.get_json()
@@ -64,56 +177,36 @@ class Users(Resource):
             
             try:
                 new_user.password_hash = data['password']
+            except PasswordHasherBusy:
+                return hasher_busy()
             except Exception as e:
                 print(f"Error setting password: {str(e)}")
                 return {'error': f'Password error: {str(e)}'}, 400
             
-            db.session.add(new_user)
-            
+            # One transaction: the user, then the starter deck and the matching
+            # inventory as bulk inserts from the cached template
+            starter_deck = card_catalog.get_starter_deck()
             try:
-                db.session.commit()
-                
-                # Create starter deck
-                default_deck = Deck(
-                    name="Starter Deck",
-                    user_id=new_user.id,
-                    volume=20
-                )
-                db.session.add(default_deck)
+                db.session.add(new_user)
                 db.session.flush()
                 
-                # Get starter cards
-                guards = Card.query.filter_by(guard=True).limit(5).all()
-                thieves = Card.query.filter_by(thief=True).limit(5).all()
-                curses = Card.query.filter_by(curse=True).limit(5).all()
-                regulars = Card.query.filter(
-                    ~Card.id.in_([c.id for c in guards + thieves + curses])
-                ).limit(5).all()
-                
-                deck_cards = []
-                inventory_items = []
-                
-                for card in guards + thieves + curses + regulars:
-                    # Add to deck
-                    deck_card = CardInDeck(
-                        deck_id=default_deck.id,
-                        card_id=card.id,
-                        quantity=1
-                    )
-                    deck_cards.append(deck_card)
-                    
-                    # Add to inventory
-                    inventory_item = Inventory(
-                        user_id=new_user.id,
-                        card_id=card.id,
-                        quantity=1
-                    )
-                    inventory_items.append(inventory_item)
-                
-                db.session.add_all(deck_cards)
-                db.session.add_all(inventory_items)
+                deck_id = db.session.execute(
+                    insert(Deck.__table__).values(name="Starter Deck", user_id=new_user.id, volume=20)
+                ).inserted_primary_key[0]
+                if starter_deck:
+                    db.session.execute(insert(CardInDeck.__table__), [
+                        {'deck_id': deck_id, 'card_id': card_id, 'quantity': quantity}
+                        for card_id, quantity in starter_deck
+                    ])
+                    db.session.execute(insert(Inventory.__table__), [
+                        {'user_id': new_user.id, 'card_id': card_id, 'quantity': quantity}
+                        for card_id, quantity in starter_deck
+                    ])
                 db.session.commit()
                 
+            except IntegrityError:
+                db.session.rollback()
+                return {'error': 'Username or email already taken'}, 409
             except Exception as e:
                 db.session.rollback()
                 print(f"Database commit error: {str(e)}")
@@ -122,6 +215,7 @@ class Users(Resource):
             session['user_id'] = new_user.id
             
             user_dict = new_user.to_dict()
+            leaderboard.set_wins(new_user.id, new_user.wins)
             return user_dict, 201
             
         except ValueError as e:
@@ -143,21 +237,26 @@ class UserById(Resource):
         if not user:
             return {'error': 'User not found'}, 404
         
-        data = request.get_json()
+        data = request.get_json() or {}
+        refused = set(data).difference(PROFILE_FIELDS)
+        if refused:
+            return {'error': f"Cannot change {', '.join(sorted(refused))}; "
+                             f"editable fields are {', '.join(PROFILE_FIELDS)}"}, 400
         
         try:
             for attr in data:
                 if attr == 'password':
-                    user.password_hash = data['password']
-                elif attr == 'wallet':
-                    wallet_value = int(data['wallet'])
-                    user.wallet = wallet_value
+                    try:
+                        user.password_hash = data['password']
+                    except PasswordHasherBusy:
+                        return hasher_busy()
                 else:
                     setattr(user, attr, data[attr])
             
             db.session.commit()
             return user.to_dict(), 200
         except Exception as e:
+            db.session.rollback()
             print(f"Error in PATCH: {str(e)}")
             return {'error': str(e)}, 400
     
@@ -168,76 +267,414 @@ class UserById(Resource):
         
         db.session.delete(user)
         db.session.commit()
+        leaderboard.remove(id)
+        friend_graph.invalidate(id)
+        matchmaker.leave(id)
         
         return {}, 204
 
+def catalog_not_modified(version):
+    """Return a bodyless 304 if the client already holds this catalog version."""
+    # Weak match: compressed responses carry the ETag as W/"..."
+    if request.if_none_match.contains_weak(version):
+        response = make_response('', 304)
+        response.set_etag(version)
+        return response
+    return None
+
+def catalog_headers(version):
+    return {'ETag': f'"{version}"', 'Cache-Control': 'no-cache'}
+
 class Cards(Resource):
     def get(self):
-        cards = Card.query.all()
-        return [card.to_dict() for card in cards], 200
+        try:
+            after, limit, fields = page_args()
+            if fields:
+                check_fields(fields, CARD_FIELDS)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        # One snapshot, so the cards and the ETag are the same version
+        catalog = card_catalog.snapshot()
+        not_modified = catalog_not_modified(catalog.version)
+        if not_modified:
+            return not_modified
+        
+        # The catalog is cached in id order, so pages are slices of it
+        cards = catalog.cards
+        headers = catalog_headers(catalog.version)
+        if after is not None:
+            cards = cards[bisect_right([card['id'] for card in cards], after):]
+        if limit is not None and len(cards) > limit:
+            cards = cards[:limit]
+            headers.update(page_headers(cards[-1]['id']))
+        return project(cards, fields), 200, headers
     
     
 
 class CardById(Resource):
     def get(self, id):
-        card = Card.query.filter_by(id=id).first()
+        catalog = card_catalog.snapshot()
+        card = catalog.get_card(id)
         if not card:
             return {'error': 'Card not found'}, 404
-        return card.to_dict(), 200
+        not_modified = catalog_not_modified(catalog.version)
+        if not_modified:
+            return not_modified
+        return card, 200, catalog_headers(catalog.version)
     
 
 class UserInventory(Resource):
     def get(self, user_id):
+        try:
+            after, limit, fields = page_args()
+            serializer = inventory_serializer.only(fields) if fields else inventory_serializer
+        except ValueError as e:
+            return {'error': str(e)}, 400
         
-        user = User.query.filter_by(id=user_id).first()
-        if not user:
+        # Plain rows; each item's card comes from the catalog cache
+        rows = db.session.execute(paginate(
+            select(*serializer.columns).where(Inventory.user_id == user_id),
+            Inventory.id, after, limit
+        )).all()
+        rows, next_cursor = split_page(rows, limit, serializer.id_index)
+        # Only an empty result needs the user existence check
+        if not rows and not user_exists(user_id):
             return {'error': 'User not found'}, 404
         
-        inventory = Inventory.query.filter_by(user_id=user_id).all()
-        return [item.to_dict() for item in inventory], 200
-    
+        lookups = {'card': card_catalog.get_by_id()} if 'card' in serializer.fields else {}
+        return serializer.from_rows(rows, **lookups), 200, page_headers(next_cursor)
+
+
+class UserPurchases(Resource):
     def post(self, user_id):
+        data = request.get_json() or {}
+        pack = data.get('pack')
         
-        user = User.query.filter_by(id=user_id).first()
-        if not user:
-            return {'error': 'User not found'}, 404
+        # A pack, or a single card_id/quantity or a list of items at card prices
+        items = data.get('items')
+        if items is None and pack in (None, 'guard'):
+            items = [{'card_id': data.get('card_id'), 'quantity': data.get('quantity', 1)}]
         
-        data = request.get_json()
+        # Draws, lookups and prices all come from one catalog version
+        catalog = card_catalog.snapshot()
+        try:
+            quantities = {}
+            if pack in ('mystery', 'booster'):
+                for card_id in catalog.draw(PACKS[pack]['cards']):
+                    quantities[card_id] = 1
+            elif pack is None or pack == 'guard':
+                for item in items:
+                    card_id = int(item['card_id'])
+                    quantity = int(item.get('quantity', 1))
+                    if quantity < 1:
+                        raise ValueError("Quantity must be at least 1")
+                    quantities[card_id] = quantities.get(card_id, 0) + quantity
+            else:
+                raise ValueError(f"Unknown pack {pack!r}")
+        except KeyError as e:
+            return {'error': f'{e.args[0]} is required'}, 400
+        except (TypeError, ValueError) as e:
+            return {'error': str(e)}, 400
+        
+        if not quantities:
+            return {'error': 'No cards to purchase'}, 400
+        for card_id in quantities:
+            if catalog.get_card(card_id) is None:
+                return {'error': f'Card {card_id} not found'}, 404
+        
+        # The price comes from the catalog; a client-sent cost only confirms it
+        if pack is None:
+            cost = sum(card_price(catalog.get_card(card_id)) * quantity
+                       for card_id, quantity in quantities.items())
+        else:
+            cost = PACKS[pack]['price']
+        if pack == 'guard' and (
+                len(quantities) > PACKS['guard']['cards'] or
+                any(quantity > 1 or not catalog.get_card(card_id)['guard']
+                    for card_id, quantity in quantities.items())):
+            return {'error': f"A guard bundle is up to {PACKS['guard']['cards']} different guards"}, 400
+        if 'cost' in data:
+            try:
+                confirmed = int(data['cost'])
+            except (TypeError, ValueError):
+                return {'error': 'cost must be an integer'}, 400
+            if confirmed != cost:
+                return {'error': f'The price is {cost} gems'}, 400
         
         try:
+            # Debit only if the wallet covers the cost; the conditional UPDATE
+            # locks the user row so concurrent purchases cannot overdraw it.
+            debited = db.session.execute(
+                update(User.__table__)
+                .where(User.id == user_id, User.wallet >= cost)
+                .values(wallet=User.wallet - cost)
+            ).rowcount
             
-            card = Card.query.filter_by(id=data['card_id']).first()
-            if not card:
-                return {'error': 'Card not found'}, 404
+            if not debited:
+                exists = user_exists(user_id)
+                db.session.rollback()
+                if not exists:
+                    return {'error': 'User not found'}, 404
+                return {'error': 'Not enough gems'}, 400
             
+            owned = set(db.session.scalars(
+                select(Inventory.card_id).where(
+                    Inventory.user_id == user_id,
+                    Inventory.card_id.in_(quantities)
+                )
+            ))
             
-            existing_item = Inventory.query.filter_by(
-                user_id=user_id, 
-                card_id=data['card_id']
-            ).first()
+            inventory = Inventory.__table__
+            increments = [
+                {'card': card_id, 'amount': quantity}
+                for card_id, quantity in quantities.items() if card_id in owned
+            ]
+            if increments:
+                db.session.execute(
+                    update(inventory)
+                    .where(inventory.c.user_id == user_id, inventory.c.card_id == bindparam('card'))
+                    .values(quantity=inventory.c.quantity + bindparam('amount')),
+                    increments
+                )
             
-            if existing_item:
-                
-                existing_item.quantity += data.get('quantity', 1)
-                db.session.commit()
-                return existing_item.to_dict(), 200
-            else:
+            new_items = [
+                {'user_id': user_id, 'card_id': card_id, 'quantity': quantity}
+                for card_id, quantity in quantities.items() if card_id not in owned
+            ]
+            if new_items:
+                db.session.execute(insert(inventory), new_items)
             
-                new_item = Inventory(
-                    user_id=user_id,
-                    card_id=data['card_id'],
-                    quantity=data.get('quantity', 1)
+            wallet = db.session.execute(
+                select(User.wallet).where(User.id == user_id)
+            ).scalar_one()
+            rows = db.session.execute(
+                select(Inventory.id, Inventory.card_id, Inventory.quantity).where(
+                    Inventory.user_id == user_id,
+                    Inventory.card_id.in_(quantities)
                 )
-                
-                db.session.add(new_item)
-                db.session.commit()
-                
-                return new_item.to_dict(), 201
-                
+            ).all()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return {'error': str(e)}, 400
+        
+        return {
+            'wallet': wallet,
+            'cost': cost,
+            'cards': sorted(quantities),
+            'inventory': [
+                {'id': row.id, 'user_id': user_id, 'card_id': row.card_id, 'quantity': row.quantity}
+                for row in rows
+            ]
+        }, 201
+
+
+class UserMatches(Resource):
+    def get(self, user_id):
+        try:
+            after, limit, fields = page_args()
+            serializer = serializer_for(Match)
+            serializer = serializer.only(fields) if fields else serializer
         except ValueError as e:
             return {'error': str(e)}, 400
-        except Exception as e:
+        
+        rows = db.session.execute(paginate(
+            select(*serializer.columns).where(Match.user_id == user_id, Match.outcome != MATCH_PENDING),
+            Match.id, after, limit
+        )).all()
+        rows, next_cursor = split_page(rows, limit, serializer.id_index)
+        if not rows and not user_exists(user_id):
+            return {'error': 'User not found'}, 404
+        return serializer.from_rows(rows), 200, page_headers(next_cursor)
+    
+    def post(self, user_id):
+        data = request.get_json() or {}
+        
+        try:
+            match_id = str(data['match_id']).strip()
+            if not 1 <= len(match_id) <= 64:
+                raise ValueError("match_id must be 1-64 characters")
+            outcome = data.get('outcome', 'victory')
+            if outcome not in MATCH_OUTCOMES:
+                raise ValueError("Outcome must be 'victory' or 'defeat'")
+            stats = {column: int(data.get(key) or 0) for column, key in MATCH_STATS}
+            if any(value < 0 for value in stats.values()):
+                raise ValueError("Match stats cannot be negative")
+        except KeyError as e:
+            return {'error': f'{e.args[0]} is required'}, 400
+        except (TypeError, ValueError) as e:
             return {'error': str(e)}, 400
+        
+        # Only matches the server started (UserArenaMatches) are recorded
+        match = Match.query.filter_by(match_id=match_id).first()
+        if match is None:
+            if not user_exists(user_id):
+                return {'error': 'User not found'}, 404
+            return {'error': 'Match not found'}, 404
+        if match.user_id != user_id:
+            return {'error': 'Match id already used'}, 409
+        
+        reward = app.config['MATCH_VICTORY_REWARD'] if outcome == 'victory' else 0
+        # Only the report that moves the match out of pending is recorded and
+        # paid; a retried or concurrent report matches no row here
+        matches = Match.__table__
+        recorded = db.session.execute(
+            update(matches)
+            .where(matches.c.id == match.id, matches.c.outcome == MATCH_PENDING)
+            .values(outcome=outcome, gems_earned=reward, **stats)
+        ).rowcount
+        
+        if recorded and outcome == 'victory':
+            # Relative UPDATE in the match's transaction: no read-modify-write
+            # race with purchases, and the wins and gems land with the match row
+            db.session.execute(
+                update(User.__table__)
+                .where(User.id == user_id)
+                .values(wins=func.coalesce(User.wins, 0) + 1, wallet=User.wallet + reward)
+            )
+        wallet, wins = db.session.execute(
+            select(User.wallet, User.wins).where(User.id == user_id)
+        ).one()
+        db.session.commit()
+        
+        if not recorded:
+            return {'match': match.to_dict(), 'wallet': wallet, 'wins': wins}, 200
+        leaderboard.set_wins(user_id, wins)
+        return {'match': match.to_dict(), 'wallet': wallet, 'wins': wins}, 201
+
+
+class UserArenaMatches(Resource):
+    def post(self, user_id):
+        """Start an arena game: the match id its result is reported under."""
+        if not user_exists(user_id):
+            return {'error': 'User not found'}, 404
+        match = Match(match_id=uuid.uuid4().hex, user_id=user_id, outcome=MATCH_PENDING)
+        db.session.add(match)
+        db.session.commit()
+        return {'match_id': match.match_id}, 201
+
+
+class UserMatchmaking(Resource):
+    def get(self, user_id):
+        state, found = matchmaker.status(user_id)
+        if state == 'matched':
+            return {'status': 'matched', 'match': matchmaker.describe(found, user_id)}, 200
+        if state == 'queued':
+            waited = matchmaker.waited(found)
+            return {
+                'status': 'queued',
+                'deck_id': found.deck_id,
+                'rating': found.rating,
+                'waited': round(waited, 1),
+                'gap': round(matchmaker.gap(waited)),
+            }, 200
+        return {'error': 'Not in the matchmaking queue'}, 404
+    
+    def post(self, user_id):
+        data = request.get_json() or {}
+        try:
+            deck_id = int(data['deck_id'])
+        except KeyError:
+            return {'error': 'deck_id is required'}, 400
+        except (TypeError, ValueError):
+            return {'error': 'deck_id must be an integer'}, 400
+        
+        # The player and their deck in one statement
+        row = db.session.execute(
+            select(User.username, User.rating, Deck.id)
+            .outerjoin(Deck, (Deck.user_id == User.id) & (Deck.id == deck_id))
+            .where(User.id == user_id)
+        ).first()
+        if row is None:
+            return {'error': 'User not found'}, 404
+        username, rating, found_deck = row
+        if found_deck is None:
+            return {'error': 'Deck not found'}, 404
+        
+        pairing = matchmaker.join(user_id, username, deck_id, rating)
+        if pairing is None:
+            return {'status': 'queued', 'deck_id': deck_id, 'rating': rating}, 202
+        return {'status': 'matched', 'match': matchmaker.describe(pairing, user_id)}, 200
+    
+    def delete(self, user_id):
+        if not matchmaker.leave(user_id):
+            return {'error': 'Not in the matchmaking queue'}, 404
+        return {}, 204
+
+class MatchmakingResult(Resource):
+    def post(self, match_id):
+        """Report the winner of a pairing as the signed-in player.
+
+        Ratings move once both players have reported the same winner; until
+        then the reply is 202, and differing reports are a 409 that either
+        player can correct by reporting again. The reporter is taken from the
+        session, so one client cannot report for both players.
+        """
+        reporter = session.get('user_id')
+        if reporter is None:
+            return {'error': 'Sign in to report a result'}, 401
+        data = request.get_json() or {}
+        pairing = matchmaker.pairing(match_id)
+        if pairing is None:
+            return {'error': 'Match not found or already reported'}, 404
+        players = [player.user_id for player in pairing.players]
+        if reporter not in players:
+            return {'error': 'Only the match players can report its result'}, 403
+        try:
+            winner = int(data['winner_id'])
+        except KeyError:
+            return {'error': 'winner_id is required'}, 400
+        except (TypeError, ValueError):
+            return {'error': 'winner_id must be an integer'}, 400
+        if winner not in players:
+            return {'error': 'winner_id must be one of the match players'}, 400
+        loser = players[1] if winner == players[0] else players[0]
+        
+        pairing, outcome = matchmaker.report(match_id, reporter, winner)
+        if pairing is None:
+            return {'error': 'Match not found or already reported'}, 404
+        if outcome == 'waiting':
+            return {'match_id': match_id, 'status': 'waiting'}, 202
+        if outcome == 'disputed':
+            return {'error': 'The players reported different winners'}, 409
+        if outcome == 'settling':
+            return {'error': 'The result is being recorded'}, 409
+        
+        # The pairing is only dropped once the result is committed, so a failed
+        # commit leaves it to be reported again
+        try:
+            ratings = dict(db.session.execute(
+                select(User.id, User.rating).where(User.id.in_(players))
+            ).all())
+            if len(ratings) != 2:
+                db.session.rollback()
+                matchmaker.complete(match_id)
+                return {'error': 'User not found'}, 404
+            
+            change = elo_delta(ratings[winner], ratings[loser], app.config['ELO_K_FACTOR'])
+            # Relative updates, as with wins: results landing at once for either
+            # player all count
+            users = User.__table__
+            db.session.execute(
+                update(users).where(users.c.id == bindparam('player')).values(rating=users.c.rating + bindparam('change')),
+                [{'player': winner, 'change': change}, {'player': loser, 'change': -change}]
+            )
+            ratings = dict(db.session.execute(
+                select(User.id, User.rating).where(User.id.in_(players))
+            ).all())
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            matchmaker.release(match_id)
+            raise
+        matchmaker.complete(match_id)
+        
+        return {
+            'match_id': match_id,
+            'change': change,
+            'winner': {'id': winner, 'rating': ratings[winner]},
+            'loser': {'id': loser, 'rating': ratings[loser]},
+        }, 200
 
 
 class UserInventoryCard(Resource):
@@ -287,16 +724,38 @@ class UserInventoryCard(Resource):
         
         return {'message': f'Removed {quantity} card(s) from inventory'}, 200
 
+def cards_in_decks(deck_ids):
+    """deck id -> serialized deck cards, in one statement with cards from the catalog."""
+    deck_card_rows = db.session.execute(
+        select(*card_in_deck_serializer.columns)
+        .where(CardInDeck.deck_id.in_(deck_ids))
+        .order_by(CardInDeck.id)
+    ).all()
+    cards_in_deck = defaultdict(list)
+    for deck_card in card_in_deck_serializer.from_rows(deck_card_rows, card=card_catalog.get_by_id()):
+        cards_in_deck[deck_card['deck_id']].append(deck_card)
+    return cards_in_deck
+
 class UserDecks(Resource):
     def get(self, user_id):
+        try:
+            after, limit, fields = page_args()
+            serializer = deck_serializer.only(fields) if fields else deck_serializer
+        except ValueError as e:
+            return {'error': str(e)}, 400
         
-        user = User.query.filter_by(id=user_id).first()
-        if not user:
+        decks = db.session.execute(paginate(
+            select(*serializer.columns).where(Deck.user_id == user_id),
+            Deck.id, after, limit
+        )).all()
+        decks, next_cursor = split_page(decks, limit, serializer.id_index)
+        if not decks and not user_exists(user_id):
             return {'error': 'User not found'}, 404
         
-        
-        decks = Deck.query.filter_by(user_id=user_id).all()
-        return [deck.to_dict() for deck in decks], 200
+        lookups = {}
+        if 'cards_in_deck' in serializer.fields and decks:
+            lookups['cards_in_deck'] = cards_in_decks([deck[serializer.id_index] for deck in decks])
+        return serializer.from_rows(decks, **lookups), 200, page_headers(next_cursor)
     
     def post(self, user_id):
         
@@ -377,31 +836,29 @@ class UserDeckById(Resource):
 
 class UserDeckCards(Resource):
     def get(self, user_id, deck_id):
+        try:
+            after, limit, fields = page_args()
+            serializer = card_in_deck_serializer.only(fields or DECK_CARD_FIELDS)
+        except ValueError as e:
+            return {'error': str(e)}, 400
         
-        user = User.query.filter_by(id=user_id).first()
-        if not user:
-            return {'error': 'User not found'}, 404
-        
-        
-        deck = Deck.query.filter_by(id=deck_id, user_id=user_id).first()
-        if not deck:
-            return {'error': 'Deck not found'}, 404
-        
-        
-        deck_cards = CardInDeck.query.filter_by(deck_id=deck_id).all()
-        
-        
-        result = []
-        for deck_card in deck_cards:
-            card_data = deck_card.card.to_dict()
-            result.append({
-                'id': deck_card.id,
-                'deck_id': deck_card.deck_id,
-                'card': card_data,
-                'quantity': deck_card.quantity
-            })
+        rows = db.session.execute(paginate(
+            select(*serializer.columns)
+            .join(Deck, CardInDeck.deck_id == Deck.id)
+            .where(Deck.id == deck_id, Deck.user_id == user_id),
+            CardInDeck.id, after, limit
+        )).all()
+        rows, next_cursor = split_page(rows, limit, serializer.id_index)
+        if not rows:
+            if not user_exists(user_id):
+                return {'error': 'User not found'}, 404
+            if db.session.execute(
+                select(Deck.id).where(Deck.id == deck_id, Deck.user_id == user_id)
+            ).first() is None:
+                return {'error': 'Deck not found'}, 404
         
-        return result, 200
+        lookups = {'card': card_catalog.get_by_id()} if 'card' in serializer.fields else {}
+        return serializer.from_rows(rows, **lookups), 200, page_headers(next_cursor)
     
     def post(self, user_id, deck_id):
         
@@ -478,82 +935,234 @@ class UserDeckCards(Resource):
             return {'error': str(e)}, 400
         except Exception as e:
             return {'error': str(e)}, 400
+    
+    def put(self, user_id, deck_id):
+        """Replace the deck's cards with a {card_id: quantity} map in one transaction."""
+        data = request.get_json() or {}
+        cards = data.get('cards', data) if isinstance(data, dict) else data
+        
+        try:
+            desired = {}
+            for card_id, quantity in cards.items():
+                card_id, quantity = int(card_id), int(quantity)
+                if quantity < 0:
+                    raise ValueError
+                if quantity:
+                    desired[card_id] = desired.get(card_id, 0) + quantity
+        except (AttributeError, TypeError, ValueError):
+            return {'error': 'Body must map card ids to non-negative quantities'}, 400
+        
+        volume = db.session.execute(
+            select(Deck.volume).where(Deck.id == deck_id, Deck.user_id == user_id)
+        ).scalar()
+        if volume is None:
+            if not user_exists(user_id):
+                return {'error': 'User not found'}, 404
+            return {'error': 'Deck not found'}, 404
+        
+        total = sum(desired.values())
+        if total > volume:
+            return {'error': f'Deck cannot hold more than {volume} cards ({total} given)'}, 400
+        
+        # Ownership of every requested card in one IN query
+        owned = dict(db.session.execute(
+            select(Inventory.card_id, Inventory.quantity).where(
+                Inventory.user_id == user_id,
+                Inventory.card_id.in_(desired)
+            )
+        ).all()) if desired else {}
+        short = sorted(card_id for card_id, quantity in desired.items() if owned.get(card_id, 0) < quantity)
+        if short:
+            return {'error': 'Not enough copies owned', 'card_ids': short}, 400
+        
+        existing = dict(db.session.execute(
+            select(CardInDeck.card_id, CardInDeck.quantity).where(CardInDeck.deck_id == deck_id)
+        ).all())
+        
+        deck_cards = CardInDeck.__table__
+        removed = [card_id for card_id in existing if card_id not in desired]
+        changed = [
+            {'card': card_id, 'amount': quantity}
+            for card_id, quantity in desired.items()
+            if card_id in existing and existing[card_id] != quantity
+        ]
+        added = [
+            {'deck_id': deck_id, 'card_id': card_id, 'quantity': quantity}
+            for card_id, quantity in desired.items() if card_id not in existing
+        ]
+        
+        try:
+            if removed:
+                db.session.execute(
+                    deck_cards.delete().where(
+                        deck_cards.c.deck_id == deck_id,
+                        deck_cards.c.card_id.in_(removed)
+                    )
+                )
+            if changed:
+                db.session.execute(
+                    update(deck_cards)
+                    .where(deck_cards.c.deck_id == deck_id, deck_cards.c.card_id == bindparam('card'))
+                    .values(quantity=bindparam('amount')),
+                    changed
+                )
+            if added:
+                db.session.execute(insert(deck_cards), added)
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent edit inserted one of the same cards first
+            db.session.rollback()
+            return {'error': 'Deck was modified concurrently, please retry'}, 409
+        
+        return self.get(user_id, deck_id)
+
+class UserBootstrap(Resource):
+    """Everything a screen needs on first load, in one round trip.
+
+    The full catalog is only included when ?catalog_version= is missing or
+    not the current version; otherwise the client keeps its cached copy.
+    """
+    def get(self, user_id):
+        # Read the catalog once so the version and the cards agree
+        catalog = card_catalog.snapshot()
+
+        row = db.session.execute(
+            select(*USER_FIELDS.values()).where(User.id == user_id)
+        ).first()
+        if row is None:
+            return {'error': 'User not found'}, 404
+
+        decks = db.session.execute(
+            select(*deck_serializer.columns).where(Deck.user_id == user_id).order_by(Deck.id)
+        ).all()
+        inventory = db.session.execute(
+            select(*inventory_serializer.columns).where(Inventory.user_id == user_id).order_by(Inventory.id)
+        ).all()
+        cards_in_deck = cards_in_decks([deck[deck_serializer.id_index] for deck in decks]) if decks else {}
+
+        body = {
+            'user': {
+                field: value.isoformat() if hasattr(value, 'isoformat') else value
+                for field, value in zip(USER_FIELDS, row)
+            },
+            'decks': deck_serializer.from_rows(decks, cards_in_deck=cards_in_deck),
+            'inventory': inventory_serializer.from_rows(inventory, card=catalog.by_id),
+            'catalog_version': catalog.version,
+        }
+        if request.args.get('catalog_version') != catalog.version:
+            body['cards'] = catalog.cards
+        return body, 200
 
 class Login(Resource):
     def post(self):
-        try:
-            print("\n=== Login Attempt ===")
-            data = request.get_json()
-            print("Login data:", data)
-            
-            if not data or not data.get('email') or not data.get('password'):
-                print("Missing email or password")
-                return {'error': 'Email and password are required'}, 400
-                
-            user = User.query.filter_by(email=data['email']).first()
-            print(f"User found: {user.username if user else 'None'}")
-            
-            if not user:
-                print("User not found")
-                return {'error': 'Invalid email or password'}, 401
-            
-            print(f"Attempting to authenticate with password: {data['password']}")
-            print(f"Stored password hash: {user._password_hash}")
+        data = request.get_json()
+        
+        if not data or not data.get('email') or not data.get('password'):
+            return {'error': 'Email and password are required'}, 400
             
+        user = User.query.filter_by(email=data['email']).first()
+        if not user:
+            return {'error': 'Invalid email or password'}, 401
+        
+        try:
             if not user.authenticate(data['password']):
-                print("Invalid password")
                 return {'error': 'Invalid email or password'}, 401
-                
-            session['user_id'] = user.id
-            print(f"Session created with user_id: {user.id}")
-            
-            user_dict = user.to_dict()
-            print("Login successful")
-            return user_dict, 200
+        except PasswordHasherBusy:
+            return hasher_busy()
+        # Saves a hash upgraded to the configured method, if any
+        db.session.commit()
             
-        except Exception as e:
-            print(f"Login error: {str(e)}")
-            import traceback
-            print("Traceback:", traceback.format_exc())
-            return {'error': str(e)}, 500
+        session['user_id'] = user.id
+        return user.to_dict(), 200
+
+# Friend fields, selectable with ?fields=
+FRIEND_FIELDS = ('id', 'username', 'email')
 
 class UserFriends(Resource):
     def get(self, user_id):
         try:
-            print(f"Fetching friends for user {user_id}")
-            user = User.query.get_or_404(user_id)
-            print(f"Found user: {user.username}")
-            
-            received_requests = FriendRequest.query.filter_by(
-                receiver_id=user_id,
-                status='pending'
-            ).all()
-            print(f"Found {len(received_requests)} pending friend requests")
-            
-            # Convert friends to dict manually to avoid serialization issues
-            friends_dict = []
-            for friend in user.friends:
-                try:
-                    friend_dict = {
-                        'id': friend.id,
-                        'username': friend.username,
-                        'email': friend.email
-                    }
-                    friends_dict.append(friend_dict)
-                except Exception as e:
-                    print(f"Error serializing friend {friend.id}: {str(e)}")
-                    continue
-            
-            print(f"Found {len(friends_dict)} friends")
-            
-            return {
-                'received_requests': [request.to_dict() for request in received_requests],
-                'friends': friends_dict
-            }, 200
-            
-        except Exception as e:
-            print(f"Error in UserFriends.get: {str(e)}")
-            return {'error': str(e)}, 500
+            after, limit, fields = page_args(default_limit=app.config['FRIENDS_PAGE_SIZE'])
+            check_fields(fields or (), FRIEND_FIELDS)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        if not user_exists(user_id):
+            return {'error': 'User not found'}, 404
+        
+        received_requests = FriendRequest.query.filter_by(
+            receiver_id=user_id,
+            status='pending'
+        ).all()
+        
+        # The page's ids come from the cached friend list, so the IN clause
+        # holds at most one page plus the row that detects more
+        friend_ids = sorted(friend_graph.friends_of(user_id))
+        start = bisect_right(friend_ids, after) if after is not None else 0
+        page_ids = friend_ids[start:start + limit + 1]
+        rows = db.session.execute(paginate(
+            select(User.id, User.username, User.email).where(User.id.in_(page_ids)),
+            User.id, after, limit
+        )).all() if page_ids else []
+        rows, next_cursor = split_page(rows, limit, 0)
+        friends = [dict(zip(FRIEND_FIELDS, row)) for row in rows]
+        
+        return {
+            'received_requests': [request.to_dict() for request in received_requests],
+            'friends': project(friends, fields)
+        }, 200, page_headers(next_cursor)
+
+def usernames_of(user_ids):
+    """{id: username} for the given ids, in one statement."""
+    if not user_ids:
+        return {}
+    return dict(db.session.execute(
+        select(User.id, User.username).where(User.id.in_(user_ids))
+    ).all())
+
+class UserMutualFriends(Resource):
+    def get(self, user_id, other_id):
+        found = db.session.execute(
+            select(func.count(User.id)).where(User.id.in_({user_id, other_id}))
+        ).scalar()
+        if found != len({user_id, other_id}):
+            return {'error': 'User not found'}, 404
+        
+        mutual = friend_graph.mutual(user_id, other_id)
+        usernames = usernames_of(mutual)
+        return {
+            'count': len(mutual),
+            'friends': [
+                {'id': friend_id, 'username': usernames[friend_id]}
+                for friend_id in mutual
+                if friend_id in usernames
+            ]
+        }, 200
+
+class UserFriendSuggestions(Resource):
+    def get(self, user_id):
+        try:
+            limit = int(request.args.get('limit', 10))
+        except ValueError:
+            return {'error': 'limit must be an integer'}, 400
+        if not 1 <= limit <= 50:
+            return {'error': 'limit must be 1-50'}, 400
+        if not user_exists(user_id):
+            return {'error': 'User not found'}, 404
+        
+        # Users with a request either way already have a pending or answered invite
+        requested = db.session.execute(
+            select(FriendRequest.sender_id, FriendRequest.receiver_id).where(
+                (FriendRequest.sender_id == user_id) | (FriendRequest.receiver_id == user_id)
+            )
+        ).all()
+        exclude = {other for row in requested for other in row}
+        
+        suggested = friend_graph.suggestions(user_id, limit, exclude)
+        usernames = usernames_of([suggested_id for suggested_id, _ in suggested])
+        return [
+            {'id': suggested_id, 'username': usernames[suggested_id], 'mutual_count': count}
+            for suggested_id, count in suggested
+            if suggested_id in usernames
+        ], 200
 
 class UserFriendRequests(Resource):
     def post(self, user_id):
@@ -581,7 +1190,7 @@ class UserFriendRequests(Resource):
             return {'error': 'Friend request already exists'}, 400
             
         # Check if already friends
-        if receiver in user.friends:
+        if friend_graph.are_friends(user_id, receiver.id):
             return {'error': 'Already friends with this user'}, 400
             
         friend_request = FriendRequest(
@@ -593,7 +1202,9 @@ class UserFriendRequests(Resource):
         db.session.add(friend_request)
         db.session.commit()
         
-        return friend_request.to_dict(), 201
+        body = friend_request.to_dict()
+        event_hub.publish(receiver.id, 'friend_request', body)
+        return body, 201
 
 class UserFriendRequestResponse(Resource):
     def post(self, user_id, request_id):
@@ -623,39 +1234,140 @@ class UserFriendRequestResponse(Resource):
             friend_request.status = 'rejected'
             
         db.session.commit()
-        return friend_request.to_dict(), 200
+        if action == 'accept':
+            friend_graph.invalidate(user_id, friend_request.sender_id)
+        body = friend_request.to_dict()
+        event_hub.publish(friend_request.sender_id, 'friend_request_answered', body)
+        return body, 200
+
+# Streamed as-is: a Response skips the JSON representation and compression
+SSE_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+class UserEvents(Resource):
+    def get(self, user_id):
+        if not user_exists(user_id):
+            return {'error': 'User not found'}, 404
+        try:
+            subscription = event_hub.subscribe(user_id)
+        except EventHubFull:
+            return {'error': 'Too many open event streams, try again shortly'}, 503, {'Retry-After': '30'}
+        # The app context (and the session's connection) is released once
+        # this returns, before the first frame is sent
+        response = Response(
+            subscription.stream(app.config['EVENTS_KEEPALIVE'], app.config['EVENTS_MAX_STREAM_SECONDS']),
+            mimetype='text/event-stream', headers=SSE_HEADERS
+        )
+        # Also frees the slot if the server closes the stream before reading it
+        response.call_on_close(subscription.close)
+        return response
+
+class Leaderboard(Resource):
+    def get(self):
+        try:
+            limit = int(request.args.get('limit', 10))
+            neighbors = int(request.args.get('neighbors', 2))
+            user_id = request.args.get('user_id')
+            user_id = int(user_id) if user_id else None
+        except ValueError:
+            return {'error': 'limit, neighbors and user_id must be integers'}, 400
+        if not 1 <= limit <= 100 or not 0 <= neighbors <= 25:
+            return {'error': 'limit must be 1-100 and neighbors 0-25'}, 400
+        
+        leaderboard.refresh()
+        top = leaderboard.top(limit)
+        around = leaderboard.around(user_id, neighbors) if user_id is not None else None
+        if user_id is not None and around is None:
+            return {'error': 'User not found'}, 404
+        
+        # Usernames for every listed entry in one statement
+        ids = {user_id for _, user_id, _ in top + (around or [])}
+        usernames = dict(db.session.execute(
+            select(User.id, User.username).where(User.id.in_(ids))
+        ).all()) if ids else {}
+        
+        def entries(rows):
+            # Users deleted by another process drop out until the next sync
+            return [
+                {'rank': rank, 'user_id': entry_id, 'username': usernames[entry_id], 'wins': wins}
+                for rank, entry_id, wins in rows
+                if entry_id in usernames
+            ]
+        
+        result = {'total': leaderboard.total, 'top': entries(top)}
+        if around is not None:
+            result['neighbors'] = entries(around)
+            result['me'] = next((entry for entry in result['neighbors'] if entry['user_id'] == user_id), None)
+        return result, 200
+
+class OpponentDeck(Resource):
+    def get(self):
+        cards = card_catalog.get_cards()
+        if not cards:
+            return {'error': 'No cards available'}, 404
+        
+        deck = ai.opponent_deck(cards)
+        return [
+            dict(card, id=f'opponent-{i}', card_id=card['id'])
+            for i, card in enumerate(deck)
+        ], 200
+
+class OpponentMove(Resource):
+    def post(self):
+        data = request.get_json() or {}
+        
+        budget_ms = data.get('budget_ms', app.config['AI_MOVE_BUDGET_MS'])
+        try:
+            budget_ms = min(max(float(budget_ms), 1.0), app.config['AI_MAX_MOVE_BUDGET_MS'])
+            turns_left = (
+                int(data.get('player_turns_left', ai.PLACEMENT_TURNS)),
+                int(data.get('opponent_turns_left', ai.PLACEMENT_TURNS)),
+            )
+            catalog = card_catalog.snapshot()
+            table = ai.planner.table_for(catalog.version, catalog.cards)
+            state = ai.build_state(table, data)
+        except (TypeError, ValueError) as e:
+            return {'error': str(e)}, 400
+        
+        move, stats = ai.planner.choose_move(
+            state, table, catalog.version, budget_ms, turns_left
+        )
+        if move is None:
+            return {'pass': True, **stats}, 200
+        
+        hand_position, lane = move
+        return {
+            'pass': False,
+            'hand_index': hand_position,
+            'card_id': table.ids[state.hands[ai.AI][hand_position]],
+            'lane': lane,
+            **stats
+        }, 200
 
 api.add_resource(UserDeckCards, '/users/<int:user_id>/decks/<int:deck_id>/cards')
 api.add_resource(UserDeckById, '/users/<int:user_id>/decks/<int:deck_id>')
 api.add_resource(UserDecks, '/users/<int:user_id>/decks')
 api.add_resource(UserInventoryCard, '/users/<int:user_id>/inventory/<int:card_id>')
 api.add_resource(UserInventory, '/users/<int:user_id>/inventory')
+api.add_resource(UserPurchases, '/users/<int:user_id>/purchases')
+api.add_resource(UserMatches, '/users/<int:user_id>/matches')
+api.add_resource(UserArenaMatches, '/users/<int:user_id>/arena-matches')
+api.add_resource(UserMatchmaking, '/users/<int:user_id>/matchmaking')
+api.add_resource(MatchmakingResult, '/matchmaking/<string:match_id>/result')
+api.add_resource(UserBootstrap, '/users/<int:user_id>/bootstrap')
 api.add_resource(UserById, '/users/<int:id>')
 api.add_resource(Users, '/users')
 api.add_resource(CardById, '/cards/<int:id>')
 api.add_resource(Cards, '/cards')
 api.add_resource(Login, '/auth/login')
 api.add_resource(UserFriends, '/users/<int:user_id>/friends')
+api.add_resource(UserFriendSuggestions, '/users/<int:user_id>/friends/suggestions')
+api.add_resource(UserMutualFriends, '/users/<int:user_id>/friends/mutual/<int:other_id>')
 api.add_resource(UserFriendRequests, '/users/<int:user_id>/friend-requests')
+api.add_resource(UserEvents, '/users/<int:user_id>/events')
 api.add_resource(UserFriendRequestResponse, '/users/<int:user_id>/friend-requests/<int:request_id>/response')
-
-# Add debug route handler
-@app.before_request
-def log_request_info():
-    print('\n=== New Request ===')
-    print('URL:', request.url)
-    print('Method:', request.method)
-    print('Headers:', dict(request.headers))
-    print('Body:', request.get_data())
-    print('================\n')
-
-@app.after_request
-def log_response_info(response):
-    print('\n=== Response ===')
-    print('Status:', response.status)
-    print('Headers:', dict(response.headers))
-    print('================\n')
-    return response
+api.add_resource(Leaderboard, '/leaderboard')
+api.add_resource(OpponentDeck, '/arena/opponent-deck')
+api.add_resource(OpponentMove, '/arena/opponent-move')
 
 if __name__ == '__main__':
     app.run(port=5555, debug=True)
@@ -0,0 +1,298 @@
+"""
+Optional ASGI deployment on SQLAlchemy's async engine.
+
+    pip install -r requirements-async.txt
+    gunicorn --worker-class uvicorn.workers.UvicornWorker server.asgi:app
+
+The GET endpoints that spend their time waiting on the database (a user, and a
+user's inventory, decks, deck cards and matches) are served natively: their
+Core selects run on an AsyncSession, so a worker keeps serving other requests
+during each round trip, and the bodies are built by the same compiled
+serializers, pagination helpers and card catalog as the Flask resources.
+GET /users/<id>/events is streamed from an asyncio queue, so an open stream
+holds no thread. Every other route and method is handed to the Flask app
+through asgiref's WsgiToAsgi, which runs it on a thread pool, so this app
+serves the same URLs with the same responses as `gunicorn server.app:app`.
+
+DATABASE_URL is shared with the WSGI app; its driver is swapped for aiosqlite
+or asyncpg. Request logging and /metrics only see the routes Flask handles.
+"""
+
+import asyncio
+from collections import defaultdict
+from urllib.parse import parse_qsl
+
+from asgiref.wsgi import WsgiToAsgi
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import parse_accept_header
+from werkzeug.routing import Map, Rule
+
+from server.app import app as flask_app, CORS_EXPOSE_HEADERS, DECK_CARD_FIELDS, SSE_HEADERS, USER_FIELDS
+from server.catalog import card_catalog
+from server.events import event_hub
+from server.models import db, apply_sqlite_pragmas, User, Inventory, Deck, CardInDeck, Match, MATCH_PENDING
+from server.pagination import page_args, paginate, split_page, page_headers
+from server.representations import dumps, json_representation
+from server.serializers import inventory_serializer, deck_serializer, card_in_deck_serializer, serializer_for
+
+# Sync driver -> async driver for the same database
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'sqlite+pysqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'postgresql+psycopg2': 'postgresql+asyncpg',
+}
+
+
+def async_url(url):
+    """The async-driver equivalent of a sync SQLAlchemy URL."""
+    drivername = ASYNC_DRIVERS.get(url.drivername)
+    if drivername is None:
+        raise ValueError(f"No async driver configured for {url.drivername}")
+    return url.set(drivername=drivername)
+
+
+def _in_app_context(fn):
+    with flask_app.app_context():
+        return fn()
+
+
+async def catalog_by_id():
+    """The catalog's id lookup; a refresh check runs off the event loop."""
+    if card_catalog.fresh:
+        return card_catalog.current.by_id
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, _in_app_context, card_catalog.get_by_id)
+
+
+async def user_exists(session, user_id):
+    return (await session.execute(select(User.id).where(User.id == user_id))).first() is not None
+
+
+# Native handlers: (session, query args, route args) -> (body, status, headers)
+
+async def get_user(session, args, user_id):
+    row = (await session.execute(
+        select(*USER_FIELDS.values()).where(User.id == user_id)
+    )).first()
+    if row is None:
+        return {'error': 'User not found'}, 404, {}
+    return {
+        field: value.isoformat() if hasattr(value, 'isoformat') else value
+        for field, value in zip(USER_FIELDS, row)
+    }, 200, {}
+
+
+async def get_inventory(session, args, user_id):
+    after, limit, fields = page_args(args=args)
+    serializer = inventory_serializer.only(fields) if fields else inventory_serializer
+
+    rows = (await session.execute(paginate(
+        select(*serializer.columns).where(Inventory.user_id == user_id),
+        Inventory.id, after, limit
+    ))).all()
+    rows, next_cursor = split_page(rows, limit, serializer.id_index)
+    if not rows and not await user_exists(session, user_id):
+        return {'error': 'User not found'}, 404, {}
+
+    lookups = {'card': await catalog_by_id()} if 'card' in serializer.fields else {}
+    return serializer.from_rows(rows, **lookups), 200, page_headers(next_cursor)
+
+
+async def get_decks(session, args, user_id):
+    after, limit, fields = page_args(args=args)
+    serializer = deck_serializer.only(fields) if fields else deck_serializer
+
+    decks = (await session.execute(paginate(
+        select(*serializer.columns).where(Deck.user_id == user_id),
+        Deck.id, after, limit
+    ))).all()
+    decks, next_cursor = split_page(decks, limit, serializer.id_index)
+    if not decks and not await user_exists(session, user_id):
+        return {'error': 'User not found'}, 404, {}
+
+    lookups = {}
+    if 'cards_in_deck' in serializer.fields and decks:
+        deck_card_rows = (await session.execute(
+            select(*card_in_deck_serializer.columns)
+            .where(CardInDeck.deck_id.in_([deck[serializer.id_index] for deck in decks]))
+            .order_by(CardInDeck.id)
+        )).all()
+        cards_in_deck = defaultdict(list)
+        for deck_card in card_in_deck_serializer.from_rows(deck_card_rows, card=await catalog_by_id()):
+            cards_in_deck[deck_card['deck_id']].append(deck_card)
+        lookups['cards_in_deck'] = cards_in_deck
+    return serializer.from_rows(decks, **lookups), 200, page_headers(next_cursor)
+
+
+async def get_deck_cards(session, args, user_id, deck_id):
+    after, limit, fields = page_args(args=args)
+    serializer = card_in_deck_serializer.only(fields or DECK_CARD_FIELDS)
+
+    rows = (await session.execute(paginate(
+        select(*serializer.columns)
+        .join(Deck, CardInDeck.deck_id == Deck.id)
+        .where(Deck.id == deck_id, Deck.user_id == user_id),
+        CardInDeck.id, after, limit
+    ))).all()
+    rows, next_cursor = split_page(rows, limit, serializer.id_index)
+    if not rows:
+        if not await user_exists(session, user_id):
+            return {'error': 'User not found'}, 404, {}
+        if (await session.execute(
+            select(Deck.id).where(Deck.id == deck_id, Deck.user_id == user_id)
+        )).first() is None:
+            return {'error': 'Deck not found'}, 404, {}
+
+    lookups = {'card': await catalog_by_id()} if 'card' in serializer.fields else {}
+    return serializer.from_rows(rows, **lookups), 200, page_headers(next_cursor)
+
+
+async def get_matches(session, args, user_id):
+    after, limit, fields = page_args(args=args)
+    serializer = serializer_for(Match)
+    serializer = serializer.only(fields) if fields else serializer
+
+    rows = (await session.execute(paginate(
+        select(*serializer.columns).where(Match.user_id == user_id, Match.outcome != MATCH_PENDING),
+        Match.id, after, limit
+    ))).all()
+    rows, next_cursor = split_page(rows, limit, serializer.id_index)
+    if not rows and not await user_exists(session, user_id):
+        return {'error': 'User not found'}, 404, {}
+    return serializer.from_rows(rows), 200, page_headers(next_cursor)
+
+
+routes = Map([
+    Rule('/users/<int:user_id>', endpoint=get_user),
+    Rule('/users/<int:user_id>/inventory', endpoint=get_inventory),
+    Rule('/users/<int:user_id>/decks', endpoint=get_decks),
+    Rule('/users/<int:user_id>/decks/<int:deck_id>/cards', endpoint=get_deck_cards),
+    Rule('/users/<int:user_id>/matches', endpoint=get_matches),
+    # Streamed by AsyncApp itself rather than returning a body
+    Rule('/users/<int:user_id>/events', endpoint='events'),
+], strict_slashes=False)
+
+
+class AsyncApp:
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+        self.fallback = WsgiToAsgi(wsgi_app)
+        self.cors_origins = set(wsgi_app.config['CORS_ORIGINS'])
+        self.engine = None
+        self.sessions = None
+
+    def _start(self):
+        if self.engine is None:
+            # The URL as Flask-SQLAlchemy resolved it, e.g. SQLite paths
+            # relative to the instance folder
+            url = _in_app_context(lambda: db.engine.url)
+            self.engine = create_async_engine(async_url(url))
+            apply_sqlite_pragmas(self.engine.sync_engine, self.wsgi_app.config['SQLITE_PRAGMAS'])
+            self.sessions = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self._start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.engine is not None:
+                    await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _match(self, scope):
+        if scope['method'] != 'GET':
+            return None
+        try:
+            return routes.bind('localhost').match(scope['path'], method='GET')
+        except HTTPException:
+            # Redirects and misses are Flask's to answer
+            return None
+
+    def _cors_headers(self, scope):
+        origin = dict(scope['headers']).get(b'origin', b'').decode('latin-1')
+        if not origin or (origin not in self.cors_origins and '*' not in self.cors_origins):
+            return []
+        return [
+            (b'access-control-allow-origin', origin.encode('latin-1')),
+            (b'access-control-allow-credentials', b'true'),
+            (b'access-control-expose-headers', ', '.join(CORS_EXPOSE_HEADERS).encode('latin-1')),
+            (b'vary', b'Origin'),
+        ]
+
+    async def _events(self, scope, receive, send, user_id):
+        """GET /users/<id>/events without holding a thread per stream."""
+        async with self.sessions() as session:
+            found = await user_exists(session, user_id)
+        if not found:
+            return await self._send_json(scope, send, {'error': 'User not found'}, 404, {})
+
+        subscription = event_hub.subscribe_async(user_id, asyncio.get_running_loop())
+
+        async def watch_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            subscription.close()
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+        response_headers = [(b'content-type', b'text/event-stream; charset=utf-8')]
+        response_headers += [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                             for name, value in SSE_HEADERS.items()]
+        response_headers += self._cors_headers(scope)
+        try:
+            await send({'type': 'http.response.start', 'status': 200, 'headers': response_headers})
+            config = self.wsgi_app.config
+            async for frame in subscription.stream(config['EVENTS_KEEPALIVE'], config['EVENTS_MAX_STREAM_SECONDS']):
+                await send({'type': 'http.response.body', 'body': frame, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            watcher.cancel()
+            subscription.close()
+
+    async def _send_json(self, scope, send, body, status, headers):
+        # Encoded and compressed as the Flask representation does
+        payload = dumps(body)
+        compressible = len(payload) >= json_representation.min_size
+        accept = parse_accept_header(dict(scope['headers']).get(b'accept-encoding', b'').decode('latin-1'))
+        payload, encoding = json_representation.encode(payload, accept)
+        response_headers = [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(payload)).encode('latin-1')),
+        ]
+        if compressible:
+            response_headers.append((b'vary', b'Accept-Encoding'))
+        if encoding:
+            response_headers.append((b'content-encoding', encoding.encode('latin-1')))
+        response_headers += [(name.lower().encode('latin-1'), str(value).encode('latin-1'))
+                             for name, value in headers.items()]
+        response_headers += self._cors_headers(scope)
+        await send({'type': 'http.response.start', 'status': status, 'headers': response_headers})
+        await send({'type': 'http.response.body', 'body': payload})
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        matched = self._match(scope) if scope['type'] == 'http' else None
+        if matched is None:
+            return await self.fallback(scope, receive, send)
+
+        self._start()
+        endpoint, route_args = matched
+        if endpoint == 'events':
+            return await self._events(scope, receive, send, **route_args)
+        args = MultiDict(parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True))
+        try:
+            async with self.sessions() as session:
+                body, status, headers = await endpoint(session, args, **route_args)
+        except ValueError as e:
+            body, status, headers = {'error': str(e)}, 400, {}
+        await self._send_json(scope, send, body, status, headers)
+
+
+app = AsyncApp(flask_app)
@@ -0,0 +1,7 @@
+"""
+Standalone benchmarks for the Mythos server.
+
+Each module is a script run from the repository root, e.g.
+
+    python -m server.benchmarks.inventory_lookup --rows 1000000
+"""
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Concurrent read throughput of the WSGI deployment against the ASGI one.
+
+Generates --users synthetic users into a scratch SQLite database (or the empty
+database at --database-url, e.g. a local PostgreSQL), then starts each server
+in turn on the same data and drives it with keep-alive connections issuing a
+mix of inventory, deck, deck card and user reads:
+
+    sync   gunicorn server.app:app with --workers and --threads
+    async  gunicorn server.asgi:app with --workers uvicorn workers
+
+    python -m server.benchmarks.asgi --users 2000 --concurrency 1,16,64
+    python -m server.benchmarks.asgi --database-url postgresql://localhost/mythos_bench
+
+Needs gunicorn plus the packages in requirements-async.txt.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT)
+
+PATHS = (
+    '/users/{user_id}/inventory',
+    '/users/{user_id}/decks',
+    '/users/{user_id}/decks/{user_id}/cards',
+    '/users/{user_id}',
+)
+
+
+def prepare(database_url, users):
+    """Fill the database; decks_per_user=1 on an empty database gives deck id == user id."""
+    os.environ['DATABASE_URL'] = database_url
+    from server.app import app
+    from server.models import db
+    from server.seed import seed_cards_from_json, generate
+
+    with app.app_context():
+        db.create_all()
+        seed_cards_from_json()
+        generate(users, decks_per_user=1, friends_per_user=0)
+
+
+def server_commands(args, port):
+    bind = f'127.0.0.1:{port}'
+    return {
+        'sync': ['gunicorn', '--workers', str(args.workers), '--threads', str(args.threads),
+                 '--bind', bind, 'server.app:app'],
+        'async': ['gunicorn', '--workers', str(args.workers), '--worker-class', 'uvicorn.workers.UvicornWorker',
+                  '--bind', bind, 'server.asgi:app'],
+    }
+
+
+def start_server(command, env):
+    """Start a server in its own process group, so stop_server reaches its children."""
+    return subprocess.Popen(command, cwd=ROOT, env=env, start_new_session=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def stop_server(server, timeout=10.0):
+    """Stop the server and every process it forked (workers, hashing pools).
+
+    Terminating only the parent leaves forked children holding the port.
+    """
+    try:
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait(timeout)
+    except subprocess.TimeoutExpired:
+        os.killpg(server.pid, signal.SIGKILL)
+        server.wait()
+    except ProcessLookupError:
+        server.wait()
+
+
+def wait_ready(port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/users/1', timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit(f"Server on port {port} did not start")
+
+
+async def fetch(connection, port, path):
+    """One GET over a keep-alive connection, reconnecting when the server closed it."""
+    if connection[0] is None:
+        connection[:] = await asyncio.open_connection('127.0.0.1', port)
+    reader, writer = connection
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n'.encode('latin-1'))
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    headers = dict(
+        line.split(b':', 1) for line in head.split(b'\r\n')[1:] if b':' in line
+    )
+    headers = {name.strip().lower(): value.strip().lower() for name, value in headers.items()}
+    await reader.readexactly(int(headers.get(b'content-length', 0)))
+    if headers.get(b'connection') == b'close':
+        writer.close()
+        connection[:] = [None, None]
+    return status
+
+
+async def drive(port, users, concurrency, seconds, seed):
+    rng = random.Random(seed)
+    timings = []
+    errors = [0]
+    deadline = time.perf_counter() + seconds
+
+    async def client():
+        connection = [None, None]
+        while time.perf_counter() < deadline:
+            path = rng.choice(PATHS).format(user_id=rng.randint(1, users))
+            started = time.perf_counter()
+            try:
+                status = await fetch(connection, port, path)
+            except (OSError, asyncio.IncompleteReadError):
+                connection[:] = [None, None]
+                status = None
+            if status != 200:
+                errors[0] += 1
+            timings.append((time.perf_counter() - started) * 1000.0)
+        if connection[1] is not None:
+            connection[1].close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    timings.sort()
+    return (len(timings) / elapsed, statistics.median(timings),
+            timings[max(0, int(len(timings) * 0.99) - 1)], errors[0])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--database-url', help='an empty database to fill instead of scratch SQLite')
+    parser.add_argument('--concurrency', default='1,16,64', help='comma-separated client counts')
+    parser.add_argument('--seconds', type=float, default=5.0, help='duration per concurrency level')
+    parser.add_argument('--warmup', type=float, default=3.0,
+                        help='seconds of untimed load first, while every worker finishes starting')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads per worker')
+    parser.add_argument('--port', type=int, default=5701)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+    levels = [int(level) for level in args.concurrency.split(',')]
+
+    if shutil.which('gunicorn') is None:
+        raise SystemExit("gunicorn is not installed; see requirements-async.txt")
+
+    scratch = None
+    database_url = args.database_url
+    if database_url is None:
+        scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        scratch.close()
+        database_url = f'sqlite:///{scratch.name}'
+    try:
+        prepare(database_url, args.users)
+        env = dict(os.environ, DATABASE_URL=database_url, REQUEST_LOG_SAMPLE_RATE='0')
+
+        results = []
+        for name, command in server_commands(args, args.port).items():
+            server = start_server(command, env)
+            try:
+                wait_ready(args.port)
+                asyncio.run(drive(args.port, args.users, max(levels), args.warmup, args.seed))
+                for concurrency in levels:
+                    rate, p50, p99, errors = asyncio.run(
+                        drive(args.port, args.users, concurrency, args.seconds, args.seed))
+                    results.append((name, concurrency, rate, p50, p99, errors))
+            finally:
+                stop_server(server)
+
+        print(f"\n{'server':<8}{'clients':>8}{'req/s':>10}{'p50':>11}{'p99':>11}{'errors':>8}")
+        for name, concurrency, rate, p50, p99, errors in results:
+            print(f"{name:<8}{concurrency:>8}{rate:>10,.0f}{p50:>9.2f}ms{p99:>9.2f}ms{errors:>8}")
+    finally:
+        if scratch is not None:
+            os.remove(scratch.name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Lookup latency on inventories, cards_in_deck and friend_requests with and
+without the indexes added in migration 3f9a1c2d7b10.
+
+Builds the tables without indexes in a scratch database, fills them with
+synthetic rows, times the queries the API runs, then creates the indexes and
+times them again:
+
+    python -m server.benchmarks.inventory_lookup --rows 1000000
+    python -m server.benchmarks.inventory_lookup --database-url postgresql://localhost/mythos_bench
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+CARDS = 80
+BATCH = 50000
+
+SCHEMA = (
+    """CREATE TABLE inventories (
+        id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL,
+        card_id INTEGER NOT NULL, quantity INTEGER)""",
+    """CREATE TABLE cards_in_deck (
+        id INTEGER PRIMARY KEY, deck_id INTEGER NOT NULL,
+        card_id INTEGER NOT NULL, quantity INTEGER)""",
+    """CREATE TABLE friend_requests (
+        id INTEGER PRIMARY KEY, sender_id INTEGER NOT NULL,
+        receiver_id INTEGER NOT NULL, status VARCHAR(20))""",
+)
+
+INDEXES = (
+    "CREATE UNIQUE INDEX uq_inventories_user_id_card_id ON inventories (user_id, card_id)",
+    "CREATE UNIQUE INDEX uq_cards_in_deck_deck_id_card_id ON cards_in_deck (deck_id, card_id)",
+    "CREATE INDEX ix_friend_requests_receiver_id_status ON friend_requests (receiver_id, status)",
+    "CREATE INDEX ix_friend_requests_sender_id_receiver_id ON friend_requests (sender_id, receiver_id)",
+)
+
+QUERIES = {
+    'inventory (user_id, card_id)': (
+        "SELECT id, quantity FROM inventories WHERE user_id = :a AND card_id = :b", 'inventory'),
+    'inventory by user_id': (
+        "SELECT id, card_id, quantity FROM inventories WHERE user_id = :a", 'inventory'),
+    'cards_in_deck (deck_id, card_id)': (
+        "SELECT id, quantity FROM cards_in_deck WHERE deck_id = :a AND card_id = :b", 'deck'),
+    'friend_requests (receiver_id, status)': (
+        "SELECT id FROM friend_requests WHERE receiver_id = :a AND status = 'pending'", 'friend'),
+    'friend_requests pair': (
+        "SELECT id FROM friend_requests WHERE (sender_id = :a AND receiver_id = :b) "
+        "OR (sender_id = :b AND receiver_id = :a)", 'friend'),
+}
+
+
+def fill(engine, rows, rng):
+    users = max(1, rows // 50)
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        for statement in SCHEMA:
+            conn.execute(text(statement))
+
+        # 50 distinct cards per user
+        batch = []
+        row_id = 0
+        for user_id in range(1, users + 1):
+            for card_id in rng.sample(range(1, CARDS + 1), 50):
+                row_id += 1
+                batch.append({'id': row_id, 'u': user_id, 'c': card_id, 'q': rng.randint(1, 3)})
+                if len(batch) >= BATCH:
+                    conn.execute(text("INSERT INTO inventories VALUES (:id, :u, :c, :q)"), batch)
+                    batch = []
+        if batch:
+            conn.execute(text("INSERT INTO inventories VALUES (:id, :u, :c, :q)"), batch)
+
+        # One 20-card deck per user
+        deck_rows = [
+            {'id': deck_id * 20 + slot, 'd': deck_id, 'c': slot + 1, 'q': 1}
+            for deck_id in range(1, users + 1) for slot in range(20)
+        ]
+        conn.execute(text("INSERT INTO cards_in_deck VALUES (:id, :d, :c, :q)"), deck_rows)
+
+        statuses = ('pending', 'accepted', 'rejected')
+        request_rows = [
+            {'id': i, 's': rng.randint(1, users), 'r': rng.randint(1, users), 'st': rng.choice(statuses)}
+            for i in range(1, users * 5 + 1)
+        ]
+        conn.execute(text("INSERT INTO friend_requests VALUES (:id, :s, :r, :st)"), request_rows)
+
+    elapsed = time.perf_counter() - started
+    print(f"Inserted {row_id} inventory rows for {users} users in {elapsed:.1f}s")
+    return users
+
+
+def time_queries(engine, users, lookups, rng):
+    results = {}
+    with engine.connect() as conn:
+        for name, (sql, kind) in QUERIES.items():
+            statement = text(sql)
+            timings = []
+            for _ in range(lookups):
+                if kind == 'friend':
+                    params = {'a': rng.randint(1, users), 'b': rng.randint(1, users)}
+                else:
+                    params = {'a': rng.randint(1, users), 'b': rng.randint(1, CARDS)}
+                started = time.perf_counter()
+                conn.execute(statement, params).fetchall()
+                timings.append((time.perf_counter() - started) * 1000.0)
+            timings.sort()
+            results[name] = (statistics.median(timings), timings[int(len(timings) * 0.95) - 1])
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000, help='inventory rows to generate')
+    parser.add_argument('--lookups', type=int, default=200, help='queries timed per lookup type')
+    parser.add_argument('--database-url', default=None, help='empty database to use (default: temp SQLite)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    scratch = None
+    url = args.database_url
+    if url is None:
+        scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        scratch.close()
+        url = f'sqlite:///{scratch.name}'
+
+    engine = create_engine(url)
+    try:
+        users = fill(engine, args.rows, rng)
+        before = time_queries(engine, users, args.lookups, random.Random(args.seed))
+
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            for statement in INDEXES:
+                conn.execute(text(statement))
+        print(f"Created indexes in {time.perf_counter() - started:.1f}s\n")
+
+        after = time_queries(engine, users, args.lookups, random.Random(args.seed))
+
+        print(f"{'lookup':<40}{'before p50':>12}{'after p50':>12}{'before p95':>12}{'after p95':>12}{'speedup':>10}")
+        for name in QUERIES:
+            b50, b95 = before[name]
+            a50, a95 = after[name]
+            print(f"{name:<40}{b50:>10.3f}ms{a50:>10.3f}ms{b95:>10.3f}ms{a95:>10.3f}ms{b50 / max(a50, 1e-6):>9.0f}x")
+    finally:
+        if scratch is None:
+            with engine.begin() as conn:
+                for table in ('inventories', 'cards_in_deck', 'friend_requests'):
+                    conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        engine.dispose()
+        if scratch is not None:
+            os.remove(scratch.name)
+
+
+if __name__ == '__main__':
+    main()
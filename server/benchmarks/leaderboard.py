@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Leaderboard rank index against SQL ranking queries at 1M users.
+
+Loads synthetic (id, wins) rows into server.leaderboard.Leaderboard and into a
+scratch SQLite users table, checks that both agree on ranks, then times a
+user's rank, the top 10, a user's neighbors and win updates:
+
+    python -m server.benchmarks.leaderboard --users 1000000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import create_engine, text
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from server.leaderboard import Leaderboard
+
+SQL_RANK = "SELECT COUNT(*) + 1 FROM users WHERE wins > (SELECT wins FROM users WHERE id = :id)"
+SQL_TOP = "SELECT id, wins FROM users ORDER BY wins DESC, id LIMIT 10"
+SQL_AROUND = """SELECT id, wins FROM users
+    WHERE wins < :wins OR (wins = :wins AND id >= :id)
+    ORDER BY wins DESC, id LIMIT 6"""
+
+
+def timed(fn, args, repeat=None):
+    timings = []
+    for arg in args[:repeat]:
+        started = time.perf_counter()
+        fn(arg)
+        timings.append((time.perf_counter() - started) * 1000.0)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.99) - 1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=10000, help='timed index operations')
+    parser.add_argument('--sql-queries', type=int, default=50, help='timed SQL queries per variant')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    rows = [(user_id, int(rng.expovariate(1 / 20.0))) for user_id in range(1, args.users + 1)]
+    sample = [rng.randint(1, args.users) for _ in range(args.queries)]
+
+    board = Leaderboard()
+    tracemalloc.start()
+    started = time.perf_counter()
+    board.load(rows)
+    build_s = time.perf_counter() - started
+    memory_mb = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+    print(f"Loaded {args.users:,} users in {build_s:.2f}s, {memory_mb:.0f} MB\n")
+
+    results = {
+        'index rank': timed(board.rank, sample),
+        'index top 10': timed(lambda _: board.top(10), sample),
+        'index neighbors +-5': timed(lambda user_id: board.around(user_id, 5), sample),
+        'index win update': timed(lambda user_id: board.set_wins(user_id, board.wins_of[user_id] + 1), sample),
+    }
+
+    scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    scratch.close()
+    engine = create_engine(f'sqlite:///{scratch.name}')
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, wins INTEGER)"))
+            conn.execute(text("INSERT INTO users VALUES (:id, :wins)"),
+                         [{'id': user_id, 'wins': wins} for user_id, wins in board.wins_of.items()])
+
+        with engine.connect() as conn:
+            # Both sides must agree before timings mean anything
+            for user_id in sample[:100]:
+                sql_rank = conn.execute(text(SQL_RANK), {'id': user_id}).scalar()
+                if sql_rank != board.rank(user_id)[0]:
+                    raise SystemExit(f"Rank mismatch for user {user_id}")
+            top = [tuple(row) for row in conn.execute(text(SQL_TOP))]
+            if top != [(user_id, wins) for _, user_id, wins in board.top(10)]:
+                raise SystemExit("Top 10 mismatch")
+            print("Index ranks match SQL\n")
+
+            def sql_around(user_id):
+                wins = board.wins_of[user_id]
+                conn.execute(text(SQL_AROUND), {'id': user_id, 'wins': wins}).all()
+
+            sql_sample = sample[:args.sql_queries]
+            for label in ('no index', 'index on wins'):
+                if label == 'index on wins':
+                    conn.execute(text("CREATE INDEX ix_users_wins_id ON users (wins, id)"))
+                results[f'SQL rank ({label})'] = timed(
+                    lambda user_id: conn.execute(text(SQL_RANK), {'id': user_id}).scalar(), sql_sample)
+                results[f'SQL top 10 ({label})'] = timed(
+                    lambda _: conn.execute(text(SQL_TOP)).all(), sql_sample)
+                results[f'SQL neighbors ({label})'] = timed(sql_around, sql_sample)
+    finally:
+        engine.dispose()
+        os.remove(scratch.name)
+
+    print(f"{'operation':<34}{'p50':>12}{'p99':>12}")
+    for name, (p50, p99) in results.items():
+        print(f"{name:<34}{p50:>10.4f}ms{p99:>10.4f}ms")
+
+
+if __name__ == '__main__':
+    main()
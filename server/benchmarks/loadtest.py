@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Load test replaying the React client's request sequences against a local server.
+
+Generates --users synthetic users into a scratch SQLite database (or the empty
+database at --database-url, e.g. a local PostgreSQL), starts server.app:app
+under gunicorn (or werkzeug's threaded server when gunicorn is not installed)
+and runs --concurrency virtual players for --duration seconds. Each player
+logs in once, then repeats the client's screens in order:
+
+    dashboard    GET /users/<id>
+    arena        GET /users/<id>/decks, GET .../decks/<deck>/cards, GET /cards
+    marketplace  GET /users/<id>, GET /cards, POST /users/<id>/purchases
+    deck edit    GET .../decks/<deck>/cards, PUT .../decks/<deck>/cards,
+                 PATCH /users/<id>/decks/<deck>   (DeckModal's save)
+
+Latency percentiles and requests per second are reported per endpoint and
+written to --output as JSON with sorted keys and rounded numbers, so the
+output of two runs (say, before and after a change) compares with a plain diff:
+
+    python -m server.benchmarks.loadtest --concurrency 32 --duration 30
+    python -m server.benchmarks.loadtest --database-url postgresql://localhost/mythos_bench
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT)
+
+from server.benchmarks.asgi import prepare, start_server, stop_server, wait_ready
+
+DEFAULT_OUTPUT = os.path.join(ROOT, 'server', 'benchmarks', 'results', 'loadtest.json')
+PASSWORD = 'password'
+
+
+def load_players(count):
+    """(user id, email, starter deck id) of generated users, with gems to spend."""
+    from sqlalchemy import select, update
+    from server.app import app
+    from server.models import db, User, Deck
+
+    with app.app_context():
+        # Enough gems that purchases never run dry during the test
+        db.session.execute(update(User).values(wallet=10 ** 9))
+        db.session.commit()
+        rows = db.session.execute(
+            select(User.id, User.email, Deck.id).join(Deck, Deck.user_id == User.id)
+            .order_by(User.id).limit(count)
+        ).all()
+    return [tuple(row) for row in rows]
+
+
+def server_command(args, port):
+    if args.server == 'gunicorn':
+        return ['gunicorn', '--workers', str(args.workers), '--threads', str(args.threads),
+                '--bind', f'127.0.0.1:{port}', 'server.app:app']
+    return [sys.executable, '-c',
+            'from werkzeug.serving import run_simple; from server.app import app; '
+            f'run_simple("127.0.0.1", {port}, app, threaded=True)']
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, max(0, int(round(len(ordered) * fraction)) - 1))]
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, endpoint, elapsed_ms, ok):
+        with self._lock:
+            self.timings[endpoint].append(elapsed_ms)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def summary(self, seconds):
+        endpoints = {}
+        for endpoint, timings in self.timings.items():
+            ordered = sorted(timings)
+            endpoints[endpoint] = {
+                'requests': len(ordered),
+                'errors': self.errors[endpoint],
+                'rps': round(len(ordered) / seconds, 2),
+                'p50_ms': round(percentile(ordered, 0.50), 2),
+                'p95_ms': round(percentile(ordered, 0.95), 2),
+                'p99_ms': round(percentile(ordered, 0.99), 2),
+            }
+        total = sum(endpoint['requests'] for endpoint in endpoints.values())
+        return {
+            'endpoints': endpoints,
+            'total': {
+                'requests': total,
+                'errors': sum(self.errors.values()),
+                'rps': round(total / seconds, 2),
+            },
+        }
+
+
+class Player:
+    """One virtual player on its own keep-alive connection."""
+
+    def __init__(self, port, recorder, user_id, email, deck_id, card_ids, rng):
+        self.port = port
+        self.recorder = recorder
+        self.user_id = user_id
+        self.email = email
+        self.deck_id = deck_id
+        self.card_ids = card_ids
+        self.rng = rng
+        self.connection = None
+        self.set_aside = None
+
+    def request(self, method, path, endpoint, body=None):
+        payload = json.dumps(body) if body is not None else None
+        headers = {'Content-Type': 'application/json'} if payload is not None else {}
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+            started = time.perf_counter()
+            try:
+                self.connection.request(method, path, body=payload, headers=headers)
+                response = self.connection.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, OSError):
+                # The server closed an idle keep-alive connection; retry once
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    self.recorder.record(endpoint, (time.perf_counter() - started) * 1000.0, False)
+                    return None
+                continue
+            elapsed = (time.perf_counter() - started) * 1000.0
+            ok = response.status < 400
+            self.recorder.record(endpoint, elapsed, ok)
+            if response.getheader('Connection', '').lower() == 'close':
+                self.connection.close()
+                self.connection = None
+            return json.loads(data) if ok and data.strip() else None
+
+    def login(self):
+        self.request('POST', '/auth/login', 'POST /auth/login', {'email': self.email, 'password': PASSWORD})
+
+    def dashboard(self):
+        self.request('GET', f'/users/{self.user_id}', 'GET /users/<id>')
+
+    def arena(self):
+        self.request('GET', f'/users/{self.user_id}/decks', 'GET /users/<id>/decks')
+        self.request('GET', f'/users/{self.user_id}/decks/{self.deck_id}/cards',
+                     'GET /users/<id>/decks/<id>/cards')
+        self.request('GET', '/cards', 'GET /cards')
+
+    def marketplace(self):
+        self.request('GET', f'/users/{self.user_id}', 'GET /users/<id>')
+        self.request('GET', '/cards', 'GET /cards')
+        self.request('POST', f'/users/{self.user_id}/purchases', 'POST /users/<id>/purchases', {
+            'items': [{'card_id': self.rng.choice(self.card_ids), 'quantity': 1}],
+        })
+
+    def deck_edit(self):
+        """Take one card out of the deck, or put the last one taken out back."""
+        cards = self.request('GET', f'/users/{self.user_id}/decks/{self.deck_id}/cards',
+                             'GET /users/<id>/decks/<id>/cards') or []
+        composition = {}
+        for row in cards:
+            card_id = row['card']['id']
+            composition[card_id] = composition.get(card_id, 0) + row['quantity']
+        if self.set_aside is not None:
+            composition[self.set_aside] = composition.get(self.set_aside, 0) + 1
+            self.set_aside = None
+        elif composition:
+            self.set_aside = self.rng.choice(sorted(composition))
+            composition[self.set_aside] -= 1
+        self.request('PUT', f'/users/{self.user_id}/decks/{self.deck_id}/cards',
+                     'PUT /users/<id>/decks/<id>/cards',
+                     {'cards': {str(card_id): count for card_id, count in composition.items() if count}})
+        self.request('PATCH', f'/users/{self.user_id}/decks/{self.deck_id}',
+                     'PATCH /users/<id>/decks/<id>', {'name': f'Deck {self.rng.randint(1, 99)}'})
+
+    def run(self, deadline):
+        self.login()
+        screens = (self.dashboard, self.arena, self.marketplace, self.deck_edit)
+        while time.perf_counter() < deadline:
+            for screen in screens:
+                if time.perf_counter() >= deadline:
+                    break
+                screen()
+        if self.connection is not None:
+            self.connection.close()
+
+
+def drive(port, players, card_ids, duration, seed):
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=Player(port, recorder, user_id, email, deck_id, card_ids,
+                                       random.Random(seed + index)).run, args=(deadline,))
+        for index, (user_id, email, deck_id) in enumerate(players)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder.summary(time.perf_counter() - started)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000, help='generated users')
+    parser.add_argument('--database-url', help='an empty database to fill instead of scratch SQLite')
+    parser.add_argument('--concurrency', type=int, default=16, help='virtual players')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds of timed load')
+    parser.add_argument('--warmup', type=float, default=3.0, help='seconds of untimed load first')
+    parser.add_argument('--server', choices=('gunicorn', 'werkzeug'),
+                        default='gunicorn' if shutil.which('gunicorn') else 'werkzeug')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads per worker')
+    parser.add_argument('--port', type=int, default=5711)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='JSON results file')
+    args = parser.parse_args(argv)
+    if args.concurrency > args.users:
+        parser.error('--concurrency cannot exceed --users')
+
+    scratch = None
+    database_url = args.database_url
+    if database_url is None:
+        scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        scratch.close()
+        database_url = f'sqlite:///{scratch.name}'
+    try:
+        prepare(database_url, args.users)
+        players = load_players(args.concurrency * 2)
+        from server.catalog import card_catalog
+        from server.app import app
+        with app.app_context():
+            card_ids = [card['id'] for card in card_catalog.get_cards()]
+
+        env = dict(os.environ, DATABASE_URL=database_url, REQUEST_LOG_SAMPLE_RATE='0')
+        server = start_server(server_command(args, args.port), env)
+        try:
+            wait_ready(args.port)
+            # Warm up on other players, so each timed player starts with a login
+            drive(args.port, players[args.concurrency:], card_ids, args.warmup, args.seed)
+            summary = drive(args.port, players[:args.concurrency], card_ids, args.duration, args.seed)
+        finally:
+            stop_server(server)
+    finally:
+        if scratch is not None:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(scratch.name + suffix):
+                    os.remove(scratch.name + suffix)
+
+    summary['config'] = {
+        'backend': database_url.split(':', 1)[0],
+        'concurrency': args.concurrency,
+        'duration_s': args.duration,
+        'server': args.server,
+        'threads': args.threads if args.server == 'gunicorn' else None,
+        'users': args.users,
+        'workers': args.workers if args.server == 'gunicorn' else None,
+    }
+
+    print(f"\n{'endpoint':<38}{'requests':>9}{'rps':>9}{'p50':>10}{'p95':>10}{'p99':>10}{'errors':>8}")
+    for endpoint, stats in sorted(summary['endpoints'].items()):
+        print(f"{endpoint:<38}{stats['requests']:>9}{stats['rps']:>9.1f}{stats['p50_ms']:>8.1f}ms"
+              f"{stats['p95_ms']:>8.1f}ms{stats['p99_ms']:>8.1f}ms{stats['errors']:>8}")
+    total = summary['total']
+    print(f"{'total':<38}{total['requests']:>9}{total['rps']:>9.1f}{'':>30}{total['errors']:>8}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(summary, f, indent=2, sort_keys=True)
+        f.write('\n')
+    print(f"\nSaved {args.output}")
+
+
+if __name__ == '__main__':
+    main()
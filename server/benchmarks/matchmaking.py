@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Matchmaking queue simulator.
+
+Pushes --entries synthetic players (ratings normal around --mean with
+--spread) through server.matchmaking.MatchQueue, arriving as a Poisson process
+at --rate players per simulated second, with sweeps every sweep_interval of
+simulated time. Reports the wall-clock cost of each join (the pairing search
+included) and sweep, and the simulated wait and rating gap of every pairing.
+
+With --compare the same arrivals also go through a queue that finds opponents
+by scanning every waiting player, the approach the buckets replace; both must
+produce the same pairings.
+
+    python -m server.benchmarks.matchmaking --entries 100000 --rate 500 --compare
+    python -m server.benchmarks.matchmaking --rate 2000 --base-gap 0 --gap-per-second 0.5 --compare
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from server.config import Config
+from server.matchmaking import MatchQueue
+
+
+class ScanQueue(MatchQueue):
+    """The same queue, finding opponents by scanning every waiting player."""
+
+    def _index(self, entry):
+        pass
+
+    def _unindex(self, entry):
+        pass
+
+    def _closest(self, entry, gap):
+        best = None
+        for other in self._entries.values():
+            if other.user_id == entry.user_id:
+                continue
+            diff = abs(other.rating - entry.rating)
+            if diff <= gap and (best is None or (diff, other.seq) < (abs(best[0] - entry.rating), best[1])):
+                best = (other.rating, other.seq, other.user_id)
+        return best
+
+
+def arrivals(count, rate, mean, spread, rng):
+    now = 0.0
+    for user_id in range(1, count + 1):
+        now += rng.expovariate(rate)
+        yield user_id, max(0, int(rng.gauss(mean, spread))), now
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, max(0, int(round(len(ordered) * fraction)) - 1))] if ordered else 0.0
+
+
+def simulate(queue, players):
+    join_us, sweep_ms, sweep_sizes, pairings = [], [], [], []
+    next_sweep = queue.sweep_interval
+    max_waiting = 0
+
+    def sweep_until(now):
+        nonlocal next_sweep
+        while next_sweep <= now:
+            size = len(queue)
+            started = time.perf_counter()
+            pairings.extend(queue.sweep(next_sweep))
+            sweep_ms.append((time.perf_counter() - started) * 1000.0)
+            sweep_sizes.append(size)
+            next_sweep += queue.sweep_interval
+
+    for user_id, rating, now in players:
+        sweep_until(now)
+        started = time.perf_counter()
+        # join() may sweep by itself; give it a clock that never triggers that
+        # so sweeps happen at exact interval boundaries above
+        queue._swept_at = now
+        pairing = queue.join(user_id, f'player{user_id}', user_id, rating, now)
+        join_us.append((time.perf_counter() - started) * 1e6)
+        if pairing is not None:
+            pairings.append(pairing)
+        max_waiting = max(max_waiting, len(queue))
+
+    # Drain: keep sweeping until everyone has waited long enough for max_gap
+    widening = (queue.max_gap - queue.base_gap) / queue.gap_per_second if queue.gap_per_second > 0 else 0.0
+    drain_until = now + widening + 2 * queue.sweep_interval
+    while len(queue) > 1 and next_sweep <= drain_until:
+        sweep_until(next_sweep)
+    return join_us, sweep_ms, sweep_sizes, pairings, max_waiting
+
+
+def report(name, queue, results, entries):
+    join_us, sweep_ms, sweep_sizes, pairings, max_waiting = results
+    waits = sorted(pairing.paired_at - player.joined_at for pairing in pairings for player in pairing.players)
+    gaps = sorted(abs(pairing.players[0].rating - pairing.players[1].rating) for pairing in pairings)
+    join_us, sweep_ms = sorted(join_us), sorted(sweep_ms)
+
+    print(f"\n{name}")
+    print(f"  paired {len(pairings) * 2:,} of {entries:,} players, {len(queue):,} left waiting, "
+          f"at most {max_waiting:,} waiting at once")
+    print(f"  join     p50 {percentile(join_us, 0.5):8.1f}us  p99 {percentile(join_us, 0.99):8.1f}us  "
+          f"max {join_us[-1]:8.1f}us")
+    if sweep_ms:
+        print(f"  sweep    p50 {percentile(sweep_ms, 0.5):8.2f}ms  p99 {percentile(sweep_ms, 0.99):8.2f}ms  "
+              f"max {sweep_ms[-1]:8.2f}ms  ({len(sweep_ms):,} sweeps, "
+              f"{sum(sweep_sizes) / len(sweep_sizes):,.0f} waiting on average)")
+    print(f"  wait     p50 {percentile(waits, 0.5):8.2f}s   p90 {percentile(waits, 0.9):8.2f}s   "
+          f"p99 {percentile(waits, 0.99):8.2f}s   max {waits[-1] if waits else 0:8.2f}s")
+    print(f"  gap      p50 {percentile(gaps, 0.5):8.0f}     p90 {percentile(gaps, 0.9):8.0f}     "
+          f"p99 {percentile(gaps, 0.99):8.0f}     max {gaps[-1] if gaps else 0:8.0f}")
+    print(f"  total    {sum(join_us) / 1000.0 + sum(sweep_ms):,.0f}ms of queue time")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=100000)
+    parser.add_argument('--rate', type=float, default=500.0, help='arrivals per simulated second')
+    parser.add_argument('--mean', type=float, default=1200.0)
+    parser.add_argument('--spread', type=float, default=250.0)
+    parser.add_argument('--base-gap', type=int, default=Config.MATCHMAKING_BASE_GAP)
+    parser.add_argument('--gap-per-second', type=float, default=Config.MATCHMAKING_GAP_PER_SECOND)
+    parser.add_argument('--max-gap', type=int, default=Config.MATCHMAKING_MAX_GAP)
+    parser.add_argument('--sweep-interval', type=float, default=Config.MATCHMAKING_SWEEP_INTERVAL)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--compare', action='store_true', help='also run the scanning queue')
+    args = parser.parse_args(argv)
+
+    def make(cls):
+        return cls(
+            base_gap=args.base_gap, gap_per_second=args.gap_per_second,
+            max_gap=args.max_gap, sweep_interval=args.sweep_interval, pairing_ttl=float('inf'),
+        )
+
+    players = list(arrivals(args.entries, args.rate, args.mean, args.spread, random.Random(args.seed)))
+    print(f"{args.entries:,} players at {args.rate:,.0f}/s over {players[-1][2]:,.0f} simulated seconds; "
+          f"gap {args.base_gap} + {args.gap_per_second:g}/s up to {args.max_gap}, "
+          f"sweeps every {args.sweep_interval:g}s")
+
+    queue = make(MatchQueue)
+    results = simulate(queue, players)
+    report('bucketed', queue, results, args.entries)
+
+    if args.compare:
+        scan_queue = make(ScanQueue)
+        scan_results = simulate(scan_queue, players)
+        report('scan', scan_queue, scan_results, args.entries)
+        same = ([tuple(p.user_id for p in pairing.players) for pairing in results[3]] ==
+                [tuple(p.user_id for p in pairing.players) for pairing in scan_results[3]])
+        print(f"\nsame pairings: {'yes' if same else 'NO'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Bytes and CPU per response for the JSON encoders and compressors.
+
+Encodes the card catalog (server/data/cards.json, as GET /cards returns it)
+and a --items inventory with nested cards (as GET /users/<id>/inventory
+returns it), then compresses each body:
+
+    restful        flask-restful's default: json.dumps + newline
+    restful-debug  the same in debug mode (indent=4)
+    compact        server.representations' stdlib fallback
+    orjson         server.representations with orjson (when installed)
+
+    python -m server.benchmarks.representations --items 1000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from server import representations
+from server.representations import JSONRepresentation
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'cards.json')
+
+
+def payloads(items, rng):
+    with open(DATA) as f:
+        cards = [
+            {'id': card_id, 'name': card['name'], 'image': card['image'], 'power': card['power'],
+             'cost': card['cost'], 'thief': card.get('thief', False), 'guard': card.get('guard', False),
+             'curse': card.get('curse', False)}
+            for card_id, card in enumerate(json.load(f), 1)
+        ]
+    inventory = [
+        {'id': item_id, 'user_id': 1, 'card_id': card['id'], 'quantity': rng.randint(1, 3), 'card': card}
+        for item_id, card in enumerate((rng.choice(cards) for _ in range(items)), 1)
+    ]
+    return {'catalog': cards, 'inventory': inventory}
+
+
+def encoders():
+    found = {
+        'restful': lambda data: (json.dumps(data) + '\n').encode('utf-8'),
+        'restful-debug': lambda data: (json.dumps(data, indent=4) + '\n').encode('utf-8'),
+        'compact': lambda data: json.dumps(data, separators=(',', ':')).encode('utf-8'),
+    }
+    if representations.orjson is not None:
+        found['orjson'] = representations.dumps
+    return found
+
+
+def cpu_us(fn, repeat):
+    started = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - started) / repeat * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=1000, help='inventory entries')
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    representation = JSONRepresentation()
+    compressions = {'identity': None, 'gzip': 'gzip'}
+    if representations.brotli is not None:
+        compressions['br'] = 'br'
+    else:
+        print("brotli is not installed; skipping br\n")
+
+    print(f"{'payload':<11}{'encoder':<15}{'encoding':<10}{'bytes':>10}{'encode':>12}{'compress':>12}{'total':>12}")
+    for name, data in payloads(args.items, random.Random(args.seed)).items():
+        for label, encode in encoders().items():
+            body = encode(data)
+            encode_us = cpu_us(lambda: encode(data), args.repeat)
+            for encoding_label, encoding in compressions.items():
+                if encoding is None:
+                    size, compress_us = len(body), 0.0
+                else:
+                    size = len(representation.compress(body, encoding))
+                    compress_us = cpu_us(lambda: representation.compress(body, encoding), args.repeat)
+                print(f"{name:<11}{label:<15}{encoding_label:<10}{size:>10,}"
+                      f"{encode_us:>10.0f}us{compress_us:>10.0f}us{encode_us + compress_us:>10.0f}us")
+
+
+if __name__ == '__main__':
+    main()
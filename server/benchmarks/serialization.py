@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+SerializerMixin.to_dict() against the compiled serializers on one inventory.
+
+Fills a scratch SQLite database with one user holding --items distinct cards,
+checks that every path produces the same JSON, then times serialization alone
+and query plus serialization for:
+
+    mixin     SerializerMixin.to_dict() on ORM objects (the old path)
+    compiled  inventory_serializer on the same ORM objects
+    rows      inventory_serializer.from_rows() on plain rows, cards from a lookup
+
+    python -m server.benchmarks.serialization --items 1000
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy_serializer import SerializerMixin
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from server.models import db, User, Card, Inventory
+from server.serializers import card_serializer, inventory_serializer
+
+
+def fill(engine, items, rng):
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{
+            'id': 1, 'username': 'bench', 'email': 'bench@example.com',
+            '_password_hash': 'x', 'wallet': 100, 'wins': 0,
+        }])
+        conn.execute(insert(Card), [{
+            'id': card_id, 'name': f'Card {card_id}', 'image': f'/assets/images/card_{card_id}.png',
+            'power': rng.randint(1, 30), 'cost': rng.randint(1, 10),
+            'thief': rng.random() < 0.2, 'guard': rng.random() < 0.2, 'curse': rng.random() < 0.2,
+        } for card_id in range(1, items + 1)])
+        conn.execute(insert(Inventory), [{
+            'id': card_id, 'user_id': 1, 'card_id': card_id, 'quantity': rng.randint(1, 3),
+        } for card_id in range(1, items + 1)])
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000.0)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=1000, help='inventory rows (one per card)')
+    parser.add_argument('--repeat', type=int, default=50, help='timed runs per path')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    scratch.close()
+    engine = create_engine(f'sqlite:///{scratch.name}')
+    try:
+        fill(engine, args.items, random.Random(args.seed))
+
+        with Session(engine) as session:
+            cards = card_serializer.from_rows(session.execute(select(*card_serializer.columns)))
+            cards_by_id = {card['id']: card for card in cards}
+
+            def load_objects():
+                return session.scalars(
+                    select(Inventory).options(joinedload(Inventory.card))
+                    .where(Inventory.user_id == 1).order_by(Inventory.id)
+                ).unique().all()
+
+            def load_rows():
+                return session.execute(
+                    select(*inventory_serializer.columns)
+                    .where(Inventory.user_id == 1).order_by(Inventory.id)
+                ).all()
+
+            objects = load_objects()
+            rows = load_rows()
+
+            serialize = {
+                'mixin': lambda: [SerializerMixin.to_dict(item) for item in objects],
+                'compiled': lambda: inventory_serializer.many(objects),
+                'rows': lambda: inventory_serializer.from_rows(rows, card=cards_by_id),
+            }
+            end_to_end = {
+                'mixin': lambda: [SerializerMixin.to_dict(item) for item in load_objects()],
+                'compiled': lambda: inventory_serializer.many(load_objects()),
+                'rows': lambda: inventory_serializer.from_rows(load_rows(), card=cards_by_id),
+            }
+
+            expected = json.dumps(serialize['mixin'](), sort_keys=True)
+            for name, fn in serialize.items():
+                if json.dumps(fn(), sort_keys=True) != expected:
+                    raise SystemExit(f"{name} output differs from SerializerMixin")
+            print(f"All paths produce identical JSON for {args.items} items\n")
+
+            baseline = None
+            print(f"{'path':<12}{'serialize p50':>16}{'query+serialize p50':>22}{'speedup':>10}")
+            for name in serialize:
+                serialize_ms = timed(serialize[name], args.repeat)
+                # Expire the identity map so each ORM load builds fresh objects
+                total_ms = timed(lambda: (session.expire_all(), end_to_end[name]()), args.repeat)
+                baseline = baseline or serialize_ms
+                print(f"{name:<12}{serialize_ms:>14.2f}ms{total_ms:>20.2f}ms{baseline / serialize_ms:>9.1f}x")
+    finally:
+        engine.dispose()
+        os.remove(scratch.name)
+
+
+if __name__ == '__main__':
+    main()
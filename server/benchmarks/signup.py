@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Signup throughput: the old per-signup card queries against the cached template.
+
+Runs --signups signups per path against a scratch SQLite database seeded with
+the card catalog, through the app in a request context:
+
+    legacy    four Card queries for the starter cards, user commit, then
+              ORM-added deck, cards and inventory and a second commit
+    template  Users.post: the cached starter deck and one transaction of bulk
+              inserts
+
+Passwords use a one-iteration pbkdf2 method so the database work is what gets
+measured; hashing runs in the password pool either way.
+
+    python -m server.benchmarks.signup --signups 500
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import event
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+scratch.close()
+os.environ['DATABASE_URL'] = f'sqlite:///{scratch.name}'
+
+from server.app import app, Users
+from server.catalog import card_catalog
+from server.models import db, User, Card, Inventory, Deck, CardInDeck
+from server.passwords import hasher
+from server.seed import seed_cards_from_json
+
+
+def legacy_signup(username):
+    """Users.post's database work before the starter template."""
+    new_user = User(username=username, email=f'{username}@example.com', wallet=100)
+    new_user.password_hash = 'password'
+    db.session.add(new_user)
+    db.session.commit()
+
+    default_deck = Deck(name="Starter Deck", user_id=new_user.id, volume=20)
+    db.session.add(default_deck)
+    db.session.flush()
+
+    guards = Card.query.filter_by(guard=True).limit(5).all()
+    thieves = Card.query.filter_by(thief=True).limit(5).all()
+    curses = Card.query.filter_by(curse=True).limit(5).all()
+    regulars = Card.query.filter(
+        ~Card.id.in_([c.id for c in guards + thieves + curses])
+    ).limit(5).all()
+
+    for card in guards + thieves + curses + regulars:
+        db.session.add(CardInDeck(deck_id=default_deck.id, card_id=card.id, quantity=1))
+        db.session.add(Inventory(user_id=new_user.id, card_id=card.id, quantity=1))
+    db.session.commit()
+    new_user.to_dict()
+
+
+def template_signup(username):
+    with app.test_request_context('/users', method='POST', json={
+        'username': username, 'email': f'{username}@example.com', 'password': 'password',
+    }):
+        body, status = Users().post()
+        if status != 201:
+            raise SystemExit(f"Signup failed: {body}")
+
+
+def run(label, signup, count, statements):
+    timings = []
+    with app.app_context():
+        before = statements[0]
+        started = time.perf_counter()
+        for number in range(count):
+            call_started = time.perf_counter()
+            signup(f'{label}{number}')
+            timings.append((time.perf_counter() - call_started) * 1000.0)
+        elapsed = time.perf_counter() - started
+        per_signup = (statements[0] - before) / count
+    return count / elapsed, statistics.median(timings), per_signup
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--signups', type=int, default=500)
+    args = parser.parse_args(argv)
+
+    hasher.configure(method='pbkdf2:sha256:1')
+    statements = [0]
+    try:
+        with app.app_context():
+            db.create_all()
+            seed_cards_from_json()
+            card_catalog.get_starter_deck()
+
+            @event.listens_for(db.engine, 'after_cursor_execute')
+            def count(conn, cursor, statement, parameters, context, executemany):
+                statements[0] += 1
+
+        # Warm up both paths before timing
+        for label, signup in (('legacy', legacy_signup), ('template', template_signup)):
+            run(f'warm{label}', signup, 5, statements)
+
+        print(f"{'path':<12}{'signups/s':>12}{'p50':>12}{'statements':>12}")
+        for label, signup in (('legacy', legacy_signup), ('template', template_signup)):
+            rate, p50, per_signup = run(label, signup, args.signups, statements)
+            print(f"{label:<12}{rate:>12,.0f}{p50:>10.2f}ms{per_signup:>12.1f}")
+    finally:
+        os.remove(scratch.name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+SQLite write contention with the default settings against Config.SQLITE_PRAGMAS.
+
+Each profile gets a fresh scratch database. --writers processes (standing in
+for gunicorn workers) record matches the way POST /users/<id>/matches does, an
+insert plus a wallet and wins update in one transaction, while --readers
+processes read a user and their recent matches:
+
+    default  the sqlite3 driver's defaults (rollback journal, synchronous=FULL)
+    tuned    WAL, synchronous=NORMAL, busy_timeout and mmap_size from config
+
+    python -m server.benchmarks.write_contention --writers 4 --readers 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+from sqlalchemy import create_engine, insert, select, update
+from sqlalchemy.exc import OperationalError
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from server.config import Config
+from server.models import db, apply_sqlite_pragmas, User, Match
+
+PROFILES = {
+    'default': {},
+    'tuned': Config.SQLITE_PRAGMAS,
+}
+
+
+def make_engine(path, pragmas):
+    engine = create_engine(f'sqlite:///{path}')
+    apply_sqlite_pragmas(engine, pragmas)
+    return engine
+
+
+def fill(path, pragmas, users):
+    engine = make_engine(path, pragmas)
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{
+            'id': user_id, 'username': f'bench{user_id}', 'email': f'bench{user_id}@example.com',
+            '_password_hash': 'x', 'wallet': 100, 'wins': 0,
+        } for user_id in range(1, users + 1)])
+    engine.dispose()
+
+
+def write_loop(engine, rng, users):
+    user_id = rng.randint(1, users)
+    with engine.begin() as conn:
+        conn.execute(insert(Match).values(
+            match_id=uuid.UUID(int=rng.getrandbits(128)).hex, user_id=user_id, outcome='victory',
+            rounds=rng.randint(1, 10), gems_earned=30,
+        ))
+        conn.execute(update(User).where(User.id == user_id).values(
+            wins=User.wins + 1, wallet=User.wallet + 30,
+        ))
+
+
+def read_loop(engine, rng, users):
+    user_id = rng.randint(1, users)
+    with engine.connect() as conn:
+        conn.execute(select(User.id, User.wallet, User.wins).where(User.id == user_id)).first()
+        conn.execute(
+            select(Match.id, Match.outcome).where(Match.user_id == user_id).order_by(Match.id.desc()).limit(10)
+        ).all()
+
+
+def worker(role, path, pragmas, users, seconds, seed, results):
+    engine = make_engine(path, pragmas)
+    operation = write_loop if role == 'write' else read_loop
+    rng = random.Random(seed)
+    timings = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            operation(engine, rng, users)
+            timings.append((time.perf_counter() - started) * 1000.0)
+        except OperationalError:
+            # "database is locked" once the driver's wait runs out
+            errors += 1
+    engine.dispose()
+    results.put((role, timings, errors))
+
+
+def run_profile(name, pragmas, args):
+    scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    scratch.close()
+    try:
+        fill(scratch.name, pragmas, args.users)
+        results = multiprocessing.Queue()
+        roles = ['write'] * args.writers + ['read'] * args.readers
+        processes = [
+            multiprocessing.Process(target=worker, args=(
+                role, scratch.name, pragmas, args.users, args.seconds, args.seed + index, results))
+            for index, role in enumerate(roles)
+        ]
+        for process in processes:
+            process.start()
+        collected = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+    finally:
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(scratch.name + suffix):
+                os.remove(scratch.name + suffix)
+
+    summary = {}
+    for role in ('write', 'read'):
+        timings = sorted(t for kind, role_timings, _ in collected if kind == role for t in role_timings)
+        errors = sum(role_errors for kind, _, role_errors in collected if kind == role)
+        if timings:
+            summary[role] = (len(timings) / args.seconds, statistics.median(timings),
+                             timings[max(0, int(len(timings) * 0.99) - 1)], errors)
+        else:
+            summary[role] = (0.0, 0.0, 0.0, errors)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds:.0f}s per profile\n")
+    print(f"{'profile':<10}{'op':<7}{'ops/s':>10}{'p50':>11}{'p99':>11}{'errors':>8}")
+    for name, pragmas in PROFILES.items():
+        summary = run_profile(name, pragmas, args)
+        for role, (rate, p50, p99, errors) in summary.items():
+            print(f"{name:<10}{role:<7}{rate:>10,.0f}{p50:>9.2f}ms{p99:>9.2f}ms{errors:>8}")
+
+
+if __name__ == '__main__':
+    main()
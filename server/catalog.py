@@ -0,0 +1,167 @@
+"""
+In-process cache of the card catalog.
+
+The cards table only changes when server/seed.py reseeds it, so the serialized
+card list and an id -> card lookup are built once per catalog version instead of
+on every request. The version is a content hash of the serialized catalog, which
+keeps it identical across gunicorn workers and makes it usable as an ETag.
+The starter deck every new user receives is derived from the catalog as well,
+so signup does not query the cards table, and so are the gem prices purchases
+are charged.
+
+Each version is one immutable CatalogSnapshot. A rebuild swaps in a new one
+with a single assignment, so a request that takes one snapshot and reads its
+cards and version together never serves one catalog under another's ETag.
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter, namedtuple
+
+from sqlalchemy import event, select
+
+from server.models import db, Card
+from server.serializers import card_serializer
+
+# Starter deck: this many of the lowest-id guards, thieves and curses, then
+# of the remaining cards
+STARTER_PER_KIND = 5
+STARTER_KINDS = ('guard', 'thief', 'curse')
+
+# Gem price of a single card: its power, within these bounds
+MIN_PRICE = 5
+MAX_PRICE = 25
+
+# Fixed-price packs: `cards` drawn by the server, or for a guard bundle up to
+# that many distinct guards picked by the client
+PACKS = {
+    'mystery': {'price': 10, 'cards': 1},
+    'booster': {'price': 25, 'cards': 5},
+    'guard': {'price': 20, 'cards': 3},
+}
+
+
+# Keys of every cached card dict, selectable with ?fields=
+CARD_FIELDS = card_serializer.fields + ('price',)
+
+
+def card_price(card):
+    return max(MIN_PRICE, min(MAX_PRICE, card['power']))
+
+
+class CatalogSnapshot(namedtuple('CatalogSnapshot', 'cards by_id starter_deck version')):
+    """One version of the catalog: cards in id order, never changed once built."""
+    __slots__ = ()
+
+    def get_card(self, card_id):
+        return self.by_id.get(card_id)
+
+    def draw(self, count, rng=random):
+        """`count` distinct card ids picked at random, for a pack."""
+        return [card['id'] for card in rng.sample(self.cards, min(count, len(self.cards)))]
+
+
+def build_starter_deck(cards):
+    """[(card_id, quantity)] of the starter deck for cards sorted by id."""
+    picked = []
+    for kind in STARTER_KINDS:
+        picked += [card['id'] for card in cards if card[kind]][:STARTER_PER_KIND]
+    chosen = set(picked)
+    picked += [card['id'] for card in cards if card['id'] not in chosen][:STARTER_PER_KIND]
+    # A card of several kinds is picked once per kind
+    return sorted(Counter(picked).items())
+
+
+class CardCatalog:
+    def __init__(self, check_interval=5.0):
+        # How often (seconds) to re-read the cards table. Writes made in this
+        # process invalidate immediately; comparing the rows catches reseeds
+        # made by other processes such as seed.py.
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._stale = True
+        self._fingerprint = None
+        self._checked_at = 0.0
+        # Read without the lock: rebuilds replace it whole
+        self.current = CatalogSnapshot((), {}, (), None)
+
+    def invalidate(self):
+        self._stale = True
+
+    @property
+    def fresh(self):
+        """True while the cached catalog can be served without a check."""
+        return not self._stale and time.monotonic() - self._checked_at < self.check_interval
+
+    def _read_rows(self):
+        """Every card row in id order: the catalog's source and its fingerprint.
+
+        The whole table is compared rather than aggregates over it, which miss
+        changes that keep the totals, such as two cards swapping costs.
+        """
+        return tuple(
+            tuple(row) for row in
+            db.session.execute(select(*card_serializer.columns).order_by(Card.id))
+        )
+
+    def _rebuild(self, fingerprint):
+        cards = card_serializer.from_rows(fingerprint)
+        for card in cards:
+            card['price'] = card_price(card)
+        payload = json.dumps(cards, sort_keys=True, default=str).encode('utf-8')
+
+        self.current = CatalogSnapshot(
+            cards=tuple(cards),
+            by_id={card['id']: card for card in cards},
+            starter_deck=tuple(build_starter_deck(cards)),
+            version=hashlib.sha1(payload).hexdigest(),
+        )
+        self._fingerprint = fingerprint
+
+    def refresh(self):
+        """Rebuild the cached catalog if the cards table has changed."""
+        if self.fresh:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            if not self._stale and now - self._checked_at < self.check_interval:
+                return
+            fingerprint = self._read_rows()
+            if self._stale or fingerprint != self._fingerprint:
+                self._rebuild(fingerprint)
+            self._stale = False
+            self._checked_at = now
+
+    def snapshot(self):
+        """The current catalog, refreshed first; read it once per request."""
+        self.refresh()
+        return self.current
+
+    def get_cards(self):
+        return self.snapshot().cards
+
+    def get_by_id(self):
+        return self.snapshot().by_id
+
+    def get_starter_deck(self):
+        return self.snapshot().starter_deck
+
+    def get_card(self, card_id):
+        return self.snapshot().get_card(card_id)
+
+    def draw(self, count, rng=random):
+        return self.snapshot().draw(count, rng)
+
+
+card_catalog = CardCatalog()
+
+
+@event.listens_for(Card, 'after_insert')
+@event.listens_for(Card, 'after_update')
+@event.listens_for(Card, 'after_delete')
+def _invalidate_catalog(mapper, connection, target):
+    card_catalog.invalidate()
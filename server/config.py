@@ -4,13 +4,137 @@ from datetime import timedelta
 
 load_dotenv()
 
+
+def database_url():
+    url = os.environ.get('DATABASE_URL') or 'sqlite:///app.db'
+    # Render and Heroku hand out postgres://, which SQLAlchemy no longer accepts
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def engine_options(url, pool_size, max_overflow, pool_recycle, pool_timeout, statement_timeout_ms):
+    """
+    create_engine() options for the backend of `url`.
+
+    SQLite needs none here: its tuning is per-connection PRAGMAs, applied by
+    a connect listener (see SQLITE_PRAGMAS). Server databases get a sized
+    pool whose connections are checked before use and recycled before
+    proxies or the server drop them, and a per-session statement timeout.
+    """
+    if url.startswith('sqlite'):
+        return {}
+    options = {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_recycle': pool_recycle,
+        'pool_timeout': pool_timeout,
+        'pool_pre_ping': True,
+    }
+    if url.startswith('postgresql') and statement_timeout_ms:
+        options['connect_args'] = {'options': f'-c statement_timeout={statement_timeout_ms}'}
+    return options
+
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-key-please-change-in-production'
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///app.db'
+    SQLALCHEMY_DATABASE_URI = database_url()
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_ECHO = True
+    SQLALCHEMY_ECHO = os.environ.get('SQLALCHEMY_ECHO', '').lower() in ('1', 'true')
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
     
+    # SQLite, set on every connection: WAL lets readers run alongside the
+    # writer and several workers write without "database is locked" errors,
+    # NORMAL sync is safe under WAL, busy_timeout (ms) waits for the write
+    # lock instead of failing, and mmap_size (bytes) serves reads from the
+    # page cache
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    }
+    
+    # PostgreSQL and other server databases: connections per worker process
+    # (pool size plus overflow), seconds before a connection is replaced or
+    # a checkout gives up, and the per-statement timeout (ms, 0 disables)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_STATEMENT_TIMEOUT = int(os.environ.get('DB_STATEMENT_TIMEOUT', 5000))
+    
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        SQLALCHEMY_DATABASE_URI, DB_POOL_SIZE, DB_MAX_OVERFLOW,
+        DB_POOL_RECYCLE, DB_POOL_TIMEOUT, DB_STATEMENT_TIMEOUT,
+    )
+    
+    # Request logging: level and fraction of successful requests logged
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    REQUEST_LOG_SAMPLE_RATE = float(os.environ.get('REQUEST_LOG_SAMPLE_RATE', 0.1))
+    
+    # Seconds between checks of the cards table for out-of-process reseeds
+    CARD_CATALOG_CHECK_INTERVAL = float(os.environ.get('CARD_CATALOG_CHECK_INTERVAL', 5))
+    
+    # Default page sizes of GET /users and the friends in GET
+    # /users/<id>/friends when no ?limit= is given
+    USERS_PAGE_SIZE = int(os.environ.get('USERS_PAGE_SIZE', 100))
+    FRIENDS_PAGE_SIZE = int(os.environ.get('FRIENDS_PAGE_SIZE', 100))
+    
+    # Gems credited for a recorded victory
+    MATCH_VICTORY_REWARD = int(os.environ.get('MATCH_VICTORY_REWARD', 30))
+    
+    # Leaderboard: seconds between syncs of other workers' win changes, and
+    # between full reloads (which drop deleted users)
+    LEADERBOARD_SYNC_INTERVAL = float(os.environ.get('LEADERBOARD_SYNC_INTERVAL', 5))
+    LEADERBOARD_REBUILD_INTERVAL = float(os.environ.get('LEADERBOARD_REBUILD_INTERVAL', 600))
+    
+    # Friend graph cache: seconds before a user's cached friends are re-read
+    # (picks up other workers' accepts), and how many users are kept
+    FRIEND_GRAPH_TTL = float(os.environ.get('FRIEND_GRAPH_TTL', 30))
+    FRIEND_GRAPH_MAX_USERS = int(os.environ.get('FRIEND_GRAPH_MAX_USERS', 100000))
+    
+    # Password hashing: werkzeug method (changing it rehashes each user's
+    # password at their next login), hashing processes per worker, and calls
+    # queued or running before signups/logins get a 429
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:260000')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 32))
+    
+    # Response bodies of at least this many bytes are compressed when the
+    # client accepts it; gzip level and brotli quality trade CPU for size
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4))
+    
+    # Server-Sent Events: seconds between keep-alive comments, seconds before a
+    # stream ends and the browser reconnects, events buffered per stream, WSGI
+    # streams per process (each holds a thread), and a Redis URL to relay
+    # events between workers
+    EVENTS_KEEPALIVE = float(os.environ.get('EVENTS_KEEPALIVE', 15))
+    EVENTS_MAX_STREAM_SECONDS = float(os.environ.get('EVENTS_MAX_STREAM_SECONDS', 300))
+    EVENTS_QUEUE_SIZE = int(os.environ.get('EVENTS_QUEUE_SIZE', 100))
+    EVENTS_MAX_BLOCKING_STREAMS = int(os.environ.get('EVENTS_MAX_BLOCKING_STREAMS', 8))
+    EVENTS_REDIS_URL = os.environ.get('EVENTS_REDIS_URL') or None
+    
+    # Matchmaking: Elo K-factor; the rating gap accepted on joining the queue,
+    # how much it widens per second of waiting and its cap; seconds between
+    # sweeps that retry waiting players, and before an unreported pairing is
+    # dropped
+    ELO_K_FACTOR = int(os.environ.get('ELO_K_FACTOR', 32))
+    MATCHMAKING_BASE_GAP = int(os.environ.get('MATCHMAKING_BASE_GAP', 50))
+    MATCHMAKING_GAP_PER_SECOND = float(os.environ.get('MATCHMAKING_GAP_PER_SECOND', 10))
+    MATCHMAKING_MAX_GAP = int(os.environ.get('MATCHMAKING_MAX_GAP', 400))
+    MATCHMAKING_SWEEP_INTERVAL = float(os.environ.get('MATCHMAKING_SWEEP_INTERVAL', 1))
+    MATCHMAKING_PAIRING_TTL = float(os.environ.get('MATCHMAKING_PAIRING_TTL', 1800))
+    
+    # Arena AI: rollout worker processes, whether to start them with the
+    # server instead of on the first move, and per-move time budget (ms)
+    AI_WORKERS = int(os.environ.get('AI_WORKERS', 0)) or None
+    AI_WARM_UP = os.environ.get('AI_WARM_UP', '1') == '1'
+    AI_MOVE_BUDGET_MS = int(os.environ.get('AI_MOVE_BUDGET_MS', 50))
+    AI_MAX_MOVE_BUDGET_MS = int(os.environ.get('AI_MAX_MOVE_BUDGET_MS', 500))
+    
     # CORS configuration
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:3000').split(',')
     
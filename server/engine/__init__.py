@@ -0,0 +1,23 @@
+"""
+Server-side battle engine for Mythos.
+
+Mirrors the lane combat resolved by the client (useGameLogic.js) so games can be
+validated, replayed and simulated on the server.
+"""
+
+from server.engine.cards import CardTable
+from server.engine.state import GameState, EMPTY
+from server.engine.rules import (
+    LANES,
+    STARTING_LIFE,
+    GUARD_BLOCK_LIMIT,
+    new_game,
+    start_round,
+    legal_placements,
+    place_card,
+    resolve_attack,
+    resolve_battle,
+    play_round,
+    play_match,
+    random_policy,
+)
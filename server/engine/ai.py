@@ -0,0 +1,318 @@
+"""
+Monte Carlo opponent for the arena.
+
+Each candidate placement is scored by random playouts of the rest of the round
+and a few rounds beyond it. Playouts run in a ProcessPoolExecutor and stop at a
+wall-clock deadline, so a move is always chosen within the request's budget;
+whatever rollouts finished in time decide the move.
+
+Workers are started from a forkserver, not forked from the web process: by the
+time a pool starts, that process runs request, event and sweeper threads, and a
+fork copies whatever locks they hold. The server warms the pool up when it
+starts, so the first move does not pay for starting the workers.
+"""
+
+import multiprocessing
+import os
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from server.engine.cards import CardTable
+from server.engine.state import GameState, EMPTY
+from server.engine.rules import (
+    LANES,
+    STARTING_LIFE,
+    PLACEMENT_TURNS,
+    HAND_SIZE,
+    DRAW,
+    legal_placements,
+    place_card,
+    resolve_battle,
+    play_round,
+    random_policy,
+)
+
+PLAYER = 0
+AI = 1
+
+HORIZON_ROUNDS = 3
+ROLLOUT_CAP = 100000
+OPPONENT_DECK_SHAPE = ((2, 8), (4, 7), (None, 5))
+
+# Card table of the current catalog, set in each worker process
+_worker_table = None
+
+# forkserver where the platform has it (not on Windows)
+if 'forkserver' in multiprocessing.get_all_start_methods():
+    _mp_context = multiprocessing.get_context('forkserver')
+    # Workers fork from a server that has the engine imported already
+    _mp_context.set_forkserver_preload(['server.engine.ai'])
+else:
+    _mp_context = multiprocessing.get_context('spawn')
+
+
+def _init_worker(rows):
+    global _worker_table
+    _worker_table = CardTable(rows)
+
+
+def _ready():
+    return _worker_table is not None
+
+
+def _score(state):
+    if state.winner == AI:
+        return 1.0
+    if state.winner == PLAYER:
+        return 0.0
+    if state.winner == DRAW:
+        return 0.5
+    return 0.5 + (state.life[AI] - state.life[PLAYER]) / (4.0 * STARTING_LIFE)
+
+
+def _rollout(state, table, move, turns_left, rng):
+    s = state.copy()
+    # The player's hand and both decks are hidden, so sample them from the catalog
+    card_count = len(table)
+    s.hands[PLAYER] = [rng.randrange(card_count) for _ in range(len(s.hands[PLAYER]))]
+    s.decks[PLAYER] = [rng.randrange(card_count) for _ in range(len(s.decks[PLAYER]))]
+    s.decks[AI] = [rng.randrange(card_count) for _ in range(len(s.decks[AI]))]
+
+    if move is not None:
+        place_card(s, table, AI, move[0], move[1])
+
+    # Placement continues with the player, then alternates
+    player_turns = turns_left[PLAYER]
+    ai_turns = turns_left[AI] - 1
+    while player_turns > 0 or ai_turns > 0:
+        if player_turns > 0:
+            choice = random_policy(s, table, PLAYER, rng)
+            if choice is not None:
+                place_card(s, table, PLAYER, choice[0], choice[1])
+            player_turns -= 1
+        if ai_turns > 0:
+            choice = random_policy(s, table, AI, rng)
+            if choice is not None:
+                place_card(s, table, AI, choice[0], choice[1])
+            ai_turns -= 1
+
+    resolve_battle(s, table)
+    policies = (random_policy, random_policy)
+    for _ in range(HORIZON_ROUNDS):
+        if s.winner is not None:
+            break
+        play_round(s, table, policies, rng)
+    return _score(s)
+
+
+def _run_rollouts(state, moves, turns_left, seed, deadline):
+    """Worker entry point: cycle through the moves until the deadline."""
+    table = _worker_table
+    rng = random.Random(seed)
+    totals = [0.0] * len(moves)
+    counts = [0] * len(moves)
+    rounds = 0
+    while rounds < ROLLOUT_CAP and time.time() < deadline:
+        for index, move in enumerate(moves):
+            totals[index] += _rollout(state, table, move, turns_left, rng)
+            counts[index] += 1
+        rounds += 1
+    return totals, counts
+
+
+def build_state(table, data):
+    """
+    Build a GameState from the arena's view of the board.
+
+    `data` uses card ids: `opponent_hand`, `player_lanes`, `opponent_lanes`
+    (three entries, null for empty) and optional `guard_blocks`, `life`, `mana`,
+    `player_hand_size` and deck sizes. Side 1 is the AI. Raises ValueError for
+    a malformed view, which would otherwise only fail inside the rollouts.
+    """
+    index_of = table.index_of
+
+    def section(key):
+        value = data.get(key, {})
+        if not isinstance(value, dict):
+            raise ValueError(f"{key} must map player and opponent to values")
+        return value
+
+    def lane_blocks(blocks):
+        blocks = [int(count) for count in blocks]
+        if len(blocks) != LANES or any(count < 0 for count in blocks):
+            raise ValueError(f"Guard blocks must be {LANES} non-negative counts per side")
+        return blocks
+
+    def lane_cards(card_ids):
+        card_ids = list(card_ids or [None] * LANES)
+        if len(card_ids) != LANES:
+            raise ValueError(f"Lanes must have {LANES} entries")
+        return [EMPTY if card_id is None else index_of[card_id] for card_id in card_ids]
+
+    try:
+        hand = [index_of[card_id] for card_id in data.get('opponent_hand', [])]
+        lanes = lane_cards(data.get('player_lanes')) + lane_cards(data.get('opponent_lanes'))
+    except KeyError as e:
+        raise ValueError(f"Unknown card id {e.args[0]}")
+
+    deck_sizes = section('deck_sizes')
+    state = GameState(STARTING_LIFE, 0, ([EMPTY] * int(deck_sizes.get('player', 0)),
+                                         [EMPTY] * int(deck_sizes.get('opponent', 0))))
+    state.round = int(data.get('round', 1))
+    state.lanes = lanes
+    state.hands = [[EMPTY] * int(data.get('player_hand_size', HAND_SIZE)), hand]
+
+    life = section('life')
+    state.life = [int(life.get('player', STARTING_LIFE)), int(life.get('opponent', STARTING_LIFE))]
+    mana = section('mana')
+    state.mana = [int(mana.get('player', 0)), int(mana.get('opponent', 0))]
+    blocks = section('guard_blocks')
+    state.guard_blocks = (lane_blocks(blocks.get('player', [0] * LANES)) +
+                          lane_blocks(blocks.get('opponent', [0] * LANES)))
+    return state
+
+
+class MonteCarloPlanner:
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self._lock = threading.Lock()
+        self._pool = None
+        self._version = None
+        self._table = None
+        # pool -> moves being planned on it; a pool replaced by a new catalog
+        # version is shut down once its count drops to zero
+        self._users = {}
+
+    def table_for(self, version, cards):
+        """The CardTable for a catalog version, rebuilt when the version changes."""
+        with self._lock:
+            if self._table is None or self._table[0] != version:
+                self._table = (version, CardTable.from_cards(cards))
+            return self._table[1]
+
+    def _acquire_pool(self, version, table):
+        with self._lock:
+            if self._pool is None or version != self._version:
+                retired = self._pool
+                rows = [
+                    {'id': table.ids[i], 'name': table.names[i], 'power': table.power[i],
+                     'cost': table.cost[i], 'thief': table.thief[i], 'guard': table.guard[i],
+                     'curse': table.curse[i]}
+                    for i in range(len(table))
+                ]
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=_mp_context,
+                    initializer=_init_worker, initargs=(rows,)
+                )
+                self._version = version
+                self._users[self._pool] = 0
+                if retired is not None and not self._users.get(retired):
+                    self._users.pop(retired, None)
+                    retired.shutdown(wait=False, cancel_futures=True)
+            self._users[self._pool] += 1
+            return self._pool
+
+    def _release_pool(self, pool):
+        with self._lock:
+            self._users[pool] -= 1
+            if pool is not self._pool and not self._users[pool]:
+                del self._users[pool]
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    def warm_up(self, version, table, timeout=30.0):
+        """Start the pool for a catalog version and wait for its workers."""
+        pool = self._acquire_pool(version, table)
+        try:
+            # One task per worker; the pool starts a process for each one
+            # submitted while none is idle
+            futures = [pool.submit(_ready) for _ in range(self.workers)]
+            done, _ = wait(futures, timeout=timeout)
+        finally:
+            self._release_pool(pool)
+        return sum(1 for future in done if future.exception() is None and future.result())
+
+    def choose_move(self, state, table, version, budget_ms, turns_left=(PLACEMENT_TURNS, PLACEMENT_TURNS)):
+        """
+        Return ((hand position, lane) or None to pass, stats) within `budget_ms`.
+        stats always has `rollouts`, `win_rate` (None when no rollout ran) and
+        `elapsed_ms`.
+
+        Rollouts get 80% of the budget; the rest covers dispatch and collection.
+        If nothing finishes in time the move falls back to the random policy.
+        A new catalog version starts a new pool; the old one keeps serving the
+        moves already planned on it and is shut down after the last.
+        """
+        started = time.time()
+        moves = legal_placements(state, table, AI)
+        if not moves or turns_left[AI] <= 0:
+            return None, {'rollouts': 0, 'win_rate': None, 'elapsed_ms': 0.0}
+        moves.append(None)
+
+        pool = self._acquire_pool(version, table)
+        try:
+            deadline = started + budget_ms * 0.8 / 1000.0
+            seed = random.getrandbits(32)
+            futures = [
+                pool.submit(_run_rollouts, state, moves, turns_left, seed + chunk, deadline)
+                for chunk in range(self.workers)
+            ]
+            done, pending = wait(futures, timeout=max(0.0, started + budget_ms * 0.95 / 1000.0 - time.time()))
+            for future in pending:
+                future.cancel()
+        finally:
+            self._release_pool(pool)
+
+        totals = [0.0] * len(moves)
+        counts = [0] * len(moves)
+        errors = []
+        for future in done:
+            if future.exception() is not None:
+                errors.append(future.exception())
+                continue
+            chunk_totals, chunk_counts = future.result()
+            for index in range(len(moves)):
+                totals[index] += chunk_totals[index]
+                counts[index] += chunk_counts[index]
+
+        rollouts = sum(counts)
+        if not rollouts and errors:
+            # Every rollout failed: a bug, not a slow move, so let it surface
+            raise errors[0]
+        if rollouts:
+            best = max(range(len(moves)), key=lambda i: totals[i] / counts[i] if counts[i] else -1.0)
+            move = moves[best]
+            win_rate = totals[best] / counts[best]
+        else:
+            move = random_policy(state, table, AI, random)
+            win_rate = None
+
+        return move, {
+            'rollouts': rollouts,
+            'win_rate': win_rate,
+            'elapsed_ms': round((time.time() - started) * 1000.0, 2),
+        }
+
+
+def opponent_deck(cards, rng=random):
+    """
+    A balanced 20-card opponent deck: 8 cards costing up to 2, 7 costing up to
+    4 and 5 costing more, each drawn at random from the catalog and shuffled.
+    """
+    buckets = [[] for _ in OPPONENT_DECK_SHAPE]
+    for card in cards:
+        for index, (max_cost, _) in enumerate(OPPONENT_DECK_SHAPE):
+            if max_cost is None or card['cost'] <= max_cost:
+                buckets[index].append(card)
+                break
+
+    deck = []
+    for bucket, (_, count) in zip(buckets, OPPONENT_DECK_SHAPE):
+        if bucket:
+            deck.extend(rng.choice(bucket) for _ in range(count))
+    rng.shuffle(deck)
+    return deck
+
+
+planner = MonteCarloPlanner()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Vectorized batch battle simulator for balance analysis.
+
+Plays many matches at once with the rules from server/engine/rules.py. Every
+match's lanes, hands, life totals and guard counters live in NumPy arrays and
+each step resolves with array operations across all matches, so a balance pass
+over the whole catalog runs in seconds:
+
+    python -m server.engine.batch --matches 20000 --seed 7
+    python -m server.engine.batch --source db --json balance.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from server.engine.cards import CardTable
+from server.engine.rules import (
+    LANES,
+    STARTING_LIFE,
+    STARTING_MANA,
+    MAX_MANA,
+    HAND_SIZE,
+    PLACEMENT_TURNS,
+    GUARD_BLOCK_LIMIT,
+    MAX_ROUNDS,
+    DRAW,
+)
+
+DECK_SIZE = 20
+
+
+class BatchSimulator:
+    """Simulates `matches` games between random decks drawn from a CardTable."""
+
+    def __init__(self, table, matches, deck_size=DECK_SIZE, seed=None):
+        self.table = table
+        self.matches = matches
+        self.deck_size = min(deck_size, len(table))
+        self.rng = np.random.default_rng(seed)
+
+        # Append a sentinel card (index -1) with no stats so empty slots can be
+        # looked up without masking every access.
+        self.power = np.append(np.asarray(table.power, dtype=np.int32), 0)
+        self.cost = np.append(np.asarray(table.cost, dtype=np.int32), np.iinfo(np.int32).max)
+        self.thief = np.append(np.asarray(table.thief, dtype=bool), False)
+        self.guard = np.append(np.asarray(table.guard, dtype=bool), False)
+        self.curse = np.append(np.asarray(table.curse, dtype=bool), False)
+
+        card_count = len(table)
+        self.card_games = np.zeros(card_count, dtype=np.int64)
+        self.card_wins = np.zeros(card_count, dtype=np.int64)
+        self.card_damage = np.zeros(card_count, dtype=np.int64)
+        self.card_plays = np.zeros(card_count, dtype=np.int64)
+
+    def _deal_decks(self):
+        # Each side gets `deck_size` distinct cards in a random order
+        keys = self.rng.random((self.matches, 2, len(self.table)))
+        return np.argsort(keys, axis=-1)[..., :self.deck_size].astype(np.int32)
+
+    def run(self, decks=None):
+        """Play every match; returns each one's winner (0, 1 or DRAW).
+
+        `decks` fixes the cards of each match as a (matches, 2, deck size)
+        array of card indexes, shuffled before play as play_match does. By
+        default every side is dealt a random deck.
+        """
+        n = self.matches
+        rows = np.arange(n)
+        if decks is None:
+            decks = self._deal_decks()
+        else:
+            decks = self.rng.permuted(np.asarray(decks, dtype=np.int32), axis=-1)
+        deck_size = decks.shape[-1]
+
+        lanes = np.full((n, 2, LANES), -1, dtype=np.int32)
+        blocks = np.zeros((n, 2, LANES), dtype=np.int32)
+        hands = np.full((n, 2, HAND_SIZE), -1, dtype=np.int32)
+        life = np.full((n, 2), STARTING_LIFE, dtype=np.int32)
+        mana = np.zeros((n, 2), dtype=np.int32)
+        winner = np.full(n, -2, dtype=np.int32)
+        first = self.rng.integers(0, 2, n)
+        drawn = 0
+
+        for round_number in range(1, MAX_ROUNDS + 1):
+            active = winner == -2
+            if not active.any():
+                break
+
+            if drawn >= deck_size:
+                self._finish_on_life(life, winner, active)
+                break
+
+            # Deal a fresh hand from the next cards of each (shuffled) deck
+            take = min(HAND_SIZE, deck_size - drawn)
+            hands[:] = -1
+            hands[:, :, :take] = decks[:, :, drawn:drawn + take]
+            drawn += take
+            mana[:] = min(MAX_MANA, STARTING_MANA + round_number - 1)
+
+            for _ in range(PLACEMENT_TURNS):
+                for order in (0, 1):
+                    side = first if order == 0 else 1 - first
+                    self._place_random(rows, side, active, lanes, blocks, hands, mana)
+
+            for order in (0, 1):
+                attacker = first if order == 0 else 1 - first
+                self._attack(rows, attacker, winner == -2, lanes, blocks, life, winner)
+
+            first = self.rng.integers(0, 2, n)
+
+        self._finish_on_life(life, winner, winner == -2)
+        self._record_results(decks, winner)
+        return winner
+
+    def _place_random(self, rows, side, active, lanes, blocks, hands, mana):
+        hand = hands[rows, side]
+        side_mana = mana[rows, side]
+        affordable = (hand >= 0) & (self.cost[hand] <= side_mana[:, None])
+        side_lanes = lanes[rows, side]
+        open_lanes = side_lanes < 0
+
+        can_play = active & affordable.any(axis=1) & open_lanes.any(axis=1)
+        if not can_play.any():
+            return
+
+        # Random choice among valid options: argmax of masked uniform noise
+        hand_pick = np.argmax(np.where(affordable, self.rng.random(affordable.shape), -1.0), axis=1)
+        lane_pick = np.argmax(np.where(open_lanes, self.rng.random(open_lanes.shape), -1.0), axis=1)
+
+        play_rows = rows[can_play]
+        play_side = side[can_play]
+        play_hand = hand_pick[can_play]
+        play_lane = lane_pick[can_play]
+        card = hands[play_rows, play_side, play_hand]
+
+        lanes[play_rows, play_side, play_lane] = card
+        blocks[play_rows, play_side, play_lane] = 0
+        hands[play_rows, play_side, play_hand] = -1
+        mana[play_rows, play_side] -= self.cost[card]
+        np.add.at(self.card_plays, card, 1)
+
+    def _attack(self, rows, attacker, active, lanes, blocks, life, winner):
+        defender = 1 - attacker
+        power, thief, guard, curse = self.power, self.thief, self.guard, self.curse
+
+        own = lanes[rows, attacker]
+        opp = lanes[rows, defender]
+        own_blocks = blocks[rows, attacker]
+        opp_blocks = blocks[rows, defender]
+        damage = np.zeros(len(rows), dtype=np.int32)
+        backlash = np.zeros(len(rows), dtype=np.int32)
+
+        for lane in range(LANES):
+            card = own[:, lane].copy()
+            opposing = opp[:, lane].copy()
+            present = active & (card >= 0)
+            acting = present & ~(guard[card] & (opposing >= 0))
+            card_power = power[card]
+
+            # Thieves: find the blocking guard (same lane, then left, then right)
+            is_thief = acting & thief[card]
+            blocker = np.full(len(rows), -1, dtype=np.int32)
+            for target in (lane, lane - 1, lane + 1):
+                if 0 <= target < LANES:
+                    candidate = opp[:, target]
+                    can_block = (candidate >= 0) & guard[candidate] & (opp_blocks[:, target] < GUARD_BLOCK_LIMIT)
+                    blocker = np.where((blocker < 0) & can_block, target, blocker)
+
+            bypass = is_thief & (blocker < 0)
+            damage += np.where(bypass, card_power, 0)
+            self._credit(card, bypass, card_power)
+
+            blocked = np.flatnonzero(is_thief & (blocker >= 0))
+            if blocked.size:
+                guard_lane = blocker[blocked]
+                opp_blocks[blocked, guard_lane] += 1
+                guard_power = power[opp[blocked, guard_lane]]
+                thief_dies = card_power[blocked] <= guard_power
+                dead = blocked[thief_dies]
+                own[dead, lane] = -1
+                own_blocks[dead, lane] = 0
+                cursed = dead[curse[card[dead]]]
+                damage[cursed] += card_power[cursed]
+                np.add.at(self.card_damage, card[cursed], card_power[cursed])
+                retired = blocked[opp_blocks[blocked, guard_lane] >= GUARD_BLOCK_LIMIT]
+                retired_lane = blocker[retired]
+                opp[retired, retired_lane] = -1
+                opp_blocks[retired, retired_lane] = 0
+
+            fighter = acting & ~thief[card]
+            direct = fighter & (opposing < 0)
+            damage += np.where(direct, card_power, 0)
+            self._credit(card, direct, card_power)
+
+            clash = fighter & (opposing >= 0)
+            opposing_power = power[opposing]
+            defender_dies = clash & (card_power >= opposing_power)
+            attacker_dies = clash & (card_power <= opposing_power)
+
+            defender_curse = defender_dies & curse[opposing]
+            backlash += np.where(defender_curse, opposing_power, 0)
+            self._credit(opposing, defender_curse, opposing_power)
+            attacker_curse = attacker_dies & curse[card]
+            damage += np.where(attacker_curse, card_power, 0)
+            self._credit(card, attacker_curse, card_power)
+
+            opp[defender_dies, lane] = -1
+            opp_blocks[defender_dies, lane] = 0
+            own[attacker_dies, lane] = -1
+            own_blocks[attacker_dies, lane] = 0
+
+        lanes[rows, attacker] = own
+        lanes[rows, defender] = opp
+        blocks[rows, attacker] = own_blocks
+        blocks[rows, defender] = opp_blocks
+
+        defender_life = np.maximum(0, life[rows, defender] - damage)
+        attacker_life = np.maximum(0, life[rows, attacker] - backlash)
+        life[rows, defender] = np.where(active, defender_life, life[rows, defender])
+        life[rows, attacker] = np.where(active, attacker_life, life[rows, attacker])
+
+        defender_out = active & (defender_life == 0)
+        attacker_out = active & (attacker_life == 0)
+        winner[defender_out & attacker_out] = DRAW
+        winner[defender_out & ~attacker_out] = attacker[defender_out & ~attacker_out]
+        winner[attacker_out & ~defender_out] = defender[attacker_out & ~defender_out]
+
+    def _credit(self, card, mask, amount):
+        if mask.any():
+            np.add.at(self.card_damage, card[mask], amount[mask])
+
+    def _finish_on_life(self, life, winner, active):
+        if not active.any():
+            return
+        winner[active & (life[:, 0] > life[:, 1])] = 0
+        winner[active & (life[:, 1] > life[:, 0])] = 1
+        winner[active & (life[:, 0] == life[:, 1])] = DRAW
+
+    def _record_results(self, decks, winner):
+        for side in (0, 1):
+            cards = decks[:, side].ravel()
+            np.add.at(self.card_games, cards, 1)
+            won = decks[winner == side, side].ravel()
+            np.add.at(self.card_wins, won, 1)
+
+    def card_stats(self):
+        table = self.table
+        games = np.maximum(self.card_games, 1)
+        stats = []
+        for index in range(len(table)):
+            stats.append({
+                'card_id': table.ids[index],
+                'name': table.names[index],
+                'cost': table.cost[index],
+                'power': table.power[index],
+                'games': int(self.card_games[index]),
+                'win_rate': round(float(self.card_wins[index] / games[index]), 4),
+                'plays': int(self.card_plays[index]),
+                'damage': int(self.card_damage[index]),
+                'damage_per_game': round(float(self.card_damage[index] / games[index]), 3),
+            })
+        return stats
+
+
+def load_table(source, path=None):
+    if source == 'db':
+        from server.app import app
+        with app.app_context():
+            return CardTable.from_db()
+    return CardTable.from_json(path) if path else CardTable.from_json()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Batch battle simulator for card balance analysis')
+    parser.add_argument('--matches', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--deck-size', type=int, default=DECK_SIZE)
+    parser.add_argument('--source', choices=('json', 'db'), default='json')
+    parser.add_argument('--cards-json', default=None, help='cards file when --source=json')
+    parser.add_argument('--sort', choices=('win_rate', 'damage_per_game'), default='win_rate')
+    parser.add_argument('--top', type=int, default=0, help='only print the first N rows')
+    parser.add_argument('--json', dest='json_path', default=None, help='write full stats to this file')
+    args = parser.parse_args(argv)
+
+    table = load_table(args.source, args.cards_json)
+    simulator = BatchSimulator(table, args.matches, args.deck_size, args.seed)
+
+    started = time.perf_counter()
+    winner = simulator.run()
+    elapsed = time.perf_counter() - started
+
+    stats = sorted(simulator.card_stats(), key=lambda row: row[args.sort], reverse=True)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'matches': args.matches, 'seed': args.seed, 'cards': stats}, f, indent=2)
+
+    print(f"Simulated {args.matches} matches in {elapsed:.2f}s "
+          f"({args.matches / elapsed:.0f} matches/s)")
+    print(f"Side 0 wins: {int((winner == 0).sum())}, side 1 wins: {int((winner == 1).sum())}, "
+          f"draws: {int((winner == DRAW).sum())}")
+    print(f"{'card':<24}{'cost':>5}{'power':>6}{'games':>8}{'win%':>8}{'dmg/game':>10}")
+    for row in stats[:args.top or None]:
+        print(f"{row['name']:<24}{row['cost']:>5}{row['power']:>6}{row['games']:>8}"
+              f"{row['win_rate'] * 100:>7.1f}%{row['damage_per_game']:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+import json
+import os
+
+
+DEFAULT_CARDS_JSON = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'cards.json'
+)
+
+
+class CardTable:
+    """
+    Card stats stored as parallel lists indexed by a dense card index.
+
+    The engine only ever refers to cards by that index; `ids` maps it back to
+    the `Card.id` primary key and `index_of` maps a card id to its index.
+    """
+
+    __slots__ = ('ids', 'names', 'power', 'cost', 'thief', 'guard', 'curse', 'index_of')
+
+    def __init__(self, rows):
+        self.ids = []
+        self.names = []
+        self.power = []
+        self.cost = []
+        self.thief = []
+        self.guard = []
+        self.curse = []
+        for row in rows:
+            self.ids.append(row['id'])
+            self.names.append(row['name'])
+            # The client treats a missing power as 1
+            self.power.append(row['power'] or 1)
+            self.cost.append(row['cost'])
+            self.thief.append(bool(row.get('thief')))
+            self.guard.append(bool(row.get('guard')))
+            self.curse.append(bool(row.get('curse')))
+        self.index_of = {card_id: index for index, card_id in enumerate(self.ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_cards(cls, cards):
+        """Build from `Card` model instances or their `to_dict()` output."""
+        rows = []
+        for card in cards:
+            if not isinstance(card, dict):
+                card = {
+                    'id': card.id,
+                    'name': card.name,
+                    'power': card.power,
+                    'cost': card.cost,
+                    'thief': card.thief,
+                    'guard': card.guard,
+                    'curse': card.curse,
+                }
+            rows.append(card)
+        return cls(rows)
+
+    @classmethod
+    def from_db(cls):
+        """Load from the `cards` table. Requires an app context."""
+        from server.models import Card
+        return cls.from_cards(Card.query.order_by(Card.id).all())
+
+    @classmethod
+    def from_json(cls, path=DEFAULT_CARDS_JSON):
+        """Load from the seed file; ids follow file order as seed.py assigns them."""
+        with open(path) as f:
+            cards_data = json.load(f)
+        return cls([dict(card, id=position + 1) for position, card in enumerate(cards_data)])
+
+    def deck_from_card_ids(self, card_ids):
+        return [self.index_of[card_id] for card_id in card_ids]
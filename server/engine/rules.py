@@ -0,0 +1,257 @@
+import random
+
+from server.engine.state import GameState, EMPTY
+
+
+LANES = 3
+STARTING_LIFE = 100
+STARTING_MANA = 4
+MAX_MANA = 10
+HAND_SIZE = 3
+PLACEMENT_TURNS = 3
+GUARD_BLOCK_LIMIT = 3
+MAX_ROUNDS = 30
+
+DRAW = -1
+
+# Indexes into GameState.stats[side]
+THIEF_DAMAGE = 0
+GUARD_BLOCKS = 1
+CURSE_DAMAGE = 2
+
+
+def new_game(table, deck_a, deck_b, rng=None, first=None):
+    """Start a match between two decks given as lists of card indexes."""
+    rng = rng or random
+    decks = [list(deck_a), list(deck_b)]
+    rng.shuffle(decks[0])
+    rng.shuffle(decks[1])
+    if first is None:
+        first = 0 if rng.random() < 0.5 else 1
+    return GameState(STARTING_LIFE, STARTING_MANA, decks, first)
+
+
+def start_round(state, retain=(None, None)):
+    """
+    Begin a new round: refresh mana and deal a new hand to each side.
+
+    Unplayed cards are discarded as in the client, except for an optional
+    retained card given as a hand position per side. When neither side has a
+    card left to draw the match ends and the side with more life wins.
+    """
+    if not state.decks[0] and not state.decks[1]:
+        _finish_on_life(state)
+        return
+
+    state.round += 1
+    mana = min(MAX_MANA, STARTING_MANA + state.round - 1)
+    state.mana[0] = mana
+    state.mana[1] = mana
+
+    for side in (0, 1):
+        hand = state.hands[side]
+        kept = [hand[retain[side]]] if retain[side] is not None and retain[side] < len(hand) else []
+        deck = state.decks[side]
+        while len(kept) < HAND_SIZE and deck:
+            kept.append(deck.pop())
+        state.hands[side] = kept
+
+
+def legal_placements(state, table, side):
+    """All (hand position, lane) pairs the side can currently play."""
+    base = side * LANES
+    open_lanes = [lane for lane in range(LANES) if state.lanes[base + lane] == EMPTY]
+    if not open_lanes:
+        return []
+    mana = state.mana[side]
+    cost = table.cost
+    return [
+        (position, lane)
+        for position, card in enumerate(state.hands[side])
+        if cost[card] <= mana
+        for lane in open_lanes
+    ]
+
+
+def place_card(state, table, side, hand_position, lane):
+    hand = state.hands[side]
+    if not 0 <= hand_position < len(hand):
+        raise ValueError("Card is not in hand")
+    if not 0 <= lane < LANES:
+        raise ValueError("Invalid lane")
+
+    slot = side * LANES + lane
+    if state.lanes[slot] != EMPTY:
+        raise ValueError("Lane is already occupied")
+
+    card = hand[hand_position]
+    if table.cost[card] > state.mana[side]:
+        raise ValueError("Not enough mana")
+
+    del hand[hand_position]
+    state.mana[side] -= table.cost[card]
+    state.lanes[slot] = card
+    state.guard_blocks[slot] = 0
+
+
+def _blocking_guard(state, table, defender_base, lane):
+    # The guard in the same lane blocks first, then the left and right ones
+    lanes = state.lanes
+    guard = table.guard
+    blocks = state.guard_blocks
+    for target in (lane, lane - 1, lane + 1):
+        if 0 <= target < LANES:
+            slot = defender_base + target
+            card = lanes[slot]
+            if card != EMPTY and guard[card] and blocks[slot] < GUARD_BLOCK_LIMIT:
+                return slot
+    return -1
+
+
+def resolve_attack(state, table, attacker):
+    """
+    Resolve one side's attack across all lanes.
+
+    - Guards only attack an empty opposing lane.
+    - Thieves bypass the opposing card and hit life directly unless a guard in
+      the same or an adjacent lane blocks them. A block destroys the thief if
+      its power does not exceed the guard's; a guard retires after
+      GUARD_BLOCK_LIMIT blocks.
+    - Other cards hit life when the opposing lane is empty, otherwise the higher
+      power destroys the lower and equal power destroys both.
+    - A destroyed curse card deals its power to the opposing player.
+    """
+    if state.winner is not None:
+        return
+
+    defender = 1 - attacker
+    attacker_base = attacker * LANES
+    defender_base = defender * LANES
+    lanes = state.lanes
+    blocks = state.guard_blocks
+    power = table.power
+    thief = table.thief
+    guard = table.guard
+    curse = table.curse
+    attacker_stats = state.stats[attacker]
+    defender_stats = state.stats[defender]
+
+    damage = 0
+    backlash = 0
+
+    for lane in range(LANES):
+        slot = attacker_base + lane
+        card = lanes[slot]
+        if card == EMPTY:
+            continue
+        opposing_slot = defender_base + lane
+        opposing = lanes[opposing_slot]
+
+        if guard[card] and opposing != EMPTY:
+            continue
+
+        if thief[card]:
+            blocker = _blocking_guard(state, table, defender_base, lane)
+            if blocker < 0:
+                damage += power[card]
+                attacker_stats[THIEF_DAMAGE] += power[card]
+                continue
+
+            blocks[blocker] += 1
+            defender_stats[GUARD_BLOCKS] += 1
+            if power[card] <= power[lanes[blocker]]:
+                lanes[slot] = EMPTY
+                blocks[slot] = 0
+                if curse[card]:
+                    damage += power[card]
+                    attacker_stats[CURSE_DAMAGE] += power[card]
+            if blocks[blocker] >= GUARD_BLOCK_LIMIT:
+                lanes[blocker] = EMPTY
+                blocks[blocker] = 0
+            continue
+
+        if opposing == EMPTY:
+            damage += power[card]
+            continue
+
+        attack_power = power[card]
+        defense_power = power[opposing]
+        if attack_power >= defense_power:
+            lanes[opposing_slot] = EMPTY
+            blocks[opposing_slot] = 0
+            if curse[opposing]:
+                backlash += defense_power
+                defender_stats[CURSE_DAMAGE] += defense_power
+        if attack_power <= defense_power:
+            lanes[slot] = EMPTY
+            blocks[slot] = 0
+            if curse[card]:
+                damage += attack_power
+                attacker_stats[CURSE_DAMAGE] += attack_power
+
+    life = state.life
+    life[defender] = max(0, life[defender] - damage)
+    life[attacker] = max(0, life[attacker] - backlash)
+
+    if life[defender] == 0 and life[attacker] == 0:
+        state.winner = DRAW
+    elif life[defender] == 0:
+        state.winner = attacker
+    elif life[attacker] == 0:
+        state.winner = defender
+
+
+def resolve_battle(state, table):
+    """Both sides attack, the side that placed first attacking first."""
+    resolve_attack(state, table, state.first)
+    resolve_attack(state, table, 1 - state.first)
+
+
+def _finish_on_life(state):
+    if state.life[0] == state.life[1]:
+        state.winner = DRAW
+    else:
+        state.winner = 0 if state.life[0] > state.life[1] else 1
+
+
+def random_policy(state, table, side, rng):
+    """The client AI: a random affordable card in a random empty lane."""
+    moves = legal_placements(state, table, side)
+    if not moves:
+        return None
+    return rng.choice(moves)
+
+
+def play_round(state, table, policies, rng=None):
+    """
+    Play one full round: deal, alternate placement turns, then battle.
+
+    A policy is called as `policy(state, table, side, rng)` and returns a
+    (hand position, lane) pair or None to pass.
+    """
+    rng = rng or random
+    start_round(state)
+    if state.winner is not None:
+        return
+
+    order = (state.first, 1 - state.first)
+    for _ in range(PLACEMENT_TURNS):
+        for side in order:
+            move = policies[side](state, table, side, rng)
+            if move is not None:
+                place_card(state, table, side, move[0], move[1])
+
+    resolve_battle(state, table)
+    if state.winner is None and state.round >= MAX_ROUNDS:
+        _finish_on_life(state)
+    else:
+        state.first = 0 if rng.random() < 0.5 else 1
+
+
+def play_match(table, deck_a, deck_b, policies=(random_policy, random_policy), rng=None):
+    """Play a match to completion and return the final state."""
+    rng = rng or random.Random()
+    state = new_game(table, deck_a, deck_b, rng)
+    while state.winner is None:
+        play_round(state, table, policies, rng)
+    return state
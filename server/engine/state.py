@@ -0,0 +1,64 @@
+EMPTY = -1
+
+
+class GameState:
+    """
+    Compact state of a two-player match.
+
+    Sides are 0 and 1. Lane slots are flattened into lists of length 6 where
+    slot `side * 3 + lane` holds a card index into the `CardTable` or `EMPTY`.
+    `guard_blocks` counts blocks made by the card currently in each slot.
+    Per-side stats are kept as [thief_damage, guard_blocks, curse_damage].
+    """
+
+    __slots__ = (
+        'life', 'mana', 'lanes', 'guard_blocks', 'hands', 'decks',
+        'round', 'first', 'stats', 'winner',
+    )
+
+    def __init__(self, life, mana, decks, first=0):
+        self.life = [life, life]
+        self.mana = [mana, mana]
+        self.lanes = [EMPTY] * 6
+        self.guard_blocks = [0] * 6
+        self.hands = [[], []]
+        self.decks = [list(decks[0]), list(decks[1])]
+        self.round = 0
+        self.first = first
+        self.stats = [[0, 0, 0], [0, 0, 0]]
+        self.winner = None
+
+    def copy(self):
+        clone = GameState.__new__(GameState)
+        clone.life = self.life[:]
+        clone.mana = self.mana[:]
+        clone.lanes = self.lanes[:]
+        clone.guard_blocks = self.guard_blocks[:]
+        clone.hands = [self.hands[0][:], self.hands[1][:]]
+        clone.decks = [self.decks[0][:], self.decks[1][:]]
+        clone.round = self.round
+        clone.first = self.first
+        clone.stats = [self.stats[0][:], self.stats[1][:]]
+        clone.winner = self.winner
+        return clone
+
+    @property
+    def is_over(self):
+        return self.winner is not None
+
+    def to_dict(self):
+        return {
+            'life': self.life[:],
+            'mana': self.mana[:],
+            'lanes': [self.lanes[0:3], self.lanes[3:6]],
+            'guard_blocks': [self.guard_blocks[0:3], self.guard_blocks[3:6]],
+            'hands': [self.hands[0][:], self.hands[1][:]],
+            'deck_sizes': [len(self.decks[0]), len(self.decks[1])],
+            'round': self.round,
+            'first': self.first,
+            'stats': [
+                {'thief_damage': s[0], 'guard_blocks': s[1], 'curse_damage': s[2]}
+                for s in self.stats
+            ],
+            'winner': self.winner,
+        }
@@ -0,0 +1,268 @@
+"""
+Per-user event streams delivered as Server-Sent Events.
+
+Resources publish small JSON events to a user after committing (a friend
+request arriving, one being answered) and GET /users/<id>/events streams them
+to each of that user's open pages. A connected client that is doing nothing
+costs a queue and no database work, instead of a poll every few seconds.
+
+Publishing goes through a broker. The default delivers to subscribers in this
+process, which is all a single worker needs. With several workers or hosts,
+set EVENTS_REDIS_URL (and `pip install redis`): every event is then relayed
+through one Redis pub/sub channel, so a stream held by one worker sees events
+published by another.
+
+Under gunicorn each WSGI stream holds a thread for up to `max_stream_seconds`,
+so at most `max_blocking` are open per process; the browser's EventSource
+reconnects when a stream ends. The ASGI app (server.asgi) streams from an
+asyncio queue instead and holds no thread. A subscriber that falls
+`queue_size` events behind is closed, and the client refetches on reconnect.
+"""
+
+import asyncio
+import json
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from server.representations import dumps
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger('mythos.events')
+
+CHANNEL = 'mythos:events'
+
+# Sent first on every stream: how long EventSource waits before reconnecting
+RETRY_MS = 3000
+
+
+class EventHubFull(Exception):
+    """Raised when this process already holds `max_blocking` WSGI streams."""
+
+
+def format_event(event, data):
+    """One SSE frame; compact JSON never contains a newline."""
+    return b'event: ' + event.encode('utf-8') + b'\ndata: ' + dumps(data) + b'\n\n'
+
+
+class Subscription:
+    """A stream read by a WSGI worker thread."""
+
+    blocking = True
+
+    def __init__(self, hub, user_id, queue_size):
+        self.hub = hub
+        self.user_id = user_id
+        self.closed = False
+        self._queue = queue.Queue(queue_size)
+
+    def put(self, item):
+        """Queue an (event, data) pair; False when the reader is too far behind."""
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            return False
+
+    def get(self, timeout):
+        """The next (event, data), or None after `timeout` seconds."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+    def stream(self, keepalive, max_seconds):
+        """SSE frames until `max_seconds` pass, the client goes or we close."""
+        deadline = time.monotonic() + max_seconds
+        try:
+            yield f'retry: {RETRY_MS}\n\n'.encode('ascii')
+            while not self.closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                item = self.get(min(keepalive, remaining))
+                # A comment line keeps proxies from timing the stream out and
+                # surfaces a gone client as a write error
+                yield b': keep-alive\n\n' if item is None else format_event(*item)
+        finally:
+            self.close()
+
+
+class AsyncSubscription(Subscription):
+    """A stream read by a coroutine on `loop`; puts may come from any thread."""
+
+    blocking = False
+
+    def __init__(self, hub, user_id, queue_size, loop):
+        super().__init__(hub, user_id, queue_size)
+        self._loop = loop
+        self._queue = asyncio.Queue(queue_size)
+        # Tracked here because the asyncio queue is only filled on the loop
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+
+    def put(self, item):
+        with self._pending_lock:
+            if self._pending >= self._queue.maxsize:
+                return False
+            self._pending += 1
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+        except RuntimeError:
+            # The loop is closed, so the reader is gone
+            return False
+        return True
+
+    async def get(self, timeout):
+        try:
+            item = await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        with self._pending_lock:
+            self._pending -= 1
+        return item
+
+    async def stream(self, keepalive, max_seconds):
+        deadline = time.monotonic() + max_seconds
+        try:
+            yield f'retry: {RETRY_MS}\n\n'.encode('ascii')
+            while not self.closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                item = await self.get(min(keepalive, remaining))
+                yield b': keep-alive\n\n' if item is None else format_event(*item)
+        finally:
+            self.close()
+
+
+class LocalBroker:
+    """Delivers to this process's subscribers only."""
+
+    def __init__(self, deliver):
+        self.deliver = deliver
+
+    def publish(self, user_id, event, data):
+        self.deliver(user_id, event, data)
+
+    def start(self):
+        pass
+
+
+class RedisBroker:
+    """Relays every event through a Redis channel that each process listens on."""
+
+    def __init__(self, deliver, url, channel=CHANNEL):
+        if redis is None:
+            raise RuntimeError("EVENTS_REDIS_URL is set but the redis package is not installed")
+        self.deliver = deliver
+        self.channel = channel
+        self.client = redis.Redis.from_url(url)
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def publish(self, user_id, event, data):
+        self.client.publish(self.channel, dumps({'user_id': user_id, 'event': event, 'data': data}))
+
+    def start(self):
+        # Started on first subscribe, so gunicorn's fork happens before the thread
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='events-redis', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    payload = json.loads(message['data'])
+                    self.deliver(payload['user_id'], payload['event'], payload['data'])
+            except redis.RedisError:
+                logger.warning('Lost the Redis event channel, reconnecting', exc_info=True)
+                time.sleep(1.0)
+
+
+class EventHub:
+    def __init__(self, queue_size=100, max_blocking=8):
+        self.queue_size = queue_size
+        self.max_blocking = max_blocking
+        self._lock = threading.Lock()
+        # user_id -> that user's open subscriptions in this process
+        self._subscribers = defaultdict(set)
+        self._blocking = 0
+        self.broker = LocalBroker(self.deliver)
+
+    def configure(self, redis_url=None, queue_size=100, max_blocking=8):
+        self.queue_size = queue_size
+        self.max_blocking = max_blocking
+        self.broker = RedisBroker(self.deliver, redis_url) if redis_url else LocalBroker(self.deliver)
+
+    def _add(self, subscription):
+        with self._lock:
+            if subscription.blocking:
+                if self._blocking >= self.max_blocking:
+                    raise EventHubFull()
+                self._blocking += 1
+            self._subscribers[subscription.user_id].add(subscription)
+        self.broker.start()
+        return subscription
+
+    def subscribe(self, user_id):
+        """A stream for a WSGI thread. Raises EventHubFull at `max_blocking`."""
+        return self._add(Subscription(self, user_id, self.queue_size))
+
+    def subscribe_async(self, user_id, loop):
+        return self._add(AsyncSubscription(self, user_id, self.queue_size, loop))
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription.closed:
+                return
+            subscription.closed = True
+            if subscription.blocking:
+                self._blocking -= 1
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def subscriber_count(self, user_id=None):
+        with self._lock:
+            if user_id is None:
+                return sum(len(subscribers) for subscribers in self._subscribers.values())
+            return len(self._subscribers.get(user_id, ()))
+
+    def deliver(self, user_id, event, data):
+        """Hand an event to this process's subscribers for `user_id`."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            if not subscription.put((event, data)):
+                # Too far behind: end the stream, the client reconnects and refetches
+                self.unsubscribe(subscription)
+
+    def publish(self, user_id, event, data):
+        """Send an event to every stream `user_id` has open, in any process.
+
+        Called after the change is committed; a broker failure is logged
+        rather than failing the request that made the change.
+        """
+        try:
+            self.broker.publish(user_id, event, data)
+        except Exception:
+            logger.warning('Could not publish %s to user %s', event, user_id, exc_info=True)
+
+
+event_hub = EventHub()
@@ -0,0 +1,168 @@
+"""
+In-process cache of the friend graph.
+
+Each user's friends are held as a set of ids, loaded from friend_relationships
+on first use, so "are these two friends" is a set lookup and mutual friends are
+a set intersection instead of a join over the association table. The same ids
+are also kept as a NumPy array, which friend-of-friend suggestions count with
+np.unique: a user with thousands of friends who each have thousands of friends
+is millions of candidates, too many for a dict of counts. The counts are
+indexed by position among the distinct candidates, so their size follows the
+friends-of-friends, not the largest user id.
+
+Friendships accepted in this process invalidate both users' entries at once.
+Entries also expire after `ttl` seconds, which picks up friendships written by
+other processes (other gunicorn workers, seed.py). The least recently used
+entries are dropped once more than `max_users` users are cached.
+
+Loads from the database run outside the lock. Every invalidation bumps a
+generation counter, and a load that started before one is returned to its
+caller but not cached, so a friend list read before a change is never stored
+after it.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from sqlalchemy import select
+
+from server.models import db, friend_relationships
+
+# Ids per IN clause when loading many users at once
+LOAD_CHUNK = 500
+
+# Friend lists concatenated per np.unique call when counting suggestions
+COUNT_CHUNK = 256
+
+
+class FriendGraph:
+    def __init__(self, ttl=30.0, max_users=100000):
+        self.ttl = ttl
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        # user_id -> (loaded_at, frozenset of friend ids, array of the same
+        # ids), least recently used first
+        self._adjacency = OrderedDict()
+        # Bumped by every invalidation; loads started under an older value
+        # are not cached
+        self._generation = 0
+
+    def invalidate(self, *user_ids):
+        with self._lock:
+            self._generation += 1
+            for user_id in user_ids:
+                self._adjacency.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._adjacency.clear()
+
+    def _cached(self, user_id, now):
+        entry = self._adjacency.get(user_id)
+        if entry is None or now - entry[0] >= self.ttl:
+            return None
+        self._adjacency.move_to_end(user_id)
+        return entry
+
+    def _store(self, loaded, generation):
+        with self._lock:
+            if generation != self._generation:
+                # Invalidated while loading: the rows may predate the change
+                return
+            for user_id, entry in loaded.items():
+                self._adjacency[user_id] = entry
+                self._adjacency.move_to_end(user_id)
+            while len(self._adjacency) > self.max_users:
+                self._adjacency.popitem(last=False)
+
+    def _load(self, user_ids, now):
+        """Entries for `user_ids` from the database, in chunked IN queries."""
+        found = {user_id: set() for user_id in user_ids}
+        ids = list(found)
+        for start in range(0, len(ids), LOAD_CHUNK):
+            rows = db.session.execute(
+                select(friend_relationships.c.user_id, friend_relationships.c.friend_id)
+                .where(friend_relationships.c.user_id.in_(ids[start:start + LOAD_CHUNK]))
+            )
+            for user_id, friend_id in rows:
+                found[user_id].add(friend_id)
+        return {
+            user_id: (now, frozenset(friends), np.fromiter(friends, dtype=np.int64, count=len(friends)))
+            for user_id, friends in found.items()
+        }
+
+    def _entries(self, user_ids):
+        now = time.monotonic()
+        result = {}
+        missing = []
+        with self._lock:
+            generation = self._generation
+            for user_id in user_ids:
+                entry = self._cached(user_id, now)
+                if entry is None:
+                    missing.append(user_id)
+                else:
+                    result[user_id] = entry
+        if missing:
+            loaded = self._load(missing, now)
+            self._store(loaded, generation)
+            result.update(loaded)
+        return result
+
+    def friends_of_many(self, user_ids):
+        """{user_id: frozenset of friend ids}, loading uncached users in bulk."""
+        return {user_id: entry[1] for user_id, entry in self._entries(user_ids).items()}
+
+    def friends_of(self, user_id):
+        return self.friends_of_many((user_id,))[user_id]
+
+    # Queries
+
+    def are_friends(self, user_id, other_id):
+        return other_id in self.friends_of(user_id)
+
+    def mutual(self, user_id, other_id):
+        """Sorted ids of the friends two users share."""
+        graph = self.friends_of_many((user_id, other_id))
+        # Set intersection iterates the smaller of the two
+        return sorted(graph[user_id] & graph[other_id])
+
+    def suggestions(self, user_id, limit=10, exclude=()):
+        """
+        [(user_id, mutual_count)] of friends-of-friends who are not friends
+        yet, most mutual friends first, then lowest id.
+
+        Friends' id arrays are concatenated a chunk at a time and counted with
+        np.unique, and the chunks' counts are merged by position among the
+        distinct candidates. Time and memory follow the number of
+        friends-of-friends, not the range of user ids.
+        """
+        friends = self.friends_of(user_id)
+        arrays = [entry[2] for entry in self._entries(friends).values() if len(entry[2])]
+        if not arrays:
+            return []
+
+        chunk_ids, chunk_counts = [], []
+        for start in range(0, len(arrays), COUNT_CHUNK):
+            ids, counts = np.unique(np.concatenate(arrays[start:start + COUNT_CHUNK]), return_counts=True)
+            chunk_ids.append(ids)
+            chunk_counts.append(counts)
+        candidates, position = np.unique(np.concatenate(chunk_ids), return_inverse=True)
+        counts = np.bincount(position, weights=np.concatenate(chunk_counts)).astype(np.int64)
+
+        excluded = np.fromiter(friends | {user_id} | set(exclude), dtype=np.int64)
+        keep = ~np.isin(candidates, excluded)
+        candidates, counts = candidates[keep], counts[keep]
+        if len(candidates) > limit:
+            # Keep every id tied with the limit-th count so ties break by id
+            threshold = np.partition(counts, len(counts) - limit)[len(counts) - limit]
+            tied = counts >= threshold
+            candidates, counts = candidates[tied], counts[tied]
+        ranked = sorted(zip((-counts).tolist(), candidates.tolist()))
+        return [(candidate, -negative) for negative, candidate in ranked[:limit]]
+
+
+friend_graph = FriendGraph()
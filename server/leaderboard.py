@@ -0,0 +1,242 @@
+"""
+In-memory leaderboard ranked by User.wins.
+
+A Fenwick tree over win counts answers "how many users have more than w wins"
+in O(log W), and each win count keeps a sorted bucket of user ids, so a user's
+rank, the top N and the users around any position need no ORDER BY over the
+users table. Users are ordered by wins (descending), then id; users with equal
+wins share a rank.
+
+The index is loaded from the database on first use. Writes made by this
+process update it directly. Changes made by other processes (other gunicorn
+workers, scripts) are picked up by re-reading rows whose updated_at moved,
+and the whole index is reloaded periodically to drop deleted users.
+"""
+
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import timedelta
+
+from sqlalchemy import func, select
+
+from server.models import db, User
+
+# Re-read rows updated this long before the last seen updated_at, to catch
+# transactions that committed after a later timestamp was already synced
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class FenwickTree:
+    """Counts per win value with O(log n) point updates and prefix sums."""
+
+    def __init__(self, size):
+        self.size = size
+        self.tree = [0] * (size + 1)
+
+    @classmethod
+    def from_counts(cls, counts, size):
+        tree = cls(size)
+        data = tree.tree
+        for index, count in enumerate(counts, 1):
+            data[index] += count
+        # Linear-time construction: push each node into its parent
+        for index in range(1, size + 1):
+            parent = index + (index & -index)
+            if parent <= size:
+                data[parent] += data[index]
+        return tree
+
+    def add(self, value, delta):
+        index = value + 1
+        while index <= self.size:
+            self.tree[index] += delta
+            index += index & -index
+
+    def prefix(self, value):
+        """Number of entries with a value <= `value`."""
+        index = min(value + 1, self.size)
+        total = 0
+        while index > 0:
+            total += self.tree[index]
+            index -= index & -index
+        return total
+
+    def find(self, k):
+        """Smallest value whose prefix count reaches `k` (1-based)."""
+        index = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            following = index + step
+            if following <= self.size and self.tree[following] < k:
+                index = following
+                k -= self.tree[following]
+            step >>= 1
+        return index
+
+
+class Leaderboard:
+    def __init__(self, sync_interval=5.0, rebuild_interval=600.0):
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self._lock = threading.RLock()
+        # Serializes database reloads; queries keep using the current index
+        self._refresh_lock = threading.Lock()
+        self._loaded = False
+        self._synced_at = 0.0
+        self._rebuilt_at = 0.0
+        self._mark = None
+        self.wins_of = {}
+        self.buckets = {}
+        self.tree = FenwickTree(64)
+
+    @property
+    def total(self):
+        return len(self.wins_of)
+
+    # Index maintenance
+
+    def load(self, rows):
+        """Replace the index with (user_id, wins) rows."""
+        wins_of = {}
+        buckets = {}
+        for user_id, wins in rows:
+            wins = wins or 0
+            wins_of[user_id] = wins
+            buckets.setdefault(wins, []).append(user_id)
+        for ids in buckets.values():
+            ids.sort()
+
+        size = 64
+        while buckets and max(buckets) >= size:
+            size *= 2
+        counts = [0] * size
+        for wins, ids in buckets.items():
+            counts[wins] = len(ids)
+
+        # Built outside the lock; queries see the old index until the swap
+        with self._lock:
+            self.wins_of = wins_of
+            self.buckets = buckets
+            self.tree = FenwickTree.from_counts(counts, size)
+            self._loaded = True
+
+    def _grow(self, wins):
+        size = self.tree.size
+        while wins >= size:
+            size *= 2
+        counts = [0] * size
+        for value, ids in self.buckets.items():
+            counts[value] = len(ids)
+        self.tree = FenwickTree.from_counts(counts, size)
+
+    def _remove(self, user_id):
+        wins = self.wins_of.pop(user_id, None)
+        if wins is None:
+            return
+        bucket = self.buckets[wins]
+        del bucket[bisect_left(bucket, user_id)]
+        if not bucket:
+            del self.buckets[wins]
+        self.tree.add(wins, -1)
+
+    def set_wins(self, user_id, wins):
+        """Record a user's current win count (adding the user if new)."""
+        wins = wins or 0
+        with self._lock:
+            if not self._loaded or self.wins_of.get(user_id) == wins:
+                return
+            self._remove(user_id)
+            if wins >= self.tree.size:
+                self._grow(wins)
+            self.wins_of[user_id] = wins
+            insort(self.buckets.setdefault(wins, []), user_id)
+            self.tree.add(wins, 1)
+
+    def remove(self, user_id):
+        with self._lock:
+            if self._loaded:
+                self._remove(user_id)
+
+    # Queries
+
+    def rank(self, user_id):
+        """(rank, 0-based position) of a user, or None if not ranked."""
+        with self._lock:
+            wins = self.wins_of.get(user_id)
+            if wins is None:
+                return None
+            above = self.total - self.tree.prefix(wins)
+            return above + 1, above + bisect_left(self.buckets[wins], user_id)
+
+    def entries(self, start, count):
+        """
+        [(rank, user_id, wins)] for `count` positions from `start`.
+
+        Each win count touched costs one O(log W) tree search; the ids inside
+        it are sliced directly.
+        """
+        result = []
+        with self._lock:
+            total = self.total
+            position = max(0, start)
+            end = min(total, position + count)
+            while position < end:
+                # The win value holding this position, counting from the top
+                wins = self.tree.find(total - position)
+                above = total - self.tree.prefix(wins)
+                bucket = self.buckets[wins]
+                offset = position - above
+                for user_id in bucket[offset:offset + end - position]:
+                    result.append((above + 1, user_id, wins))
+                position = above + len(bucket)
+        return result
+
+    def top(self, limit):
+        return self.entries(0, limit)
+
+    def around(self, user_id, neighbors):
+        """The user's entry with up to `neighbors` entries on each side."""
+        found = self.rank(user_id)
+        if found is None:
+            return None
+        position = found[1]
+        start = max(0, position - neighbors)
+        return self.entries(start, position - start + neighbors + 1)
+
+    # Database
+
+    def rebuild(self):
+        """Reload every user's wins from the database."""
+        mark = db.session.execute(select(func.max(User.updated_at))).scalar()
+        rows = db.session.execute(select(User.id, User.wins)).all()
+        self.load(rows)
+        self._mark = mark
+        self._rebuilt_at = self._synced_at = time.monotonic()
+
+    def sync(self):
+        """Apply rows updated by other processes since the last sync."""
+        if self._mark is None:
+            return self.rebuild()
+        rows = db.session.execute(
+            select(User.id, User.wins, User.updated_at)
+            .where(User.updated_at >= self._mark - SYNC_OVERLAP)
+        ).all()
+        for user_id, wins, updated_at in rows:
+            self.set_wins(user_id, wins)
+            if updated_at > self._mark:
+                self._mark = updated_at
+        self._synced_at = time.monotonic()
+
+    def refresh(self):
+        now = time.monotonic()
+        if self._loaded and now - self._synced_at < self.sync_interval:
+            return
+        with self._refresh_lock:
+            if not self._loaded or now - self._rebuilt_at >= self.rebuild_interval:
+                self.rebuild()
+            elif now - self._synced_at >= self.sync_interval:
+                self.sync()
+
+
+leaderboard = Leaderboard()
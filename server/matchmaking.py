@@ -0,0 +1,324 @@
+"""
+Rated matchmaking queue.
+
+Players join with a deck and are paired with the closest-rated waiting player
+within a rating gap that starts at `base_gap` and widens by `gap_per_second` of
+waiting, up to `max_gap`. Waiting players are kept in buckets `bucket_width`
+rating points wide, each a sorted list, so the closest opponent is found by
+bisecting the few buckets around a player's rating, nearest first, instead of
+scanning the queue.
+
+A player searches with their starting gap when they join. Waiting players
+search again as their gap widens: `sweep` revisits them oldest first, at most
+every `sweep_interval` seconds, and is triggered by queue requests (waiting
+clients poll their status) the way the leaderboard syncs. Pairings are held
+until a result is recorded or `pairing_ttl` seconds pass. A result is recorded
+once both players have reported the same winner, and the API only takes a
+player's report from their own session, so neither can claim a win alone;
+differing reports leave the pairing open for either to correct.
+
+The queue and the pending results live in this process. With several gunicorn
+workers or instances a player queued on one is invisible to the others, so
+matchmaking needs a single worker on a single instance; render.yaml pins both
+and scales with threads instead.
+
+Ratings are Elo, stored on User.rating.
+"""
+
+import math
+import threading
+import time
+import uuid
+from bisect import bisect_left, insort
+from collections import OrderedDict, namedtuple
+
+QueueEntry = namedtuple('QueueEntry', 'user_id username deck_id rating joined_at seq')
+
+# `players` is (longer waiting, other)
+Pairing = namedtuple('Pairing', 'match_id players paired_at')
+
+
+def elo_delta(winner_rating, loser_rating, k=32):
+    """Rating points the winner gains and the loser gives up."""
+    expected = 1.0 / (1.0 + 10.0 ** ((loser_rating - winner_rating) / 400.0))
+    return max(1, round(k * (1.0 - expected)))
+
+
+class MatchQueue:
+    def __init__(self, base_gap=50, gap_per_second=10.0, max_gap=400, bucket_width=25,
+                 sweep_interval=1.0, pairing_ttl=1800.0, notify=None):
+        self.base_gap = base_gap
+        self.gap_per_second = gap_per_second
+        self.max_gap = max_gap
+        self.bucket_width = bucket_width
+        self.sweep_interval = sweep_interval
+        self.pairing_ttl = pairing_ttl
+        # Called as notify(user_id, event, data) for both players of a pairing
+        self.notify = notify
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._swept_at = 0.0
+        # user_id -> QueueEntry, in join order
+        self._entries = OrderedDict()
+        # rating // bucket_width -> sorted [(rating, seq, user_id)]
+        self._buckets = {}
+        # match_id -> Pairing, oldest first; user_id -> their pending match_id
+        self._pairings = OrderedDict()
+        self._paired = {}
+        # match_id -> {reporting user_id: winner_id}; match_ids being recorded
+        self._reports = {}
+        self._settling = set()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def gap(self, waited):
+        return min(self.max_gap, self.base_gap + self.gap_per_second * waited)
+
+    def waited(self, entry, now=None):
+        return (time.monotonic() if now is None else now) - entry.joined_at
+
+    # Index of waiting players
+
+    def _index(self, entry):
+        key = entry.rating // self.bucket_width
+        insort(self._buckets.setdefault(key, []), (entry.rating, entry.seq, entry.user_id))
+
+    def _unindex(self, entry):
+        key = entry.rating // self.bucket_width
+        bucket = self._buckets[key]
+        del bucket[bisect_left(bucket, (entry.rating, entry.seq, entry.user_id))]
+        if not bucket:
+            del self._buckets[key]
+
+    def _closest_in(self, bucket, rating, user_id):
+        """The best (rating, seq, user_id) in one bucket, other than `user_id`."""
+        index = bisect_left(bucket, (rating,))
+        above = next((item for item in bucket[index:index + 2] if item[2] != user_id), None)
+        below = None
+        if index:
+            # The longest waiting player at the nearest lower rating
+            below = bucket[bisect_left(bucket, (bucket[index - 1][0],))]
+        if above is None or (below is not None and
+                             (rating - below[0], below[1]) < (above[0] - rating, above[1])):
+            return below
+        return above
+
+    def _closest(self, entry, gap):
+        """The closest waiting player within `gap`, longest waiting on ties."""
+        rating, width = entry.rating, self.bucket_width
+        home = rating // width
+        low = math.floor((rating - gap) / width)
+        high = math.floor((rating + gap) / width)
+        best = None
+        for step in range(max(home - low, high - home) + 1):
+            for key in ((home,) if step == 0 else (home - step, home + step)):
+                bucket = self._buckets.get(key) if low <= key <= high else None
+                if not bucket:
+                    continue
+                found = self._closest_in(bucket, rating, entry.user_id)
+                if found is not None and abs(found[0] - rating) <= gap and (
+                        best is None or (abs(found[0] - rating), found[1]) < (abs(best[0] - rating), best[1])):
+                    best = found
+            # Every rating in the buckets further out is more than step * width away
+            if best is not None and abs(best[0] - rating) <= step * width:
+                break
+        return best
+
+    # Queue operations, with the lock held
+
+    def _remove(self, entry):
+        del self._entries[entry.user_id]
+        self._unindex(entry)
+
+    def _match(self, entry, now):
+        found = self._closest(entry, self.gap(now - entry.joined_at))
+        if found is None:
+            return None
+        opponent = self._entries[found[2]]
+        self._remove(entry)
+        self._remove(opponent)
+        players = (entry, opponent) if entry.seq < opponent.seq else (opponent, entry)
+        pairing = Pairing(uuid.uuid4().hex, players, now)
+        self._pairings[pairing.match_id] = pairing
+        for player in players:
+            self._paired[player.user_id] = pairing.match_id
+        return pairing
+
+    def _drop_pairing(self, pairing):
+        del self._pairings[pairing.match_id]
+        self._reports.pop(pairing.match_id, None)
+        self._settling.discard(pairing.match_id)
+        for player in pairing.players:
+            if self._paired.get(player.user_id) == pairing.match_id:
+                del self._paired[player.user_id]
+
+    def _expire(self, now):
+        while self._pairings:
+            pairing = next(iter(self._pairings.values()))
+            if now - pairing.paired_at < self.pairing_ttl:
+                break
+            self._drop_pairing(pairing)
+
+    def _sweep(self, now):
+        self._swept_at = now
+        self._expire(now)
+        pairings = []
+        for user_id in list(self._entries):
+            entry = self._entries.get(user_id)
+            # Players paired earlier in this sweep are already gone
+            if entry is not None:
+                pairing = self._match(entry, now)
+                if pairing is not None:
+                    pairings.append(pairing)
+        return pairings
+
+    def _maybe_sweep(self, now):
+        return self._sweep(now) if now - self._swept_at >= self.sweep_interval else []
+
+    def _announce(self, pairings):
+        if self.notify is None:
+            return
+        for pairing in pairings:
+            for player in pairing.players:
+                self.notify(player.user_id, 'match_found', self.describe(pairing, player.user_id))
+
+    # Public API; `now` is time.monotonic() unless given (the simulator's clock)
+
+    def join(self, user_id, username, deck_id, rating, now=None):
+        """Queue a player; returns their Pairing at once if an opponent is in range.
+
+        A player already queued keeps their place with the new deck; one with a
+        pending pairing gets it back instead.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            pairings = self._maybe_sweep(now)
+            match_id = self._paired.get(user_id)
+            if match_id is not None:
+                pairing = self._pairings[match_id]
+            else:
+                queued = self._entries.get(user_id)
+                if queued is not None:
+                    self._entries[user_id] = queued._replace(deck_id=deck_id)
+                    pairing = None
+                else:
+                    self._seq += 1
+                    entry = QueueEntry(user_id, username, deck_id, rating, now, self._seq)
+                    self._entries[user_id] = entry
+                    self._index(entry)
+                    pairing = self._match(entry, now)
+                    if pairing is not None:
+                        pairings.append(pairing)
+        self._announce(pairings)
+        return pairing
+
+    def leave(self, user_id):
+        """Leave the queue, or call off a pending pairing; False if neither."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._remove(entry)
+                return True
+            match_id = self._paired.get(user_id)
+            if match_id is None:
+                return False
+            pairing = self._pairings[match_id]
+            self._drop_pairing(pairing)
+        if self.notify is not None:
+            for player in pairing.players:
+                if player.user_id != user_id:
+                    self.notify(player.user_id, 'match_cancelled', {'match_id': match_id})
+        return True
+
+    def status(self, user_id, now=None):
+        """('matched', Pairing), ('queued', QueueEntry) or (None, None)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            pairings = self._maybe_sweep(now)
+            match_id = self._paired.get(user_id)
+            if match_id is not None:
+                result = ('matched', self._pairings[match_id])
+            elif user_id in self._entries:
+                result = ('queued', self._entries[user_id])
+            else:
+                result = (None, None)
+        self._announce(pairings)
+        return result
+
+    def sweep(self, now=None):
+        """Retry every waiting player with their widened gap; returns new pairings."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            pairings = self._sweep(now)
+        self._announce(pairings)
+        return pairings
+
+    def pairing(self, match_id):
+        with self._lock:
+            return self._pairings.get(match_id)
+
+    def report(self, match_id, user_id, winner_id):
+        """Record one player's report of the winner.
+
+        Returns (pairing, outcome), outcome being 'waiting' for the other
+        player, 'disputed' when the reports differ, 'settling' while an agreed
+        result is being recorded, or 'agreed' exactly once when both name the
+        same winner. The caller then records the result and calls complete(),
+        or release() if recording failed. (None, None) for an unknown pairing.
+        """
+        with self._lock:
+            pairing = self._pairings.get(match_id)
+            if pairing is None:
+                return None, None
+            if match_id in self._settling:
+                return pairing, 'settling'
+            reports = self._reports.setdefault(match_id, {})
+            reports[user_id] = winner_id
+            if len(reports) < len(pairing.players):
+                return pairing, 'waiting'
+            if len(set(reports.values())) > 1:
+                return pairing, 'disputed'
+            self._settling.add(match_id)
+            return pairing, 'agreed'
+
+    def release(self, match_id):
+        """Reopen an agreed pairing whose result could not be recorded."""
+        with self._lock:
+            self._settling.discard(match_id)
+
+    def complete(self, match_id):
+        """Remove and return a pending pairing, or None if unknown or already reported."""
+        with self._lock:
+            pairing = self._pairings.get(match_id)
+            if pairing is not None:
+                self._drop_pairing(pairing)
+            return pairing
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self._pairings.clear()
+            self._paired.clear()
+            self._reports.clear()
+            self._settling.clear()
+
+    @staticmethod
+    def describe(pairing, user_id):
+        """A pairing from one player's side, as the API returns it."""
+        player, opponent = pairing.players if pairing.players[0].user_id == user_id else pairing.players[::-1]
+        return {
+            'match_id': pairing.match_id,
+            'deck_id': player.deck_id,
+            'rating': player.rating,
+            'opponent': {
+                'id': opponent.user_id,
+                'username': opponent.username,
+                'rating': opponent.rating,
+                'deck_id': opponent.deck_id,
+            },
+        }
+
+
+matchmaker = MatchQueue()
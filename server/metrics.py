@@ -0,0 +1,194 @@
+"""
+Per-request performance metrics exposed in Prometheus text format on /metrics.
+
+For every request we record wall time, SQL statement count and SQL time
+(collected by server/request_log.py) and time spent in model to_dict() calls,
+labelled by route template such as /users/<int:user_id>/decks.
+
+Observations go to per-thread shards so the request path takes no lock; a
+scrape merges the shards. A thread's shard is folded into a base shard when the
+thread exits, so servers that start and retire threads keep a bounded number. Label values are route templates, methods and status
+classes, so the number of series is bounded. Each gunicorn worker keeps and
+reports its own numbers.
+"""
+
+import functools
+import threading
+import time
+import weakref
+from bisect import bisect_left
+
+from flask import Response, g, has_app_context, request
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _add_into(total, shard):
+    for key, value in shard.items():
+        if isinstance(value, list):
+            current = total.get(key)
+            total[key] = list(value) if current is None else [a + b for a, b in zip(current, value)]
+        else:
+            total[key] = total.get(key, 0) + value
+
+
+class _ThreadToken:
+    """Kept in a thread's local storage; collected when the thread exits."""
+
+    __slots__ = ('__weakref__',)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        # Observations of threads that have exited
+        self._base = {}
+        # Reentrant: a finalizer may run while this thread holds it
+        self._lock = threading.RLock()
+        self._histograms = {}
+        self._counters = {}
+
+    def histogram(self, name, help_text, buckets, labelnames):
+        self._histograms[name] = (help_text, tuple(buckets), tuple(labelnames))
+
+    def counter(self, name, help_text, labelnames):
+        self._counters[name] = (help_text, tuple(labelnames))
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = {}
+            token = _ThreadToken()
+            with self._lock:
+                self._shards.append(shard)
+            weakref.finalize(token, self._retire, shard)
+            self._local.shard = shard
+            self._local.token = token
+        return shard
+
+    def _retire(self, shard):
+        with self._lock:
+            self._shards = [live for live in self._shards if live is not shard]
+            _add_into(self._base, shard)
+
+    def observe(self, name, labels, value):
+        buckets = self._histograms[name][1]
+        shard = self._shard()
+        key = (name, labels)
+        series = shard.get(key)
+        if series is None:
+            # One slot per bucket, one for +Inf, then the running sum
+            series = shard[key] = [0] * (len(buckets) + 1) + [0.0]
+        series[bisect_left(buckets, value)] += 1
+        series[-1] += value
+
+    def inc(self, name, labels, amount=1):
+        shard = self._shard()
+        key = (name, labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def _merged(self):
+        # Held throughout so a shard retiring mid-scrape is counted once; only
+        # a thread's first observation and thread exits wait on it
+        merged = {}
+        with self._lock:
+            _add_into(merged, self._base)
+            for shard in self._shards:
+                _add_into(merged, shard.copy())
+        return merged
+
+    def render(self):
+        merged = self._merged()
+        lines = []
+
+        for name, (help_text, labelnames) in self._counters.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for (series_name, labels), value in sorted(merged.items()):
+                if series_name == name:
+                    lines.append(f'{name}{{{_labels(labelnames, labels)}}} {value}')
+
+        for name, (help_text, buckets, labelnames) in self._histograms.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for (series_name, labels), series in sorted(merged.items()):
+                if series_name != name:
+                    continue
+                label_text = _labels(labelnames, labels)
+                cumulative = 0
+                for bound, count in zip(buckets, series):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+                cumulative += series[len(buckets)]
+                lines.append(f'{name}_bucket{{{label_text},le="+Inf"}} {cumulative}')
+                lines.append(f'{name}_sum{{{label_text}}} {series[-1]}')
+                lines.append(f'{name}_count{{{label_text}}} {cumulative}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(names, values):
+    return ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+        for name, value in zip(names, values)
+    )
+
+
+registry = MetricsRegistry()
+registry.counter('mythos_requests_total', 'Requests handled.', ('route', 'method', 'status'))
+registry.histogram('mythos_request_duration_seconds', 'Request wall time.',
+                   LATENCY_BUCKETS, ('route', 'method'))
+registry.histogram('mythos_request_db_queries', 'SQL statements per request.',
+                   QUERY_COUNT_BUCKETS, ('route', 'method'))
+registry.histogram('mythos_request_db_seconds', 'SQL execution time per request.',
+                   LATENCY_BUCKETS, ('route', 'method'))
+registry.histogram('mythos_request_serialize_seconds', 'Time in model to_dict() per request.',
+                   LATENCY_BUCKETS, ('route', 'method'))
+
+
+def timed_serialization(to_dict):
+    """Wrap a to_dict() so its time is added to the current request's total."""
+    @functools.wraps(to_dict)
+    def wrapper(*args, **kwargs):
+        if not has_app_context() or 'serialize_time' not in g or g.serialize_depth:
+            return to_dict(*args, **kwargs)
+        # Only the outermost call is timed; nested models are part of it
+        g.serialize_depth += 1
+        started = time.perf_counter()
+        try:
+            return to_dict(*args, **kwargs)
+        finally:
+            g.serialize_time += time.perf_counter() - started
+            g.serialize_depth -= 1
+    return wrapper
+
+
+def init_metrics(app, models):
+    for model in models:
+        model.to_dict = timed_serialization(model.to_dict)
+
+    @app.before_request
+    def start_serialization_timer():
+        g.serialize_time = 0.0
+        g.serialize_depth = 0
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.get('request_started')
+        if started is None:
+            return response
+
+        route = request.url_rule.rule if request.url_rule else '<unmatched>'
+        labels = (route, request.method)
+        registry.inc('mythos_requests_total', (route, request.method, f'{response.status_code // 100}xx'))
+        registry.observe('mythos_request_duration_seconds', labels, time.perf_counter() - started)
+        registry.observe('mythos_request_db_queries', labels, g.get('db_queries', 0))
+        registry.observe('mythos_request_db_seconds', labels, g.get('db_time', 0.0))
+        registry.observe('mythos_request_serialize_seconds', labels, g.get('serialize_time', 0.0))
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
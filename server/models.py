@@ -1,10 +1,12 @@
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import MetaData
+from sqlalchemy import MetaData, event
 from sqlalchemy.orm import validates
 from sqlalchemy_serializer import SerializerMixin
 from sqlalchemy.ext.hybrid import hybrid_property
 from datetime import datetime
 
+from server.passwords import hasher
+
 metadata = MetaData(naming_convention={
     "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
     "pk": "pk_%(table_name)s",
@@ -16,6 +18,31 @@ metadata = MetaData(naming_convention={
 db = SQLAlchemy(metadata=metadata)
 
 
+def apply_sqlite_pragmas(engine, pragmas):
+    """Run `PRAGMA name=value` for each pragma on every new SQLite connection."""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+class CompiledSerializerMixin(SerializerMixin):
+    """SerializerMixin whose plain to_dict() uses the model's compiled serializer."""
+
+    def to_dict(self, *args, **kwargs):
+        if args or kwargs:
+            return super().to_dict(*args, **kwargs)
+        from server.serializers import serializer_for
+        return serializer_for(type(self))(self)
+
+
 
 
 
@@ -27,14 +54,17 @@ class User(db.Model, SerializerMixin):
     email = db.Column(db.String(100), unique=True, nullable=False)
     _password_hash = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     wallet = db.Column(db.Integer, nullable=False)
     wins = db.Column(db.Integer, default=0)
+    # Elo rating for matchmaking
+    rating = db.Column(db.Integer, nullable=False, default=1200, server_default='1200')
     
     inventory = db.relationship('Inventory', back_populates='user', cascade='all, delete-orphan')
     decks = db.relationship('Deck', back_populates='user', cascade='all, delete-orphan')
     sent_friend_requests = db.relationship('FriendRequest', foreign_keys='FriendRequest.sender_id', back_populates='sender', cascade='all, delete-orphan')
     received_friend_requests = db.relationship('FriendRequest', foreign_keys='FriendRequest.receiver_id', back_populates='receiver', cascade='all, delete-orphan')
+    matches = db.relationship('Match', back_populates='user', cascade='all, delete-orphan')
     friends = db.relationship('User', secondary='friend_relationships',
                             primaryjoin='User.id==friend_relationships.c.user_id',
                             secondaryjoin='User.id==friend_relationships.c.friend_id',
@@ -48,6 +78,7 @@ class User(db.Model, SerializerMixin):
             'email': self.email,
             'wallet': self.wallet,
             'wins': self.wins,
+            'rating': self.rating,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
@@ -107,18 +138,24 @@ class User(db.Model, SerializerMixin):
     
     @password_hash.setter
     def password_hash(self, password):
-        from werkzeug.security import generate_password_hash
-        self._password_hash = generate_password_hash(password)
+        self._password_hash = hasher.hash(password)
     
     def authenticate(self, password):
-        from werkzeug.security import check_password_hash
-        return check_password_hash(self._password_hash, password)
+        """
+        Check a password, replacing the stored hash if it was made with other
+        parameters than the configured method. The caller commits.
+        """
+        if not hasher.verify(self._password_hash, password):
+            return False
+        if hasher.needs_rehash(self._password_hash):
+            self._password_hash = hasher.hash(password)
+        return True
 
 
 
 
 
-class Card(db.Model, SerializerMixin):
+class Card(db.Model, CompiledSerializerMixin):
     __tablename__ = 'cards'
     
     id = db.Column(db.Integer, primary_key=True)
@@ -145,8 +182,11 @@ class Card(db.Model, SerializerMixin):
 
 
 
-class Inventory(db.Model, SerializerMixin):
+class Inventory(db.Model, CompiledSerializerMixin):
     __tablename__ = 'inventories'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'card_id', name='uq_inventories_user_id_card_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -170,12 +210,12 @@ class Inventory(db.Model, SerializerMixin):
 
 
 
-class Deck(db.Model, SerializerMixin):
+class Deck(db.Model, CompiledSerializerMixin):
     __tablename__ = 'decks'
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     volume = db.Column(db.Integer, default=20)
     
     
@@ -199,8 +239,11 @@ class Deck(db.Model, SerializerMixin):
 
 
 
-class CardInDeck(db.Model, SerializerMixin):
+class CardInDeck(db.Model, CompiledSerializerMixin):
     __tablename__ = 'cards_in_deck'
+    __table_args__ = (
+        db.UniqueConstraint('deck_id', 'card_id', name='uq_cards_in_deck_deck_id_card_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     deck_id = db.Column(db.Integer, db.ForeignKey('decks.id'), nullable=False)
@@ -227,6 +270,10 @@ class CardInDeck(db.Model, SerializerMixin):
 
 class FriendRequest(db.Model, SerializerMixin):
     __tablename__ = 'friend_requests'
+    __table_args__ = (
+        db.Index('ix_friend_requests_receiver_id_status', 'receiver_id', 'status'),
+        db.Index('ix_friend_requests_sender_id_receiver_id', 'sender_id', 'receiver_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     sender_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -254,6 +301,37 @@ class FriendRequest(db.Model, SerializerMixin):
             'created_at': self.created_at.isoformat()
         }
 
+# Reported outcomes of a match; a started match is pending until its result
+MATCH_OUTCOMES = ('victory', 'defeat')
+MATCH_PENDING = 'pending'
+
+
+class Match(db.Model, SerializerMixin):
+    __tablename__ = 'matches'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    # Issued by the server when the match starts, so only matches it started
+    # are recorded, and a retried result is recorded (and paid) once
+    match_id = db.Column(db.String(64), unique=True, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    outcome = db.Column(db.String(20), nullable=False)  # pending, victory, defeat
+    rounds = db.Column(db.Integer, default=0)
+    thief_damage = db.Column(db.Integer, default=0)
+    guard_blocks = db.Column(db.Integer, default=0)
+    curse_damage = db.Column(db.Integer, default=0)
+    gems_earned = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    user = db.relationship('User', back_populates='matches')
+    
+    serialize_rules = ('-user',)
+    
+    @validates('outcome')
+    def validate_outcome(self, key, outcome):
+        if outcome not in MATCH_OUTCOMES + (MATCH_PENDING,):
+            raise ValueError("Outcome must be 'pending', 'victory' or 'defeat'")
+        return outcome
+
 # Association table for friend relationships
 friend_relationships = db.Table('friend_relationships',
     db.Column('user_id', db.Integer, db.ForeignKey('users.id'), primary_key=True),
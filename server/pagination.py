@@ -0,0 +1,78 @@
+"""
+Keyset pagination and field projection for collection endpoints.
+
+Collections accept `?after=<id>&limit=<n>&fields=a,b`. Pages are ordered by
+id and continue after the last id seen, so every page is an index range scan
+no matter how deep it is. Bodies stay plain lists; when more rows remain the
+id to pass as `after` is returned in the X-Next-Cursor header.
+"""
+
+from flask import request
+
+MAX_LIMIT = 1000
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+def page_args(default_limit=None, max_limit=MAX_LIMIT, args=None):
+    """
+    Read `after`, `limit` and `fields` from the query string, or from `args`
+    when given.
+
+    `fields` is None when no projection was asked for. Raises ValueError with
+    a message suitable for a 400 response.
+    """
+    if args is None:
+        args = request.args
+    after = args.get('after')
+    limit = args.get('limit')
+    fields = args.get('fields')
+
+    try:
+        after = int(after) if after not in (None, '') else None
+        limit = int(limit) if limit not in (None, '') else default_limit
+    except ValueError:
+        raise ValueError("after and limit must be integers")
+    if limit is not None and not 1 <= limit <= max_limit:
+        raise ValueError(f"limit must be between 1 and {max_limit}")
+
+    if fields is not None:
+        fields = tuple(field.strip() for field in fields.split(',') if field.strip())
+        if not fields:
+            raise ValueError("fields must name at least one field")
+    return after, limit, fields
+
+
+def paginate(stmt, id_column, after, limit):
+    """Restrict a select to one page, fetching one extra row to detect more."""
+    if after is not None:
+        stmt = stmt.where(id_column > after)
+    stmt = stmt.order_by(id_column)
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+    return stmt
+
+
+def split_page(rows, limit, id_index):
+    """Trim the extra row from a page and return (rows, next cursor or None)."""
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, rows[-1][id_index]
+
+
+def page_headers(next_cursor):
+    return {NEXT_CURSOR_HEADER: str(next_cursor)} if next_cursor is not None else {}
+
+
+def check_fields(fields, known):
+    """Raise ValueError, for a 400, if `fields` names anything not in `known`."""
+    unknown = set(fields).difference(known)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+
+def project(items, fields):
+    """Limit already built dicts to `fields`."""
+    if fields is None:
+        return items
+    return [{field: item[field] for field in fields if field in item} for item in items]
@@ -0,0 +1,87 @@
+"""
+Password hashing off the request thread.
+
+werkzeug's pbkdf2 hashes cost tens of milliseconds of CPU by design, which
+would stall every other request on a gunicorn worker during a burst of logins
+or signups. Hashing and verification run in a small ProcessPoolExecutor
+instead. At most `max_pending` calls may be queued or running per process;
+past that PasswordHasherBusy is raised straight away so the endpoint can answer
+429 rather than letting the queue grow.
+
+Hashes record the method they were made with ("pbkdf2:sha256:260000$..."), so
+a hash made with other parameters than the configured method is detected after
+a successful login and replaced.
+"""
+
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = 'pbkdf2:sha256:260000'
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    def __init__(self, method=DEFAULT_METHOD, workers=2, max_pending=32):
+        self._lock = threading.Lock()
+        self._pool = None
+        self.configure(method, workers, max_pending)
+
+    def configure(self, method=None, workers=None, max_pending=None):
+        with self._lock:
+            if method:
+                self.method = method
+                # The prefix werkzeug writes for this method, e.g. with the
+                # default iteration count filled in
+                self.prefix = generate_password_hash('', method).split('$', 1)[0]
+            if workers:
+                self.workers = workers
+                if self._pool is not None:
+                    self._pool.shutdown(wait=False)
+                    self._pool = None
+            if max_pending:
+                self.max_pending = max_pending
+                self._slots = threading.BoundedSemaphore(max_pending)
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def _run(self, fn, *args):
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise PasswordHasherBusy('Too many password checks in progress')
+        try:
+            pool = self._get_pool()
+            future = pool.submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            # A killed worker breaks the pool; start a fresh one next time
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+            raise
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        return pwhash.split('$', 1)[0] != self.prefix
+
+
+hasher = PasswordHasher()
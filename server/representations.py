@@ -0,0 +1,87 @@
+"""
+JSON representation for every Flask-RESTful response.
+
+Bodies are encoded with orjson when it is installed and with a compact stdlib
+encoder otherwise; neither pretty-prints. Bodies of at least `min_size` bytes
+are compressed with brotli (when the brotli package is installed) or gzip,
+whichever the client's Accept-Encoding prefers. Compressed responses carry
+`Vary: Accept-Encoding`, and their ETag is weakened because the bytes no longer
+match the identity representation.
+
+Only resource return values pass through here: 304s and other responses built
+with make_response, and streamed responses, go out untouched.
+"""
+
+import gzip
+import json
+
+from flask import make_response, request
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def dumps(data):
+    """Encode `data` as compact JSON bytes."""
+    if orjson is not None:
+        # Non-string keys (e.g. card ids) are stringified as json.dumps does
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+
+def available_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def choose_encoding(accept_encodings):
+    """The best available encoding a werkzeug Accept allows, or None."""
+    best = accept_encodings.best_match(available_encodings())
+    return best if best and accept_encodings[best] > 0 else None
+
+
+class JSONRepresentation:
+    def __init__(self, min_size=1024, gzip_level=6, brotli_quality=4):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def compress(self, body, encoding):
+        if encoding == 'br':
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def encode(self, body, accept_encodings):
+        """(body, Content-Encoding or None) for a client's Accept-Encoding."""
+        if len(body) < self.min_size:
+            return body, None
+        encoding = choose_encoding(accept_encodings)
+        if encoding is None:
+            return body, None
+        return self.compress(body, encoding), encoding
+
+    def __call__(self, data, code, headers=None):
+        body = dumps(data)
+        compressible = len(body) >= self.min_size
+        body, encoding = self.encode(body, request.accept_encodings)
+
+        response = make_response(body, code)
+        response.headers.extend(headers or {})
+        response.mimetype = 'application/json'
+        if compressible:
+            response.vary.add('Accept-Encoding')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+            etag, weak = response.get_etag()
+            if etag and not weak:
+                response.set_etag(etag, weak=True)
+        return response
+
+
+json_representation = JSONRepresentation()
@@ -0,0 +1,109 @@
+"""
+Structured request logging.
+
+Each sampled request produces one JSON line with its route, status, wall time
+and SQL statement count/time. Records are handed to a QueueHandler and written
+by a background QueueListener thread, so request threads never block on stdout.
+Request and response bodies are never logged.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('mythos.requests')
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, separators=(',', ':'), default=str)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _finish_query(conn):
+    started = conn.info['query_started'].pop()
+    # Statements run outside a request (CLI scripts, seeding) are not counted
+    if has_app_context() and 'db_queries' in g:
+        g.db_queries += 1
+        g.db_time += time.perf_counter() - started
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _finish_query(conn)
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; without this its
+    # start time would stay on the connection and skew every later timing
+    conn = exception_context.connection
+    if exception_context.statement is not None and conn is not None and conn.info.get('query_started'):
+        _finish_query(conn)
+
+
+def init_request_logging(app):
+    level = logging.getLevelName(app.config['LOG_LEVEL'].upper())
+    sample_rate = app.config['REQUEST_LOG_SAMPLE_RATE']
+
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JSONFormatter())
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=False)
+    listener.start()
+    atexit.register(listener.stop)
+
+    logger.handlers = [QueueHandler(log_queue)]
+    logger.setLevel(level)
+    logger.propagate = False
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        g.db_queries = 0
+        g.db_time = 0.0
+
+    @app.after_request
+    def log_request(response):
+        # Errors are always logged; everything else is sampled
+        if response.status_code < 500 and random.random() >= sample_rate:
+            return response
+        if not logger.isEnabledFor(logging.INFO):
+            return response
+
+        started = g.get('request_started')
+        logger.info('request', extra={'fields': {
+            'method': request.method,
+            'path': request.path,
+            'route': request.url_rule.rule if request.url_rule else None,
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - started) * 1000.0, 3) if started else None,
+            'db_queries': g.get('db_queries', 0),
+            'db_time_ms': round(g.get('db_time', 0.0) * 1000.0, 3),
+            'response_bytes': response.calculate_content_length(),
+        }})
+        return response
+
+    return listener
@@ -3,14 +3,24 @@
 import os
 import sys
 import json
+import argparse
+import hashlib
+import random
+import string
+import time
+from datetime import datetime, timedelta
 
 
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
+from faker import Faker
+from sqlalchemy import delete, func, insert, select, text
+
 from server.app import app
-from server.models import db, User, Card, Inventory, Deck, CardInDeck
+from server.catalog import card_catalog
+from server.models import db, User, Card, Inventory, Deck, CardInDeck, FriendRequest, friend_relationships
 
 
 
@@ -49,8 +59,7 @@ def create_users():
 
 def seed_cards_from_json():
     
-    Card.query.delete()
-    db.session.commit()
+    db.session.execute(delete(Card))
     
     
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -60,21 +69,23 @@ def seed_cards_from_json():
     with open(json_path) as f:
         cards_data = json.load(f)
     
-    cards = []
-    for card_data in cards_data:
-        card = Card(
-            name=card_data['name'],
-            image=card_data['image'],
-            power=card_data['power'],
-            cost=card_data['cost'],
-            thief=card_data.get('thief', False),
-            guard=card_data.get('guard', False),
-            curse=card_data.get('curse', False)
-        )
-        cards.append(card)
+    cards = [
+        {
+            'name': card_data['name'],
+            'image': card_data['image'],
+            'power': card_data['power'],
+            'cost': card_data['cost'],
+            'thief': card_data.get('thief', False),
+            'guard': card_data.get('guard', False),
+            'curse': card_data.get('curse', False)
+        }
+        for card_data in cards_data
+    ]
     
-    db.session.add_all(cards)
+    # One executemany instead of an ORM object per card
+    db.session.execute(insert(Card.__table__), cards)
     db.session.commit()
+    card_catalog.invalidate()
     return cards
 
 def create_default_deck():
@@ -95,49 +106,174 @@ def create_default_deck():
     db.session.add(default_deck)
     db.session.flush()  
     
-    guards = Card.query.filter_by(guard=True).limit(5).all()
-    thieves = Card.query.filter_by(thief=True).limit(5).all()
-    curses = Card.query.filter_by(curse=True).limit(5).all()
-    regulars = Card.query.filter(
-        ~Card.id.in_([c.id for c in guards + thieves + curses])
-    ).limit(5).all()
-    
-    deck_cards = []
-    inventory_items = []
-    position = 0
-    
-    for card in guards + thieves + curses + regulars:
-        # Add to deck
-        deck_card = CardInDeck(
-            deck_id=default_deck.id,
-            card_id=card.id,
-            quantity=1
-        )
-        deck_cards.append(deck_card)
-        
-        # Add to inventory
-        inventory_item = Inventory(
-            user_id=user.id,
-            card_id=card.id,
-            quantity=1
-        )
-        inventory_items.append(inventory_item)
-        position += 1
-    
-    db.session.add_all(deck_cards)
-    db.session.add_all(inventory_items)
+    # The same template signup uses
+    starter_deck = card_catalog.get_starter_deck()
+    db.session.add_all(
+        CardInDeck(deck_id=default_deck.id, card_id=card_id, quantity=quantity)
+        for card_id, quantity in starter_deck
+    )
+    db.session.add_all(
+        Inventory(user_id=user.id, card_id=card_id, quantity=quantity)
+        for card_id, quantity in starter_deck
+    )
     db.session.commit()
     
 
 
 
+PASSWORD_ITERATIONS = 260000
+SALT_CHARS = string.ascii_letters + string.digits
+
+
+def _seeded_password_hash(password, rng):
+    """A werkzeug-compatible pbkdf2 hash whose salt comes from `rng`."""
+    salt = ''.join(rng.choice(SALT_CHARS) for _ in range(16))
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), PASSWORD_ITERATIONS)
+    return f"pbkdf2:sha256:{PASSWORD_ITERATIONS}${salt}${digest.hex()}"
+
+
+def _next_id(table):
+    return (db.session.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+
+def _advance_sequences(tables):
+    """Move PostgreSQL's id sequences past ids inserted explicitly.
+
+    SQLite picks max(id) + 1 by itself; a SERIAL column would otherwise hand
+    out ids generate() already used.
+    """
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for table in tables:
+        if 'id' in table.c:
+            db.session.execute(
+                text(f"SELECT setval(pg_get_serial_sequence(:table, 'id'), "
+                     f"(SELECT max(id) FROM {table.name}))"),
+                {'table': table.name}
+            )
+
+
+def generate(users, seed=1, batch_size=10000, inventory_per_user=30,
+             decks_per_user=1, friends_per_user=4, password='password'):
+    """
+    Stream synthetic users with inventories, decks and friendships.
+
+    Rows are built one batch of users at a time and written with Core
+    executemany inserts, committing per batch. Ids are assigned here so child
+    rows need no round trip, and each batch advances the id sequences past
+    them. Every user gets the same precomputed password
+    hash, salted from the seed, so the same seed on an empty database produces
+    the same rows.
+    """
+    rng = random.Random(seed)
+    Faker.seed(seed)
+    fake = Faker()
+    # A pool of fake handles; the user id suffix keeps usernames unique
+    handles = [fake.user_name() for _ in range(min(users, 10000) or 1)]
+    domains = [fake.free_email_domain() for _ in range(20)]
+    password_hash = _seeded_password_hash(password, rng)
+    created_base = datetime(2024, 1, 1)
+
+    card_ids = list(db.session.execute(select(Card.id).order_by(Card.id)).scalars())
+    if not card_ids:
+        raise ValueError("Seed the cards table before generating users")
+    inventory_per_user = min(inventory_per_user, len(card_ids))
+    deck_size = 20
+
+    tables = (User.__table__, Inventory.__table__, Deck.__table__, CardInDeck.__table__,
+              FriendRequest.__table__, friend_relationships)
+    next_ids = {table.name: _next_id(table) for table in tables if 'id' in table.c}
+    first_user_id = next_ids['users']
+    totals = {table.name: 0 for table in tables}
+    started = time.perf_counter()
+
+    for batch_start in range(0, users, batch_size):
+        rows = {table.name: [] for table in tables}
+        for offset in range(batch_start, min(batch_start + batch_size, users)):
+            user_id = next_ids['users']
+            next_ids['users'] += 1
+            handle = f"{handles[offset % len(handles)]}{user_id}"
+            created_at = created_base + timedelta(seconds=rng.randrange(365 * 86400))
+            rows['users'].append({
+                'id': user_id, 'username': handle, 'email': f"{handle}@{rng.choice(domains)}",
+                '_password_hash': password_hash, 'created_at': created_at, 'updated_at': created_at,
+                'wallet': rng.randrange(0, 1000), 'wins': int(rng.expovariate(1 / 20.0)),
+            })
+
+            owned = rng.sample(card_ids, inventory_per_user)
+            for card_id in owned:
+                rows['inventories'].append({
+                    'id': next_ids['inventories'], 'user_id': user_id,
+                    'card_id': card_id, 'quantity': rng.randint(1, 3),
+                })
+                next_ids['inventories'] += 1
+
+            for number in range(decks_per_user):
+                deck_id = next_ids['decks']
+                next_ids['decks'] += 1
+                rows['decks'].append({'id': deck_id, 'name': f"Deck {number + 1}", 'user_id': user_id, 'volume': deck_size})
+                pool = owned if len(owned) >= deck_size else card_ids
+                for card_id in rng.sample(pool, min(deck_size, len(pool))):
+                    rows['cards_in_deck'].append({
+                        'id': next_ids['cards_in_deck'], 'deck_id': deck_id, 'card_id': card_id, 'quantity': 1,
+                    })
+                    next_ids['cards_in_deck'] += 1
+
+            # Befriend earlier users only, so every pair is new and already inserted
+            earlier = user_id - first_user_id
+            for friend_id in rng.sample(range(first_user_id, user_id), min(friends_per_user // 2, earlier)):
+                rows['friend_requests'].append({
+                    'id': next_ids['friend_requests'], 'sender_id': user_id, 'receiver_id': friend_id,
+                    'status': 'accepted', 'created_at': created_at,
+                })
+                next_ids['friend_requests'] += 1
+                rows['friend_relationships'].append({'user_id': user_id, 'friend_id': friend_id})
+                rows['friend_relationships'].append({'user_id': friend_id, 'friend_id': user_id})
+
+        for table in tables:
+            if rows[table.name]:
+                db.session.execute(insert(table), rows[table.name])
+                totals[table.name] += len(rows[table.name])
+        _advance_sequences(tables)
+        db.session.commit()
+
+        elapsed = time.perf_counter() - started
+        written = sum(totals.values())
+        print(f"{totals['users']:,}/{users:,} users, {written:,} rows, {written / elapsed:,.0f} rows/s")
+
+    elapsed = time.perf_counter() - started
+    written = sum(totals.values())
+    for name, count in totals.items():
+        print(f"  {name:<22}{count:>12,}")
+    print(f"Generated {written:,} rows in {elapsed:.1f}s ({written / elapsed:,.0f} rows/s)")
+    return totals
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed the database, or generate synthetic load data.")
+    parser.add_argument('--generate', type=int, metavar='USERS',
+                        help='generate this many synthetic users instead of the default seed')
+    parser.add_argument('--seed', type=int, default=1, help='random seed for generated data')
+    parser.add_argument('--batch-size', type=int, default=10000, help='users per insert batch')
+    parser.add_argument('--inventory-per-user', type=int, default=30)
+    parser.add_argument('--decks-per-user', type=int, default=1)
+    parser.add_argument('--friends-per-user', type=int, default=4)
+    args = parser.parse_args()
+    
     with app.app_context():
        
         db.create_all()
-       
-        create_users()
-        cards = seed_cards_from_json()
-        create_default_deck()
+        
+        if args.generate:
+            if not db.session.execute(select(Card.id).limit(1)).first():
+                seed_cards_from_json()
+            generate(args.generate, seed=args.seed, batch_size=args.batch_size,
+                     inventory_per_user=args.inventory_per_user,
+                     decks_per_user=args.decks_per_user,
+                     friends_per_user=args.friends_per_user)
+        else:
+            create_users()
+            cards = seed_cards_from_json()
+            create_default_deck()
         
         print("Seeding completed successfully!")
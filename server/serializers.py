@@ -0,0 +1,180 @@
+"""
+Precompiled serializers for the hot models.
+
+SerializerMixin.to_dict() rebuilds its rule schema and reflects over every
+mapper attribute for each row it serializes. A ModelSerializer resolves the
+same rules once per model into a fixed list of column keys and nested
+relationship serializers, and produces the same dict.
+
+Serializers also work on plain result rows, so list endpoints can select only
+the columns they need and skip building ORM objects:
+
+    rows = db.session.execute(select(*inventory_serializer.columns).where(...))
+    inventory_serializer.from_rows(rows, card=card_catalog.get_by_id())
+"""
+
+from datetime import date, datetime, time
+from operator import attrgetter
+
+from sqlalchemy import DateTime, Date, Time, inspect
+
+from server.metrics import timed_serialization
+from server.models import Card, Inventory, Deck, CardInDeck
+
+
+def _split_rules(rules):
+    """Split serialize_rules into excluded keys and rules passed to each child."""
+    excluded = set()
+    nested = {}
+    for rule in rules:
+        negative = rule.startswith('-')
+        key, _, rest = rule.lstrip('-').partition('.')
+        if rest:
+            nested.setdefault(key, []).append(('-' if negative else '') + rest)
+        elif negative:
+            excluded.add(key)
+    return excluded, nested
+
+
+def _column_converter(model, column):
+    if isinstance(column.type, DateTime):
+        fmt = model.datetime_format
+        return lambda value: value.strftime(fmt) if isinstance(value, datetime) else value
+    if isinstance(column.type, Date):
+        fmt = model.date_format
+        return lambda value: value.strftime(fmt) if isinstance(value, date) else value
+    if isinstance(column.type, Time):
+        fmt = model.time_format
+        return lambda value: value.strftime(fmt) if isinstance(value, time) else value
+    return None
+
+
+class ModelSerializer:
+    def __init__(self, model, rules=(), only=None):
+        mapper = inspect(model)
+        excluded, nested_rules = _split_rules(tuple(model.serialize_rules) + tuple(rules))
+
+        self.model = model
+        self._rules = tuple(rules)
+        self._projections = {}
+        keys = [attr.key for attr in mapper.column_attrs if attr.key not in excluded]
+        relationships = [rel for rel in mapper.relationships if rel.key not in excluded]
+        if only is not None:
+            keys = [key for key in keys if key in only]
+            relationships = [rel for rel in relationships if rel.key in only]
+        self.keys = tuple(keys)
+        self.fields = self.keys + tuple(rel.key for rel in relationships)
+
+        # Columns selected but not returned: relationship join columns and the
+        # primary key, which keyset pagination reads its cursor from
+        primary_key = mapper.get_property_by_column(mapper.primary_key[0]).key
+        hidden = []
+        for key in [rel.local_remote_pairs[0][0].key for rel in relationships] + [primary_key]:
+            if key not in keys and key not in hidden:
+                hidden.append(key)
+        self.select_keys = self.keys + tuple(hidden)
+        self.columns = tuple(getattr(model, key) for key in self.select_keys)
+        self.id_index = self.select_keys.index(primary_key)
+
+        if len(keys) == 1:
+            getter = attrgetter(keys[0])
+            self._getter = lambda obj: (getter(obj),)
+        else:
+            self._getter = attrgetter(*keys) if keys else lambda obj: ()
+        self._converters = tuple(
+            (index, converter)
+            for index, key in enumerate(self.keys)
+            for converter in [_column_converter(model, mapper.column_attrs[key].columns[0])]
+            if converter is not None
+        )
+
+        # (key, serializer, uselist, local join column)
+        self.nested = tuple(
+            (
+                rel.key,
+                ModelSerializer(rel.mapper.class_, nested_rules.get(rel.key, ())),
+                rel.uselist,
+                rel.local_remote_pairs[0][0].key,
+            )
+            for rel in relationships
+        )
+
+    def only(self, fields):
+        """A serializer limited to `fields`, e.g. from a ?fields= projection."""
+        fields = frozenset(fields)
+        projection = self._projections.get(fields)
+        if projection is None:
+            unknown = fields.difference(self.fields)
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+            projection = self._projections[fields] = ModelSerializer(self.model, self._rules, fields)
+        return projection
+
+    def _row_dict(self, values):
+        # Rows may carry hidden columns after self.keys; zip() drops them
+        if self._converters:
+            values = list(values)
+            for index, converter in self._converters:
+                values[index] = converter(values[index])
+        return dict(zip(self.keys, values))
+
+    def _serialize(self, obj):
+        data = self._row_dict(self._getter(obj))
+        for key, serializer, uselist, _ in self.nested:
+            value = getattr(obj, key)
+            if uselist:
+                data[key] = [serializer._serialize(item) for item in value]
+            else:
+                data[key] = None if value is None else serializer._serialize(value)
+        return data
+
+    @timed_serialization
+    def __call__(self, obj):
+        """Serialize one model instance, nesting its relationships."""
+        return self._serialize(obj)
+
+    @timed_serialization
+    def many(self, objs):
+        return [self._serialize(obj) for obj in objs]
+
+    @timed_serialization
+    def from_rows(self, rows, **lookups):
+        """
+        Serialize rows selected with `self.columns`.
+
+        Relationships are filled from `lookups`, keyed by relationship name and
+        mapping this row's join column to already serialized data: a dict for
+        many-to-one (card=card_catalog.get_by_id() maps card_id to a card) or a
+        list for one-to-many (cards_in_deck maps the deck id to its cards).
+        Relationships without a lookup are left out.
+        """
+        nested = [
+            (key, lookups[key], self.select_keys.index(column), uselist)
+            for key, _, uselist, column in self.nested
+            if key in lookups
+        ]
+        result = []
+        for row in rows:
+            data = self._row_dict(row)
+            for key, lookup, index, uselist in nested:
+                value = lookup.get(row[index])
+                data[key] = [] if value is None and uselist else value
+            result.append(data)
+        return result
+
+
+_serializers = {}
+
+
+def serializer_for(model):
+    """The compiled serializer of a model, built on first use."""
+    serializer = _serializers.get(model)
+    if serializer is None:
+        serializer = _serializers[model] = ModelSerializer(model)
+    return serializer
+
+
+card_serializer = serializer_for(Card)
+inventory_serializer = serializer_for(Inventory)
+deck_serializer = serializer_for(Deck)
+card_in_deck_serializer = serializer_for(CardInDeck)
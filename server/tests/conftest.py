@@ -0,0 +1,74 @@
+import os
+from contextlib import contextmanager
+
+# Config is read when server.app is imported: an in-memory database, cheap
+# password hashes, no request log lines and AI workers started on demand
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+os.environ['REQUEST_LOG_SAMPLE_RATE'] = '0'
+os.environ['AI_WARM_UP'] = '0'
+
+import pytest
+from sqlalchemy import event
+
+from server.app import app as flask_app
+from server.catalog import card_catalog
+from server.friend_graph import friend_graph
+from server.leaderboard import leaderboard
+from server.matchmaking import matchmaker
+from server.models import db, User
+from server.seed import seed_cards_from_json
+
+PASSWORD = 'password1'
+
+
+@pytest.fixture
+def app():
+    flask_app.config['TESTING'] = True
+    with flask_app.app_context():
+        db.create_all()
+        seed_cards_from_json()
+        card_catalog.invalidate()
+        friend_graph.clear()
+        matchmaker.clear()
+        leaderboard.rebuild()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(client):
+    """Sign a user up through the API; returns the created user dict."""
+    def make(username, wallet=None):
+        response = client.post('/users', json={
+            'username': username, 'email': f'{username}@example.com', 'password': PASSWORD,
+        })
+        assert response.status_code == 201, response.json
+        user = response.json
+        if wallet is not None:
+            db.session.get(User, user['id']).wallet = wallet
+            db.session.commit()
+            user['wallet'] = wallet
+        return user
+    return make
+
+
+@contextmanager
+def count_queries():
+    """Collects the SQL statements run inside the block."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
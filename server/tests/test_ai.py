@@ -0,0 +1,74 @@
+import pytest
+
+from server.engine import ai
+from server.engine.cards import CardTable
+
+
+def view(**overrides):
+    data = {
+        'opponent_hand': [1, 2, 3],
+        'player_lanes': [None, 4, None],
+        'opponent_lanes': [None, None, None],
+        'mana': {'player': 4, 'opponent': 4},
+        'deck_sizes': {'player': 10, 'opponent': 10},
+    }
+    data.update(overrides)
+    return data
+
+
+@pytest.mark.parametrize('blocks', [
+    {'player': [0, 0]},
+    {'opponent': [0, 0, -1]},
+    {'player': ['x', 0, 0]},
+    [0, 0, 0],
+])
+def test_malformed_guard_blocks_are_rejected(blocks):
+    table = CardTable.from_json()
+    with pytest.raises(ValueError):
+        ai.build_state(table, view(guard_blocks=blocks))
+
+
+def test_opponent_move(client):
+    response = client.post('/arena/opponent-move', json=view(budget_ms=50))
+    assert response.status_code == 200
+    assert response.json['pass'] or response.json['card_id'] in (1, 2, 3)
+
+    bad = client.post('/arena/opponent-move', json=view(guard_blocks={'player': [0, 0]}))
+    assert bad.status_code == 400
+    assert client.post('/arena/opponent-move', json=view(life=5)).status_code == 400
+
+
+def test_old_pool_drains_before_shutdown():
+    table = CardTable.from_json()
+    planner = ai.MonteCarloPlanner(workers=1)
+    old = planner._acquire_pool('v1', table)
+    new = planner._acquire_pool('v2', table)
+    assert new is not old
+    # Still held by a move in flight, so still accepting work
+    assert old.submit(abs, -1).result() == 1
+
+    planner._release_pool(old)
+    with pytest.raises(RuntimeError):
+        old.submit(abs, -1)
+    planner._release_pool(new)
+    assert new.submit(abs, -1).result() == 1
+    new.shutdown()
+
+
+def test_a_forced_pass_has_the_same_stats(client):
+    normal = client.post('/arena/opponent-move', json=view(budget_ms=50)).json
+    # No mana, so no legal placement and no rollouts
+    forced = client.post('/arena/opponent-move', json=view(mana={'player': 0, 'opponent': 0})).json
+    assert forced['pass'] is True
+    assert forced['win_rate'] is None
+    assert set(forced) == set(normal) - {'hand_index', 'card_id', 'lane'}
+
+
+def test_warm_up_starts_every_worker():
+    table = CardTable.from_json()
+    planner = ai.MonteCarloPlanner(workers=2)
+    assert planner.warm_up('v1', table) == 2
+    pool = planner._pool
+    assert len(pool._processes) == 2
+    assert pool._mp_context is ai._mp_context
+    pool.shutdown()
@@ -0,0 +1,113 @@
+"""ETags on the card catalog, keyset cursors and ?fields= projection."""
+
+from server.pagination import NEXT_CURSOR_HEADER
+
+
+def test_catalog_etag_and_304(client):
+    response = client.get('/cards')
+    etag = response.headers['ETag']
+    assert response.status_code == 200
+
+    cached = client.get('/cards', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.data == b''
+    assert client.get('/cards/1', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/cards', headers={'If-None-Match': '"stale"'}).status_code == 200
+
+
+def test_catalog_version_follows_changes(app, client):
+    from server.models import db, Card
+    etag = client.get('/cards').headers['ETag']
+    db.session.get(Card, 1).power += 1
+    db.session.commit()
+    assert client.get('/cards', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_bootstrap_skips_a_current_catalog(client, make_user):
+    user_id = make_user('alice')['id']
+    first = client.get(f'/users/{user_id}/bootstrap').json
+    assert len(first['cards']) == len(client.get('/cards').json)
+    again = client.get(f"/users/{user_id}/bootstrap?catalog_version={first['catalog_version']}").json
+    assert 'cards' not in again
+    assert again['user']['id'] == user_id
+
+
+def walk(client, url):
+    """Every item of a collection, following X-Next-Cursor; and the page count."""
+    items, pages, after = [], 0, None
+    while True:
+        separator = '&' if '?' in url else '?'
+        response = client.get(url + (f'{separator}after={after}' if after is not None else ''))
+        assert response.status_code == 200
+        items += response.json
+        pages += 1
+        after = response.headers.get(NEXT_CURSOR_HEADER)
+        if after is None:
+            return items, pages
+
+
+def test_card_pages_cover_the_catalog_once(client):
+    everything = client.get('/cards').json
+    items, pages = walk(client, '/cards?limit=7')
+    assert items == everything
+    assert pages == -(-len(everything) // 7)
+
+
+def test_user_pages(client, make_user):
+    for name in ('alice', 'bobby', 'carol', 'david', 'erika'):
+        make_user(name)
+    items, pages = walk(client, '/users?limit=2&fields=username')
+    assert [item['username'] for item in items] == ['alice', 'bobby', 'carol', 'david', 'erika']
+    assert pages == 3
+    assert set(items[0]) == {'username'}
+
+
+def test_fields_projection(client, make_user):
+    user_id = make_user('alice')['id']
+    cards = client.get('/cards?fields=id,name,price').json
+    assert all(set(card) == {'id', 'name', 'price'} for card in cards)
+    inventory = client.get(f'/users/{user_id}/inventory?fields=card_id,quantity').json
+    assert all(set(row) == {'card_id', 'quantity'} for row in inventory)
+
+
+def test_bad_page_arguments(client, make_user):
+    user_id = make_user('alice')['id']
+    for url in ('/cards?limit=0', '/cards?after=x', '/cards?fields=id,secret', '/users?fields=password',
+                f'/users/{user_id}/inventory?fields=secret', '/users?limit=100000'):
+        response = client.get(url)
+        assert response.status_code == 400, url
+        assert 'error' in response.json
+
+
+def test_catalog_sees_changes_that_keep_the_totals(client, monkeypatch):
+    from sqlalchemy import update
+    from server.catalog import card_catalog
+    from server.models import db, Card
+
+    first, second = client.get('/cards?limit=2').json
+    etag = client.get('/cards').headers['ETag']
+    # Core UPDATEs skip the ORM events, as a reseed by another process would
+    cards = Card.__table__
+    db.session.execute(update(cards).where(cards.c.id == first['id']).values(cost=second['cost']))
+    db.session.execute(update(cards).where(cards.c.id == second['id']).values(cost=first['cost']))
+    db.session.commit()
+    monkeypatch.setattr(card_catalog, 'check_interval', 0.0)
+
+    response = client.get('/cards', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert [card['cost'] for card in response.json[:2]] == [second['cost'], first['cost']]
+
+
+def test_a_rebuild_leaves_taken_snapshots_alone(client):
+    from server.catalog import card_catalog
+    from server.models import db, Card
+
+    before = card_catalog.snapshot()
+    db.session.get(Card, 1).power += 1
+    db.session.commit()
+    after = card_catalog.snapshot()
+
+    assert after.version != before.version
+    assert after.by_id[1]['power'] == before.by_id[1]['power'] + 1
+    assert before.cards[0] is before.by_id[1]
+    assert client.get('/cards').headers['ETag'] == f'"{after.version}"'
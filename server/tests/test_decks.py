@@ -0,0 +1,50 @@
+def deck_cards(client, user_id, deck_id):
+    return {row['card']['id']: row['quantity'] for row in client.get(f'/users/{user_id}/decks/{deck_id}/cards').json}
+
+
+def test_put_replaces_the_deck(client, make_user):
+    user_id = make_user('alice')['id']
+    deck_id = client.get(f'/users/{user_id}/decks').json[0]['id']
+    current = deck_cards(client, user_id, deck_id)
+    kept, changed, dropped = sorted(current)[:3]
+    owned = {row['card_id']: row['quantity'] for row in client.get(f'/users/{user_id}/inventory').json}
+    client.post(f'/users/{user_id}/purchases', json={'items': [{'card_id': changed}]})
+    added = next(card['id'] for card in client.get('/cards').json if card['id'] not in owned)
+    client.post(f'/users/{user_id}/purchases', json={'items': [{'card_id': added}]})
+
+    desired = {kept: current[kept], changed: current[changed] + 1, added: 1}
+    response = client.put(f'/users/{user_id}/decks/{deck_id}/cards',
+                          json={str(card_id): quantity for card_id, quantity in desired.items()})
+    assert response.status_code == 200
+    assert {row['card']['id']: row['quantity'] for row in response.json} == desired
+    assert deck_cards(client, user_id, deck_id) == desired
+    assert dropped not in deck_cards(client, user_id, deck_id)
+
+
+def test_put_checks_ownership_and_volume(client, make_user):
+    user_id = make_user('alice')['id']
+    deck_id = client.get(f'/users/{user_id}/decks').json[0]['id']
+    before = deck_cards(client, user_id, deck_id)
+    owned = {row['card_id']: row['quantity'] for row in client.get(f'/users/{user_id}/inventory').json}
+    card_id, quantity = next(iter(owned.items()))
+    unowned = next(card['id'] for card in client.get('/cards').json if card['id'] not in owned)
+
+    short = client.put(f'/users/{user_id}/decks/{deck_id}/cards', json={str(card_id): quantity + 1})
+    assert short.status_code == 400
+    assert short.json['card_ids'] == [card_id]
+    assert client.put(f'/users/{user_id}/decks/{deck_id}/cards', json={str(unowned): 1}).status_code == 400
+    assert client.put(f'/users/{user_id}/decks/{deck_id}/cards', json={str(card_id): -1}).status_code == 400
+    assert client.put(f'/users/{user_id}/decks/{deck_id}/cards', json=['x']).status_code == 400
+    client.post(f'/users/{user_id}/purchases', json={'items': [{'card_id': card_id}]})
+    too_many = {str(card): count for card, count in owned.items()}
+    too_many[str(card_id)] += 1
+    assert client.put(f'/users/{user_id}/decks/{deck_id}/cards', json=too_many).status_code == 400
+    assert deck_cards(client, user_id, deck_id) == before
+
+
+def test_put_on_someone_elses_deck(client, make_user):
+    alice = make_user('alice')['id']
+    bob = make_user('bobby')['id']
+    deck_id = client.get(f'/users/{alice}/decks').json[0]['id']
+    assert client.put(f'/users/{bob}/decks/{deck_id}/cards', json={}).status_code == 404
+    assert client.put(f'/users/9999/decks/{deck_id}/cards', json={}).status_code == 404
@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from server.engine import CardTable, GameState, EMPTY, GUARD_BLOCK_LIMIT, LANES, STARTING_LIFE
+from server.engine import legal_placements, place_card, play_match, resolve_attack
+
+# Card indexes into TABLE
+PLAIN, STRONG, THIEF, GUARD, CURSE = range(5)
+
+TABLE = CardTable([
+    {'id': 1, 'name': 'Plain', 'power': 5, 'cost': 1},
+    {'id': 2, 'name': 'Strong', 'power': 9, 'cost': 4},
+    {'id': 3, 'name': 'Thief', 'power': 6, 'cost': 2, 'thief': True},
+    {'id': 4, 'name': 'Guard', 'power': 8, 'cost': 2, 'guard': True},
+    {'id': 5, 'name': 'Curse', 'power': 7, 'cost': 3, 'curse': True},
+])
+
+
+def board(attacker=(), defender=()):
+    """A state with side 0's and side 1's lanes filled from left to right."""
+    state = GameState(STARTING_LIFE, 10, [[], []])
+    for side, cards in enumerate((attacker, defender)):
+        for lane, card in enumerate(cards):
+            state.lanes[side * LANES + lane] = card
+    return state
+
+
+def test_unopposed_cards_hit_life():
+    state = board([PLAIN, STRONG, EMPTY])
+    resolve_attack(state, TABLE, 0)
+    assert state.life == [STARTING_LIFE, STARTING_LIFE - 14]
+
+
+def test_higher_power_destroys_lower_and_ties_destroy_both():
+    state = board([STRONG, PLAIN], [PLAIN, PLAIN])
+    resolve_attack(state, TABLE, 0)
+    assert state.lanes == [STRONG, EMPTY, EMPTY, EMPTY, EMPTY, EMPTY]
+    assert state.life == [STARTING_LIFE, STARTING_LIFE]
+
+
+def test_guards_block_thieves_in_adjacent_lanes_until_retired():
+    state = board([THIEF], [EMPTY, GUARD])
+    for _ in range(GUARD_BLOCK_LIMIT):
+        state.lanes[0] = THIEF
+        resolve_attack(state, TABLE, 0)
+    assert state.stats[1][1] == GUARD_BLOCK_LIMIT
+    assert state.lanes[LANES + 1] == EMPTY
+    assert state.life[1] == STARTING_LIFE
+
+    state.lanes[0] = THIEF
+    resolve_attack(state, TABLE, 0)
+    assert state.life[1] == STARTING_LIFE - 6
+
+
+def test_destroyed_curse_hits_its_killer():
+    state = board([STRONG], [CURSE])
+    resolve_attack(state, TABLE, 0)
+    assert state.lanes[LANES] == EMPTY
+    assert state.life == [STARTING_LIFE - 7, STARTING_LIFE]
+
+
+def test_placement_rules():
+    state = board()
+    state.hands[0] = [STRONG, PLAIN]
+    state.mana[0] = 3
+    assert legal_placements(state, TABLE, 0) == [(1, lane) for lane in range(LANES)]
+    with pytest.raises(ValueError):
+        place_card(state, TABLE, 0, 0, 0)
+    place_card(state, TABLE, 0, 1, 2)
+    assert state.mana[0] == 2 and state.lanes[2] == PLAIN
+    with pytest.raises(ValueError):
+        place_card(state, TABLE, 0, 0, 2)
+
+
+def test_matches_finish_and_are_reproducible():
+    deck = [PLAIN, STRONG, THIEF, GUARD, CURSE] * 4
+    first = play_match(TABLE, deck, deck, rng=random.Random(7))
+    again = play_match(TABLE, deck, deck, rng=random.Random(7))
+    assert first.winner is not None
+    assert first.to_dict() == again.to_dict()
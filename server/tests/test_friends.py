@@ -0,0 +1,117 @@
+import pytest
+
+from server.pagination import NEXT_CURSOR_HEADER
+
+
+@pytest.fixture
+def befriend(client):
+    def befriend(sender, receiver, receiver_name):
+        request_id = client.post(f'/users/{sender}/friend-requests', json={'username': receiver_name}).json['id']
+        response = client.post(f'/users/{receiver}/friend-requests/{request_id}/response', json={'action': 'accept'})
+        assert response.status_code == 200
+    return befriend
+
+
+def test_accepting_a_request_makes_friends(client, make_user, befriend):
+    alice = make_user('alice')['id']
+    bob = make_user('bobby')['id']
+    befriend(alice, bob, 'bobby')
+    assert [friend['id'] for friend in client.get(f'/users/{alice}/friends').json['friends']] == [bob]
+    again = client.post(f'/users/{bob}/friend-requests', json={'username': 'alice'})
+    assert again.status_code == 400
+
+
+def test_suggestions_rank_by_mutual_friends(client, make_user, befriend):
+    names = ['alice', 'bobby', 'carol', 'david', 'erika', 'frank']
+    ids = {name: make_user(name)['id'] for name in names}
+    # alice knows bobby and carol; both know david, only carol knows erika
+    befriend(ids['alice'], ids['bobby'], 'bobby')
+    befriend(ids['alice'], ids['carol'], 'carol')
+    befriend(ids['bobby'], ids['david'], 'david')
+    befriend(ids['carol'], ids['david'], 'david')
+    befriend(ids['carol'], ids['erika'], 'erika')
+    # A pending request to frank keeps him out of the suggestions
+    befriend(ids['erika'], ids['frank'], 'frank')
+    client.post(f"/users/{ids['alice']}/friend-requests", json={'username': 'frank'})
+
+    suggestions = client.get(f"/users/{ids['alice']}/friends/suggestions").json
+    assert suggestions == [
+        {'id': ids['david'], 'username': 'david', 'mutual_count': 2},
+        {'id': ids['erika'], 'username': 'erika', 'mutual_count': 1},
+    ]
+    assert client.get(f"/users/{ids['alice']}/friends/suggestions?limit=1").json == suggestions[:1]
+
+    mutual = client.get(f"/users/{ids['alice']}/friends/mutual/{ids['david']}").json
+    assert mutual['count'] == 2
+    assert {friend['username'] for friend in mutual['friends']} == {'bobby', 'carol'}
+
+
+def test_suggestion_limits(client, make_user):
+    alice = make_user('alice')['id']
+    assert client.get(f'/users/{alice}/friends/suggestions').json == []
+    assert client.get(f'/users/{alice}/friends/suggestions?limit=0').status_code == 400
+    assert client.get('/users/9999/friends/suggestions').status_code == 404
+
+
+def test_a_load_raced_by_an_invalidation_is_not_cached(make_user, monkeypatch):
+    from server.friend_graph import friend_graph
+    from server.models import db, friend_relationships
+
+    alice = make_user('alice')['id']
+    bob = make_user('bobby')['id']
+    load = friend_graph._load
+
+    def load_then_befriend(user_ids, now):
+        loaded = load(user_ids, now)
+        # A request accepted after the rows were read
+        db.session.execute(friend_relationships.insert(), [
+            {'user_id': alice, 'friend_id': bob}, {'user_id': bob, 'friend_id': alice},
+        ])
+        db.session.commit()
+        friend_graph.invalidate(alice, bob)
+        return loaded
+
+    monkeypatch.setattr(friend_graph, '_load', load_then_befriend)
+    assert friend_graph.friends_of(alice) == frozenset()
+    monkeypatch.undo()
+    assert friend_graph.friends_of(alice) == {bob}
+
+
+def test_suggestion_counts_do_not_grow_with_user_ids():
+    import time
+
+    import numpy as np
+    from server.friend_graph import FriendGraph
+
+    # An id this large would need terabytes if counts were indexed by id
+    big = 10 ** 12
+    graph = FriendGraph()
+    now = time.monotonic()
+    for user_id, friends in {1: {2, 3}, 2: {1, big}, 3: {1, big, big + 1}}.items():
+        graph._adjacency[user_id] = (now, frozenset(friends), np.fromiter(friends, dtype=np.int64))
+    assert graph.suggestions(1) == [(big, 2), (big + 1, 1)]
+    assert graph.suggestions(1, limit=1) == [(big, 2)]
+
+
+def test_friend_list_pages(client, make_user, befriend):
+    alice = make_user('alice')['id']
+    names = ('bobby', 'carol', 'david', 'erika', 'frank')
+    others = [make_user(name)['id'] for name in names]
+    for other, name in zip(others, names):
+        befriend(alice, other, name)
+
+    friends, after = [], None
+    while True:
+        response = client.get(f'/users/{alice}/friends?limit=2' + (f'&after={after}' if after else ''))
+        assert response.status_code == 200
+        assert response.json['received_requests'] == []
+        friends += response.json['friends']
+        after = response.headers.get(NEXT_CURSOR_HEADER)
+        if after is None:
+            break
+    assert [friend['id'] for friend in friends] == sorted(others)
+
+    usernames = client.get(f'/users/{alice}/friends?fields=username').json['friends']
+    assert usernames == [{'username': name} for name in names]
+    assert client.get(f'/users/{alice}/friends?fields=password').status_code == 400
+    assert client.get(f'/users/{alice}/friends?limit=0').status_code == 400
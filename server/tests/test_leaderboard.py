@@ -0,0 +1,55 @@
+import random
+
+from server.leaderboard import FenwickTree, Leaderboard
+
+
+def test_fenwick_prefix_and_find():
+    counts = [3, 0, 2, 5, 0, 1, 0, 0]
+    tree = FenwickTree.from_counts(counts, len(counts))
+    for value in range(len(counts)):
+        assert tree.prefix(value) == sum(counts[:value + 1])
+    tree.add(4, 2)
+    counts[4] += 2
+    running = 0
+    for value, count in enumerate(counts):
+        for k in range(running + 1, running + count + 1):
+            assert tree.find(k) == value
+        running += count
+
+
+def loaded(rows):
+    board = Leaderboard()
+    board.load(rows)
+    return board
+
+
+def sorted_entries(wins_of):
+    ordered = sorted(wins_of.items(), key=lambda item: (-item[1], item[0]))
+    entries, rank = [], 0
+    for position, (user_id, wins) in enumerate(ordered):
+        if position == 0 or wins != ordered[position - 1][1]:
+            rank = position + 1
+        entries.append((rank, user_id, wins))
+    return entries
+
+
+def test_entries_match_a_sort():
+    rng = random.Random(5)
+    wins_of = {user_id: rng.randrange(0, 40) for user_id in range(1, 300)}
+    board = loaded(wins_of.items())
+    expected = sorted_entries(wins_of)
+    assert board.entries(0, len(expected)) == expected
+    assert board.entries(37, 20) == expected[37:57]
+    for user_id in (1, 150, 299):
+        rank, position = board.rank(user_id)
+        assert expected[position] == (rank, user_id, wins_of[user_id])
+
+
+def test_updates_move_users_and_grow_the_tree():
+    board = loaded([(1, 5), (2, 3), (3, 3)])
+    board.set_wins(3, 500)
+    board.set_wins(4, 3)
+    board.remove(2)
+    assert board.top(10) == [(1, 3, 500), (2, 1, 5), (3, 4, 3)]
+    assert board.rank(2) is None
+    assert board.around(4, 1) == [(2, 1, 5), (3, 4, 3)]
@@ -0,0 +1,80 @@
+from server.app import app
+
+
+def start(client, user_id):
+    response = client.post(f'/users/{user_id}/arena-matches')
+    assert response.status_code == 201
+    return response.json['match_id']
+
+
+def report(client, user_id, match_id, outcome='victory', **stats):
+    return client.post(f'/users/{user_id}/matches', json={'match_id': match_id, 'outcome': outcome, **stats})
+
+
+def test_victory_records_wins_and_gems_once(client, make_user):
+    user_id = make_user('alice')['id']
+    reward = app.config['MATCH_VICTORY_REWARD']
+    match_id = start(client, user_id)
+    assert client.get(f'/users/{user_id}/matches').json == []
+
+    first = report(client, user_id, match_id, thiefDamage=12, guardBlocks=2)
+    assert first.status_code == 201
+    assert (first.json['wins'], first.json['wallet']) == (1, 100 + reward)
+    assert first.json['match']['thief_damage'] == 12
+
+    # A retried report returns the recorded result without paying again
+    retry = report(client, user_id, match_id, thiefDamage=12, guardBlocks=2)
+    assert retry.status_code == 200
+    assert (retry.json['wins'], retry.json['wallet']) == (1, 100 + reward)
+    assert retry.json['match']['outcome'] == 'victory'
+    assert len(client.get(f'/users/{user_id}/matches').json) == 1
+
+
+def test_defeat_pays_nothing(client, make_user):
+    user_id = make_user('alice')['id']
+    response = report(client, user_id, start(client, user_id), outcome='defeat')
+    assert response.status_code == 201
+    assert (response.json['wins'], response.json['wallet']) == (0, 100)
+
+
+def test_only_started_matches_are_paid(client, make_user):
+    user_id = make_user('alice')['id']
+    assert report(client, user_id, 'made-up-by-the-client').status_code == 404
+    assert client.get(f'/users/{user_id}').json['wallet'] == 100
+
+
+def test_match_id_belongs_to_one_user(client, make_user):
+    alice = make_user('alice')['id']
+    bob = make_user('bobby')['id']
+    match_id = start(client, alice)
+    assert report(client, bob, match_id).status_code == 409
+    assert report(client, alice, match_id).status_code == 201
+    assert client.get(f'/users/{bob}').json['wins'] == 0
+
+
+def test_invalid_reports(client, make_user):
+    user_id = make_user('alice')['id']
+    match_id = start(client, user_id)
+    assert client.post(f'/users/{user_id}/matches', json={}).status_code == 400
+    assert report(client, user_id, 'x' * 65).status_code == 400
+    assert report(client, user_id, match_id, thiefDamage=-1).status_code == 400
+    assert report(client, user_id, match_id, outcome='pending').status_code == 400
+    assert report(client, 9999, 'match-1').status_code == 404
+    assert client.post('/users/9999/arena-matches').status_code == 404
+
+
+def test_leaderboard_follows_recorded_wins(client, make_user):
+    alice = make_user('alice')['id']
+    bob = make_user('bobby')['id']
+    carol = make_user('carol')['id']
+    for _ in range(3):
+        report(client, bob, start(client, bob))
+    report(client, carol, start(client, carol))
+
+    board = client.get(f'/leaderboard?limit=2&neighbors=1&user_id={alice}').json
+    assert board['total'] == 3
+    assert [(entry['username'], entry['wins'], entry['rank']) for entry in board['top']] == [
+        ('bobby', 3, 1), ('carol', 1, 2),
+    ]
+    assert board['me'] == {'rank': 3, 'user_id': alice, 'username': 'alice', 'wins': 0}
+    assert [entry['user_id'] for entry in board['neighbors']] == [carol, alice]
@@ -0,0 +1,172 @@
+import pytest
+
+from server.matchmaking import MatchQueue, elo_delta
+from server.models import db
+
+
+def make_queue(**options):
+    options.setdefault('base_gap', 50)
+    options.setdefault('gap_per_second', 10.0)
+    options.setdefault('max_gap', 400)
+    options.setdefault('sweep_interval', 1.0)
+    return MatchQueue(**options)
+
+
+def join(queue, user_id, rating, now):
+    return queue.join(user_id, f'player{user_id}', user_id, rating, now)
+
+
+def test_pairs_the_closest_rating_within_the_gap():
+    queue = make_queue(base_gap=30)
+    assert join(queue, 1, 1000, 0.0) is None
+    assert join(queue, 2, 1040, 0.0) is None
+    assert join(queue, 3, 1200, 0.0) is None
+    pairing = join(queue, 4, 1030, 0.0)
+    assert [player.user_id for player in pairing.players] == [2, 4]
+    assert len(queue) == 2
+
+
+def test_ties_go_to_the_longest_waiting_player():
+    queue = make_queue(base_gap=30)
+    join(queue, 1, 1000, 0.0)
+    join(queue, 2, 1040, 0.0)
+    pairing = join(queue, 3, 1020, 0.0)
+    assert [player.user_id for player in pairing.players] == [1, 3]
+
+
+def test_gap_widens_while_waiting():
+    queue = make_queue()
+    join(queue, 1, 1000, 0.0)
+    join(queue, 2, 1150, 0.0)
+    assert queue.sweep(5.0) == []
+    # 50 + 10/s reaches 150 after ten seconds
+    pairings = queue.sweep(10.0)
+    assert [player.user_id for player in pairings[0].players] == [1, 2]
+    assert queue.status(1, 10.0)[0] == 'matched'
+
+
+def test_bucketed_search_matches_a_scan():
+    import random
+    rng = random.Random(3)
+    queue = make_queue(bucket_width=25)
+    waiting = {}
+    for user_id in range(1, 400):
+        rating = rng.randrange(800, 1600)
+        gap = queue.gap(0.0)
+        best = min(
+            ((abs(other - rating), user_id_) for user_id_, other in waiting.items() if abs(other - rating) <= gap),
+            default=None,
+        )
+        pairing = join(queue, user_id, rating, 0.0)
+        if best is None:
+            assert pairing is None
+            waiting[user_id] = rating
+        else:
+            opponent = next(player for player in pairing.players if player.user_id != user_id)
+            assert abs(opponent.rating - rating) == best[0]
+            del waiting[opponent.user_id]
+
+
+def test_leave_and_rejoin():
+    queue = make_queue()
+    join(queue, 1, 1000, 0.0)
+    assert queue.leave(1)
+    assert not queue.leave(1)
+    assert join(queue, 2, 1000, 0.0) is None
+
+    notified = []
+    queue.notify = lambda user_id, event, data: notified.append((user_id, event))
+    pairing = join(queue, 1, 1000, 0.0)
+    assert join(queue, 1, 1000, 0.0) == pairing
+    assert queue.leave(2)
+    assert (1, 'match_cancelled') in notified
+    assert queue.pairing(pairing.match_id) is None
+
+
+def test_reports_must_agree():
+    queue = make_queue()
+    join(queue, 1, 1000, 0.0)
+    match_id = join(queue, 2, 1000, 0.0).match_id
+    assert queue.report(match_id, 1, 1)[1] == 'waiting'
+    assert queue.report(match_id, 2, 2)[1] == 'disputed'
+    assert queue.report(match_id, 2, 1)[1] == 'agreed'
+    assert queue.report(match_id, 1, 1)[1] == 'settling'
+    queue.release(match_id)
+    assert queue.report(match_id, 1, 1)[1] == 'agreed'
+    assert queue.complete(match_id) is not None
+    assert queue.report(match_id, 1, 1) == (None, None)
+
+
+def test_elo_delta():
+    assert elo_delta(1200, 1200) == 16
+    assert elo_delta(1000, 1400) > elo_delta(1400, 1000) >= 1
+
+
+@pytest.fixture
+def paired(client, make_user):
+    """Two signed-up players with a pending pairing: (match_id, alice id, bob id)."""
+    alice = make_user('alice')['id']
+    bob = make_user('bobby')['id']
+    for user_id in (alice, bob):
+        deck_id = client.get(f'/users/{user_id}/decks').json[0]['id']
+        response = client.post(f'/users/{user_id}/matchmaking', json={'deck_id': deck_id})
+    assert response.status_code == 200
+    return response.json['match']['match_id'], alice, bob
+
+
+def report(client, match_id, user_id, winner_id, body=None):
+    """Report winner_id as the signed-in user_id."""
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+    return client.post(f'/matchmaking/{match_id}/result', json={'winner_id': winner_id, **(body or {})})
+
+
+def test_result_needs_both_players(client, paired):
+    match_id, alice, bob = paired
+    assert report(client, match_id, alice, alice).status_code == 202
+    assert report(client, match_id, bob, bob).status_code == 409
+    assert client.get(f'/users/{alice}').json['rating'] == 1200
+
+    response = report(client, match_id, bob, alice)
+    assert response.status_code == 200
+    assert response.json['winner'] == {'id': alice, 'rating': 1216}
+    assert response.json['loser'] == {'id': bob, 'rating': 1184}
+    assert report(client, match_id, bob, alice).status_code == 404
+
+
+def test_result_rejects_outsiders(client, paired, make_user):
+    match_id, alice, _ = paired
+    carol = make_user('carol')['id']
+    assert report(client, match_id, carol, alice).status_code == 403
+    assert report(client, match_id, alice, carol).status_code == 400
+    assert report(client, 'unknown', alice, alice).status_code == 404
+    with client.session_transaction() as session:
+        session.clear()
+    assert client.post(f'/matchmaking/{match_id}/result', json={'winner_id': alice}).status_code == 401
+
+
+def test_reporter_comes_from_the_session(client, paired):
+    match_id, alice, bob = paired
+    # Naming the other player in the body does not report for them
+    assert report(client, match_id, alice, alice, {'user_id': bob}).status_code == 202
+    assert report(client, match_id, alice, alice, {'user_id': bob}).status_code == 202
+    assert client.get(f'/users/{alice}').json['rating'] == 1200
+
+
+def test_failed_commit_keeps_the_pairing(client, paired, monkeypatch):
+    match_id, alice, bob = paired
+    report(client, match_id, alice, alice)
+
+    def fail():
+        raise RuntimeError('database went away')
+
+    monkeypatch.setattr(db.session, 'commit', fail)
+    # TESTING propagates the error instead of answering 500
+    with pytest.raises(RuntimeError):
+        report(client, match_id, bob, alice)
+    monkeypatch.undo()
+
+    assert client.get(f'/users/{alice}').json['rating'] == 1200
+    response = report(client, match_id, bob, alice)
+    assert response.status_code == 200
+    assert response.json['change'] == 16
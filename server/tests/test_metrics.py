@@ -0,0 +1,29 @@
+import gc
+import threading
+
+from server.metrics import MetricsRegistry
+
+
+def test_exited_threads_fold_into_one_shard():
+    registry = MetricsRegistry()
+    registry.counter('hits_total', 'Hits.', ('route',))
+    registry.histogram('latency_seconds', 'Latency.', (0.1, 1.0), ('route',))
+
+    def work():
+        registry.inc('hits_total', ('/a',))
+        registry.observe('latency_seconds', ('/a',), 0.5)
+
+    for _ in range(5):
+        threads = [threading.Thread(target=work) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    gc.collect()
+    work()
+
+    assert len(registry._shards) == 1
+    text = registry.render()
+    assert 'hits_total{route="/a"} 101' in text
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 101' in text
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 0' in text
@@ -0,0 +1,99 @@
+from server.catalog import PACKS, card_price
+
+
+def test_purchase_is_charged_the_catalog_price(client, make_user):
+    user_id = make_user('alice')['id']
+    card = client.get('/cards/1').json
+    response = client.post(f'/users/{user_id}/purchases', json={'items': [{'card_id': 1, 'quantity': 2}]})
+    assert response.status_code == 201
+    assert card['price'] == card_price(card)
+    assert response.json['cost'] == 2 * card['price']
+    assert response.json['wallet'] == 100 - 2 * card['price']
+    assert client.get(f'/users/{user_id}').json['wallet'] == response.json['wallet']
+
+
+def test_client_cost_must_match_the_price(client, make_user):
+    user_id = make_user('alice')['id']
+    response = client.post(f'/users/{user_id}/purchases', json={'items': [{'card_id': 1}], 'cost': 0})
+    assert response.status_code == 400
+    assert client.get(f'/users/{user_id}').json['wallet'] == 100
+    price = client.get('/cards/1').json['price']
+    response = client.post(f'/users/{user_id}/purchases', json={'items': [{'card_id': 1}], 'cost': price})
+    assert response.status_code == 201
+
+
+def test_purchase_adds_to_owned_and_new_cards(client, make_user):
+    user_id = make_user('alice')['id']
+    owned = {row['card_id']: row['quantity'] for row in client.get(f'/users/{user_id}/inventory').json}
+    owned_id = next(iter(owned))
+    new_id = next(card['id'] for card in client.get('/cards').json if card['id'] not in owned)
+    response = client.post(f'/users/{user_id}/purchases', json={
+        'items': [{'card_id': owned_id}, {'card_id': new_id}],
+    })
+    assert response.status_code == 201
+    quantities = {row['card_id']: row['quantity'] for row in response.json['inventory']}
+    assert quantities == {owned_id: owned[owned_id] + 1, new_id: 1}
+
+
+def test_not_enough_gems_changes_nothing(client, make_user):
+    user_id = make_user('alice', wallet=3)['id']
+    inventory = client.get(f'/users/{user_id}/inventory').json
+    response = client.post(f'/users/{user_id}/purchases', json={'items': [{'card_id': 1}]})
+    assert response.status_code == 400
+    assert response.json['error'] == 'Not enough gems'
+    assert client.get(f'/users/{user_id}').json['wallet'] == 3
+    assert client.get(f'/users/{user_id}/inventory').json == inventory
+
+
+def test_unknown_card_and_user(client, make_user):
+    user_id = make_user('alice')['id']
+    assert client.post(f'/users/{user_id}/purchases', json={'items': [{'card_id': 9999}]}).status_code == 404
+    assert client.post('/users/9999/purchases', json={'items': [{'card_id': 1}]}).status_code == 404
+
+
+def test_packs_are_drawn_and_priced_by_the_server(client, make_user):
+    user_id = make_user('alice')['id']
+    response = client.post(f'/users/{user_id}/purchases', json={'pack': 'booster', 'items': [{'card_id': 1}]})
+    assert response.status_code == 201
+    assert response.json['cost'] == PACKS['booster']['price']
+    assert len(response.json['cards']) == PACKS['booster']['cards']
+    assert response.json['wallet'] == 100 - PACKS['booster']['price']
+    assert client.post(f'/users/{user_id}/purchases', json={'pack': 'mystery', 'cost': 0}).status_code == 400
+
+
+def test_guard_bundle_only_holds_distinct_guards(client, make_user):
+    user_id = make_user('alice')['id']
+    cards = client.get('/cards').json
+    guards = [card['id'] for card in cards if card['guard']]
+    other = next(card['id'] for card in cards if not card['guard'])
+
+    def bundle(card_ids):
+        return client.post(f'/users/{user_id}/purchases', json={
+            'pack': 'guard', 'items': [{'card_id': card_id} for card_id in card_ids],
+        })
+
+    assert bundle([guards[0], other]).status_code == 400
+    assert bundle([guards[0], guards[0]]).status_code == 400
+    assert bundle(guards[:4]).status_code == 400
+    response = bundle(guards[:3])
+    assert response.status_code == 201
+    assert response.json['wallet'] == 100 - PACKS['guard']['price']
+
+
+def test_patch_only_changes_profile_fields(client, make_user):
+    user_id = make_user('alice')['id']
+    for field, value in (('wallet', 10 ** 6), ('wins', 50), ('rating', 3000), ('_password_hash', 'x')):
+        response = client.patch(f'/users/{user_id}', json={field: value})
+        assert response.status_code == 400, field
+    user = client.get(f'/users/{user_id}').json
+    assert (user['wallet'], user['wins'], user['rating']) == (100, 0, 1200)
+
+    response = client.patch(f'/users/{user_id}', json={'username': 'alicia'})
+    assert response.status_code == 200
+    assert response.json['username'] == 'alicia'
+
+
+def test_cards_are_only_added_by_purchases(client, make_user):
+    user_id = make_user('alice')['id']
+    response = client.post(f'/users/{user_id}/inventory', json={'card_id': 1, 'quantity': 50})
+    assert response.status_code == 405
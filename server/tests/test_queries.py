@@ -0,0 +1,59 @@
+"""Reads of a user's decks and inventory stay at a fixed number of statements."""
+
+from server.models import db, User
+from server.tests.conftest import count_queries
+
+
+def buy_every_card(client, user_id):
+    db.session.get(User, user_id).wallet = 10 ** 6
+    db.session.commit()
+    cards = client.get('/cards').json
+    response = client.post(f'/users/{user_id}/purchases', json={
+        'items': [{'card_id': card['id'], 'quantity': 1} for card in cards],
+    })
+    assert response.status_code == 201, response.json
+
+
+def queries_for(client, url):
+    # A first request loads the card catalog, which is then cached
+    assert client.get(url).status_code == 200
+    with count_queries() as statements:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(statements)
+
+
+def test_reads_do_not_grow_with_the_number_of_cards(client, make_user):
+    user_id = make_user('alice')['id']
+    deck_id = client.get(f'/users/{user_id}/decks').json[0]['id']
+    urls = (
+        f'/users/{user_id}/inventory',
+        f'/users/{user_id}/decks',
+        f'/users/{user_id}/decks/{deck_id}/cards',
+        f'/users/{user_id}/bootstrap',
+    )
+    before = {url: queries_for(client, url) for url in urls}
+
+    buy_every_card(client, user_id)
+    in_deck = {row['card']['id'] for row in client.get(f'/users/{user_id}/decks/{deck_id}/cards').json}
+    for row in client.get(f'/users/{user_id}/inventory').json:
+        if row['card_id'] not in in_deck:
+            client.post(f'/users/{user_id}/decks/{deck_id}/cards', json={'card_id': row['card_id']})
+    client.post(f'/users/{user_id}/decks', json={'name': 'Second'})
+
+    after = {url: queries_for(client, url) for url in urls}
+    assert after == before
+    assert before[f'/users/{user_id}/inventory'] == 1
+    assert before[f'/users/{user_id}/decks'] <= 2
+    assert before[f'/users/{user_id}/decks/{deck_id}/cards'] == 1
+
+
+def test_deck_cards_are_nested_from_the_catalog(client, make_user):
+    user_id = make_user('alice')['id']
+    deck_id = client.get(f'/users/{user_id}/decks').json[0]['id']
+    rows = client.get(f'/users/{user_id}/decks/{deck_id}/cards').json
+    catalog = {card['id']: card for card in client.get('/cards').json}
+    assert rows
+    for row in rows:
+        assert row['deck_id'] == deck_id
+        assert row['card'] == catalog[row['card']['id']]
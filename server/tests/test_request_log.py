@@ -0,0 +1,15 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from server.models import db
+
+
+def test_failed_statements_do_not_leave_timers_behind(app):
+    with db.engine.connect() as connection:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                connection.execute(text('SELECT * FROM no_such_table'))
+            connection.rollback()
+        connection.execute(text('SELECT 1'))
+        assert connection.info.get('query_started', []) == []